@@ -0,0 +1,16 @@
+"""
+Hong Kong mahjong hand analysis and scoring in Python.
+
+Mirrors the web app's rules (src/utils/handValidator.js,
+src/utils/scoringEngine.js, src/data/scoringRules.js) for offline and
+bulk use. Hands are 34-slot tile-count vectors; see tiles.py for the
+tile indices and hand.py for the decomposition engine.
+"""
+
+from .cache import ScoreCache
+from .hand import Decomposition, Hand, Meld, decompose, decompositions, is_winning
+from .scoring import score_hand
+from .waits import WaitAnalyzer, waits
+
+__all__ = ['Decomposition', 'Hand', 'Meld', 'ScoreCache', 'WaitAnalyzer', 'decompose',
+           'decompositions', 'is_winning', 'score_hand', 'waits']
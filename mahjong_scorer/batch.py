@@ -0,0 +1,224 @@
+"""
+Bulk scoring of recorded hands across a process pool.
+
+Input is JSONL or CSV, one hand per record:
+
+    {"id": "n1-h7", "tiles": ["1D", "2D", ...], "winType": "selfPick",
+     "seatWind": "east", "roundWind": "east", "seatNumber": 1, "flowers": [1]}
+
+Tiles may be a list of codes or {type, value} dicts, or a space-separated
+string of codes. Context keys can sit at the top level or under
+"context". CSV files have a tiles column plus one column per context key
+(flowers/seasons as space-separated seat numbers).
+
+Records are read in chunks, whole chunks are scored in worker processes,
+and results are written back in input order as each chunk finishes, so
+memory stays bounded by the number of chunks in flight.
+
+With a cache size, each worker keeps a ScoreCache. Recorded games repeat
+the same hands often. A cache database is shared by all workers and by
+later runs.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .cache import ScoreCache
+from .scoring import decomposition_dict, score_hand
+
+CONTEXT_KEYS = ('winType', 'seatWind', 'roundWind', 'seatNumber', 'isDealer',
+                'fullyConcealedHand', 'flowers', 'seasons', 'noFlowersSeasons')
+BOOL_KEYS = ('isDealer', 'fullyConcealedHand', 'noFlowersSeasons')
+CACHE_COUNTERS = ('hits', 'misses', 'db_hits', 'evictions')
+
+# Per-process scoring cache, set up by init_worker()
+_cache = None
+
+
+def init_worker(cache_size=0, cache_db=None):
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = ScoreCache(cache_size, cache_db) if cache_size or cache_db else None
+
+
+def _csv_context(row):
+    context = {}
+    for key in CONTEXT_KEYS:
+        value = (row.get(key) or '').strip()
+        if not value:
+            continue
+        if key in BOOL_KEYS:
+            context[key] = value.lower() in ('1', 'true', 'yes', 'y')
+        elif key == 'seatNumber':
+            context[key] = int(value)
+        elif key in ('flowers', 'seasons'):
+            context[key] = [int(v) for v in value.replace(',', ' ').split()]
+        else:
+            context[key] = value
+    return context
+
+
+def parse_record(item, fmt):
+    """(id, tiles, context) from a JSONL line or a CSV row dict."""
+    if fmt == 'csv':
+        # A short row leaves the cell None rather than ''
+        if not (item.get('tiles') or '').strip():
+            raise ValueError("no tiles")
+        return item.get('id'), item['tiles'].split(), _csv_context(item)
+    record = json.loads(item)
+    tiles = record['tiles']
+    if isinstance(tiles, str):
+        tiles = tiles.split()
+    context = dict(record.get('context') or {})
+    context.update({k: record[k] for k in CONTEXT_KEYS if k in record})
+    return record.get('id'), tiles, context
+
+
+def score_record(item, fmt, best=False):
+    """Score one input record; returns the output dict."""
+    try:
+        hand_id, tiles, context = parse_record(item, fmt)
+    except (ValueError, KeyError, TypeError) as e:
+        return {'id': None, 'error': f"Unreadable record: {e}"}
+    out = {'id': hand_id}
+    try:
+        if _cache is not None:
+            result = _cache.score(tiles, context, best)
+        else:
+            result = score_hand(tiles, context, best=best)
+    except (ValueError, KeyError, TypeError) as e:
+        out['error'] = str(e)
+        return out
+
+    if 'error' in result:
+        out['error'] = result['error']
+        return out
+    out.update({
+        'totalFan': result['totalFan'],
+        'payment': result['payment'],
+        'meetsMinimum': result['meetsMinimum'],
+        'patterns': [{'key': p['key'], 'name': p['name'], 'fan': p['fan']}
+                     for p in result['matchedPatterns']],
+        'decomposition': decomposition_dict(result['decomposition']),
+    })
+    return out
+
+
+def score_chunk(items, fmt, best=False):
+    """
+    Score a chunk in a worker. Returns (output lines, pattern counts,
+    invalid count, cache counter increments).
+    """
+    lines, patterns, invalid = [], Counter(), 0
+    before = _cache.stats() if _cache is not None else None
+    for item in items:
+        out = score_record(item, fmt, best)
+        if 'error' in out:
+            invalid += 1
+        else:
+            patterns.update(p['key'] for p in out['patterns'])
+        lines.append(json.dumps(out, ensure_ascii=False))
+
+    cache = Counter()
+    if _cache is not None:
+        _cache.flush()
+        after = _cache.stats()
+        cache.update({k: after[k] - before[k] for k in CACHE_COUNTERS})
+    return lines, patterns, invalid, cache
+
+
+def detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def iter_chunks(stream, fmt, chunk_size):
+    """Chunks of raw records (JSONL lines or CSV row dicts)."""
+    if fmt == 'csv':
+        records = csv.DictReader(stream)
+    else:
+        records = (line for line in stream if line.strip())
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(input_path, output_path='-', fmt=None, workers=None, chunk_size=2000,
+              best=False, progress=True, cache_size=0, cache_db=None):
+    """
+    Score every record of input_path into output_path ('-' for
+    stdin/stdout). Returns a summary dict with counts, timing,
+    per-pattern totals and, when caching, the cache counters.
+    """
+    fmt = fmt or detect_format(input_path)
+    workers = workers or os.cpu_count() or 1
+    log = sys.stderr
+
+    source = (io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if input_path == '-'
+              else open(input_path, newline='' if fmt == 'csv' else None, encoding='utf-8'))
+    sink = sys.stdout if output_path == '-' else open(output_path, 'w', encoding='utf-8')
+
+    start = time.perf_counter()
+    hands = invalid = 0
+    patterns, cache = Counter(), Counter()
+
+    def drain(lines, chunk_patterns, chunk_invalid, chunk_cache):
+        nonlocal hands, invalid
+        sink.write('\n'.join(lines) + '\n')
+        hands += len(lines)
+        invalid += chunk_invalid
+        patterns.update(chunk_patterns)
+        cache.update(chunk_cache)
+        if progress:
+            rate = hands / (time.perf_counter() - start)
+            print(f"\r🀄 {hands} hands scored ({rate:,.0f} hands/s)", end='', file=log, flush=True)
+
+    try:
+        chunks = iter_chunks(source, fmt, chunk_size)
+        if workers == 1:
+            init_worker(cache_size, cache_db)
+            try:
+                for chunk in chunks:
+                    drain(*score_chunk(chunk, fmt, best))
+            finally:
+                init_worker()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(cache_size, cache_db)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk, fmt, best))
+                    if len(pending) >= workers * 2:
+                        drain(*pending.popleft().result())
+                while pending:
+                    drain(*pending.popleft().result())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    if progress:
+        print(file=log)
+    summary = {
+        'hands': hands,
+        'valid': hands - invalid,
+        'invalid': invalid,
+        'seconds': elapsed,
+        'hands_per_second': hands / elapsed if elapsed else 0.0,
+        'workers': workers,
+        'patterns': dict(patterns.most_common()),
+    }
+    if cache_size or cache_db:
+        summary['cache'] = {k: cache[k] for k in CACHE_COUNTERS}
+    return summary
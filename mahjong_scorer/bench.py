@@ -0,0 +1,355 @@
+"""
+Microbenchmarks of hand parsing and scoring, for catching latency
+regressions between commits.
+
+Each corpus is a fixed list of (tiles, context) cases generated from its
+own seed, so every run and every commit times the same hands:
+
+    ambiguous         one-suit winning hands with the most readings
+                      (pair/sequence/triplet ambiguity), hardest first
+    seven_pairs       seven pairs, some with four of a kind
+    thirteen_orphans  thirteen orphans, every pair tile
+    nine_gates        pure nine gates shapes with each extra tile
+    bonus_heavy       winning hands with 4-8 flowers and seasons
+    random            14 tiles from a shuffled wall (mostly no win)
+
+Three stages are timed separately, for the Python scorer and, with
+node available, for the web app's engine (js/bench.mjs):
+
+    parse     tiles to readings: Hand.from_tiles + decompositions()
+              (parseHand in the app)
+    score     scoring an already parsed hand: calculate_score()
+              (calculateScore)
+    pipeline  both: score_hand() (calculateScore(parseHand(...)))
+
+The memo tables of hand.py are cleared at the start of every pass of
+parse and pipeline over the corpus (and that clear is inside the timed
+pass), so the search itself is timed rather than a cache lookup; the
+precomputed suit table stays in use.
+
+Each sample runs enough passes over the corpus to take at least
+min_time. Results are nanoseconds per hand (best and median of the
+samples) in a JSON document. compare() checks one against a baseline: a
+best time more than threshold slower is a regression.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from statistics import median
+
+from .hand import Hand, _decompose, decompositions, suit_shapes
+from .scoring import calculate_score, score_hand
+from .tiles import (FLOWER_BASE, NUM_BONUS, NUM_TILES, ORPHANS, TILES, WIND_BASE, WINDS,
+                    tile_code)
+
+BENCH_JS = os.path.join(os.path.dirname(__file__), 'js', 'bench.mjs')
+STAGES = ('parse', 'score', 'pipeline')
+FORMAT_VERSION = 1
+
+# Sets used to build winning hands: triplets, then sequences
+_MELDS = [(t, t, t) for t in range(NUM_TILES)] + [
+    (t, t + 1, t + 2) for t in range(WIND_BASE) if t % 9 < 7]
+
+
+# ----------------------------------------
+# Corpora
+# ----------------------------------------
+
+def _hand_from_counts(counts):
+    return [t for t in range(NUM_TILES) for _ in range(counts[t])]
+
+
+def _winning_counts(rng, tiles=range(NUM_TILES)):
+    pool = set(tiles)
+    melds = [m for m in _MELDS if set(m) <= pool]
+    while True:
+        counts = [0] * NUM_TILES
+        for meld in (rng.choice(melds) for _ in range(4)):
+            for t in meld:
+                counts[t] += 1
+        counts[rng.choice(sorted(pool))] += 2
+        if max(counts) <= 4:
+            return counts
+
+
+def _context(rng, bonus=()):
+    seat = rng.randrange(4)
+    return {
+        'winType': rng.choice(['discard', 'selfPick']),
+        'seatWind': WINDS[seat],
+        'roundWind': rng.choice(WINDS),
+        'seatNumber': seat + 1,
+        'fullyConcealedHand': rng.random() < 0.5,
+        'flowers': [b - FLOWER_BASE + 1 for b in bonus if b < FLOWER_BASE + 4],
+        'seasons': [b - FLOWER_BASE - 3 for b in bonus if b >= FLOWER_BASE + 4],
+    }
+
+
+def corpus_ambiguous(rng, size):
+    suit = rng.randrange(3) * 9
+    candidates = []
+    for _ in range(size * 4):
+        counts = _winning_counts(rng, range(suit, suit + 9))
+        candidates.append((len(decompositions(counts)), counts))
+        suit = (suit + 9) % 27
+    candidates.sort(key=lambda c: -c[0])
+    return [(_hand_from_counts(counts), _context(rng)) for _, counts in candidates[:size]]
+
+
+def corpus_seven_pairs(rng, size):
+    cases = []
+    for _ in range(size):
+        counts = [0] * NUM_TILES
+        for t in rng.sample(range(NUM_TILES), 7):
+            counts[t] = 2
+        if rng.random() < 0.2:
+            a, b = [t for t in range(NUM_TILES) if counts[t]][:2]
+            counts[a], counts[b] = 4, 0
+        cases.append((_hand_from_counts(counts), _context(rng)))
+    return cases
+
+
+def corpus_thirteen_orphans(rng, size):
+    cases = []
+    for i in range(size):
+        counts = [0] * NUM_TILES
+        for t in ORPHANS:
+            counts[t] = 1
+        counts[ORPHANS[i % len(ORPHANS)]] += 1
+        cases.append((_hand_from_counts(counts), _context(rng)))
+    return cases
+
+
+def corpus_nine_gates(rng, size):
+    cases = []
+    for i in range(size):
+        base = i % 3 * 9
+        counts = [0] * NUM_TILES
+        for v, c in enumerate((3, 1, 1, 1, 1, 1, 1, 1, 3)):
+            counts[base + v] = c
+        counts[base + i // 3 % 9] += 1
+        cases.append((_hand_from_counts(counts), _context(rng)))
+    return cases
+
+
+def corpus_bonus_heavy(rng, size):
+    cases = []
+    for _ in range(size):
+        bonus = sorted(rng.sample(range(FLOWER_BASE, FLOWER_BASE + NUM_BONUS), rng.randint(4, 8)))
+        cases.append((_hand_from_counts(_winning_counts(rng)) + bonus, _context(rng, bonus)))
+    return cases
+
+
+def corpus_random(rng, size):
+    wall = [t for t in range(NUM_TILES) for _ in range(4)]
+    return [(sorted(rng.sample(wall, 14)), _context(rng)) for _ in range(size)]
+
+
+CORPORA = {
+    'ambiguous': corpus_ambiguous,
+    'seven_pairs': corpus_seven_pairs,
+    'thirteen_orphans': corpus_thirteen_orphans,
+    'nine_gates': corpus_nine_gates,
+    'bonus_heavy': corpus_bonus_heavy,
+    'random': corpus_random,
+}
+
+
+def build_corpus(name, size=1000):
+    """The fixed cases of a corpus: a list of (tile indices, context)."""
+    return CORPORA[name](random.Random(f'bench:{name}'), size)
+
+
+def corpus_digest(cases):
+    """Short hash of a corpus, so results are only compared on identical hands."""
+    text = json.dumps(cases, separators=(',', ':'), sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+# ----------------------------------------
+# Timing
+# ----------------------------------------
+
+def _clear_memos():
+    suit_shapes.cache_clear()
+    _decompose.cache_clear()
+
+
+def _stage(stage, cases):
+    """A function making one pass of stage over cases."""
+    if stage == 'score':
+        parsed = []
+        for tiles, context in cases:
+            hand = Hand.from_tiles(tiles)
+            found = decompositions(hand)
+            parsed.append((hand, found[0] if found else None, context))
+
+        def run():
+            for hand, decomposition, context in parsed:
+                calculate_score(hand, decomposition, context)
+        return run
+
+    codes = [([tile_code(t) for t in tiles], context) for tiles, context in cases]
+    if stage == 'parse':
+        def run():
+            _clear_memos()
+            for tiles, _ in codes:
+                decompositions(Hand.from_tiles(tiles))
+    else:
+        def run():
+            _clear_memos()
+            for tiles, context in codes:
+                score_hand(tiles, context)
+    return run
+
+
+def _time(run, repeat, min_time):
+    """
+    Seconds per pass, repeat samples. Like timeit's autorange, each
+    sample runs enough passes to take at least min_time.
+    """
+    run()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        samples.append((time.perf_counter() - start) / loops)
+    return samples
+
+
+def _stats(times, hands):
+    ns = sorted(t * 1e9 / hands for t in times)
+    return {'hands': hands, 'repeat': len(ns), 'best_ns': round(ns[0], 1),
+            'median_ns': round(median(ns), 1), 'hands_per_second': round(1e9 / median(ns), 1)}
+
+
+def bench_python(corpora, stages=STAGES, repeat=5, min_time=0.2):
+    """{'py/<corpus>/<stage>': stats} for the Python scorer."""
+    return {f'py/{name}/{stage}': _stats(_time(_stage(stage, cases), repeat, min_time), len(cases))
+            for name, cases in corpora.items() for stage in stages}
+
+
+def bench_js(corpora, stages=STAGES, repeat=5, min_time=0.2, node='node'):
+    """The same measurements for the web app's engine, run by js/bench.mjs."""
+    job = {'tiles': [list(tile) for tile in TILES], 'stages': list(stages), 'repeat': repeat,
+           'minTime': min_time,
+           'corpora': {name: [[tiles, context] for tiles, context in cases]
+                       for name, cases in corpora.items()}}
+    out = subprocess.run([node, BENCH_JS], input=json.dumps(job).encode(),
+                         capture_output=True, check=True)
+    times = json.loads(out.stdout)
+    return {f'js/{name}/{stage}': _stats(times[name][stage], len(corpora[name]))
+            for name in corpora for stage in stages}
+
+
+def _node_version(node):
+    try:
+        return subprocess.run([node, '--version'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, cwd=os.path.dirname(__file__))
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmarks(corpora=None, stages=STAGES, engines=('py',), size=1000, repeat=5,
+                   min_time=0.2, node='node', progress=None):
+    """
+    Run the suite. Returns the results document: 'meta' (commit,
+    versions, settings), 'corpora' (name: digest) and 'results'
+    ('<engine>/<corpus>/<stage>': stats). progress(key) is called
+    before each engine and corpus.
+    """
+    names = list(corpora or CORPORA)
+    stages = stages or STAGES
+    built = {name: build_corpus(name, size) for name in names}
+    results = {}
+    for engine in engines:
+        for name in names:
+            if progress:
+                progress(f'{engine}/{name}')
+            one = {name: built[name]}
+            if engine == 'py':
+                results.update(bench_python(one, stages, repeat, min_time))
+            else:
+                results.update(bench_js(one, stages, repeat, min_time, node))
+
+    return {
+        'version': FORMAT_VERSION,
+        'meta': {
+            'commit': _git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'node': _node_version(node) if 'js' in engines else None,
+            'machine': f'{platform.system()} {platform.machine()}',
+            'size': size,
+            'repeat': repeat,
+            'min_time': min_time,
+        },
+        'corpora': {name: corpus_digest(built[name]) for name in names},
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.1):
+    """
+    Entries present in both documents, each with the baseline and
+    current best time per hand, their ratio and a status: 'regression'
+    when more than threshold slower, 'improvement' when more than
+    threshold faster, 'ok' otherwise. Best rather than median times are
+    compared since noise from other processes only ever adds time.
+    Corpora whose hands differ are skipped.
+    """
+    same = {name for name, digest in current['corpora'].items()
+            if baseline.get('corpora', {}).get(name) == digest}
+    rows = []
+    for key, stats in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None or key.split('/')[1] not in same:
+            continue
+        ratio = stats['best_ns'] / old['best_ns']
+        status = ('regression' if ratio > 1 + threshold
+                  else 'improvement' if ratio < 1 - threshold else 'ok')
+        rows.append({'key': key, 'baseline_ns': old['best_ns'],
+                     'current_ns': stats['best_ns'], 'ratio': round(ratio, 3), 'status': status})
+    return rows
+
+
+def print_results(document, rows=None, file=sys.stderr):
+    print(f"   {'benchmark':36} {'median':>10} {'best':>10} {'hands/s':>10}", file=file)
+    for key, stats in document['results'].items():
+        print(f"   {key:36} {_us(stats['median_ns']):>10} {_us(stats['best_ns']):>10} "
+              f"{stats['hands_per_second']:10,.0f}", file=file)
+    if rows is None:
+        return
+    print(f"   {'compared with baseline':36} {'before':>10} {'after':>10} {'change':>10}", file=file)
+    for row in rows:
+        mark = {'regression': '❌', 'improvement': '✅'}.get(row['status'], '  ')
+        print(f"{mark} {row['key']:36} {_us(row['baseline_ns']):>10} {_us(row['current_ns']):>10} "
+              f"{row['ratio'] - 1:+10.1%}", file=file)
+
+
+def _us(ns):
+    return f'{ns / 1000:.2f}µs'
@@ -0,0 +1,174 @@
+"""
+Memoized scoring: an LRU of score_hand() results, optionally backed by
+SQLite so results survive between runs and are shared between workers.
+
+Entries are keyed by the hand's canonical key (Hand.key(): the packed
+counts, bonus tiles and concealment of Hand.pack() in hex) plus a short hash of the game context.
+Only the context fields calculateScore reads go into the hash, and they
+are normalized the way it reads them. For example, winds only count
+when both are set, and isDealer only matters for the blessing hands. So
+contexts that score the same share an entry.
+
+Cached results are shared between callers; treat them as read-only.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+
+from .hand import Decomposition, Hand, Meld
+from .scoring import score_hand, seat_numbers
+from .tiles import FLOWERS, SEASONS
+
+BLESSINGS = ('heaven', 'earth', 'man')
+
+
+def context_signature(context):
+    """Normalized tuple of the context fields that can change a score."""
+    context = context or {}
+    win_type = context.get('winType')
+    seat_wind, round_wind = context.get('seatWind'), context.get('roundWind')
+    if not (seat_wind and round_wind):
+        seat_wind = round_wind = None
+    flowers = seat_numbers(context.get('flowers'), FLOWERS)
+    seasons = seat_numbers(context.get('seasons'), SEASONS)
+    return (
+        win_type,
+        seat_wind,
+        round_wind,
+        context.get('seatNumber') or 1,
+        bool(context.get('isDealer')) if win_type in BLESSINGS else None,
+        bool(context.get('fullyConcealedHand')) if win_type == 'discard' else None,
+        tuple(flowers),
+        tuple(seasons),
+        bool(context.get('noFlowersSeasons')),
+    )
+
+
+def context_hash(context):
+    """16 hex digits identifying context_signature(context)."""
+    text = json.dumps(context_signature(context), separators=(',', ':'))
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def cache_key(hand, context=None, best=False):
+    return f"{hand.key()}|{context_hash(context)}|{int(best)}"
+
+
+def _dump(result):
+    result = dict(result)
+    decomposition = result.get('decomposition')
+    if decomposition is not None:
+        result['decomposition'] = [decomposition.pattern, [list(m) for m in decomposition.melds],
+                                   decomposition.pair, list(decomposition.pairs)]
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load(text):
+    result = json.loads(text)
+    decomposition = result.get('decomposition')
+    if decomposition is not None:
+        pattern, melds, pair, pairs = decomposition
+        result['decomposition'] = Decomposition(pattern, tuple(Meld(*m) for m in melds),
+                                                pair, tuple(pairs))
+    return result
+
+
+class ScoreCache:
+    """
+    LRU cache in front of score_hand().
+
+    maxsize bounds the number of results kept in memory; 0 keeps none,
+    so every lookup goes to the database (if any). With a path,
+    results also go to a SQLite database there. An in-memory miss is
+    looked up in the database before scoring. New results are written in
+    batches of flush_every; call flush() or close() to write the rest.
+    """
+
+    def __init__(self, maxsize=4096, path=None, flush_every=256):
+        self.maxsize = maxsize
+        self.path = path
+        self.flush_every = flush_every
+        self._entries = OrderedDict()
+        self._pending = []
+        self.hits = self.misses = self.evictions = self.db_hits = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, result TEXT NOT NULL)')
+            self._db.commit()
+
+    def score(self, hand, context=None, best=False):
+        """score_hand(hand, context, best), from the cache when possible."""
+        if not isinstance(hand, Hand):
+            hand = Hand.from_tiles(hand)
+        key = cache_key(hand, context, best)
+
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        if self._db is not None:
+            row = self._db.execute('SELECT result FROM scores WHERE key = ?', (key,)).fetchone()
+            if row:
+                self.db_hits += 1
+                result = _load(row[0])
+        if result is None:
+            result = score_hand(hand, context, best)
+            if self._db is not None:
+                self._pending.append((key, _dump(result)))
+                if len(self._pending) >= self.flush_every:
+                    self.flush()
+
+        if self.maxsize <= 0:
+            return result
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def flush(self):
+        """Write pending results to the database."""
+        if self._db is not None and self._pending:
+            self._db.executemany('INSERT OR IGNORE INTO scores VALUES (?, ?)', self._pending)
+            self._db.commit()
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def clear(self):
+        """Empty the in-memory LRU (the database is kept)."""
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'db_hits': self.db_hits,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
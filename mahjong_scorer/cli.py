@@ -0,0 +1,307 @@
+"""
+Command line entry point: python -m mahjong_scorer <command> ...
+
+Results go to stdout (or --output); progress and summaries go to stderr
+so the output can be piped.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .rules import ENGINE_PATTERNS, MINIMUM_FAN, SCORING_PATTERNS
+from .suit_table import MAX_SUIT_TILES, TABLE_PATH
+
+
+def _pattern_names():
+    names = {key: p['name'] for group in SCORING_PATTERNS.values() for key, p in group.items()}
+    names.update({key: p['name'] for key, p in ENGINE_PATTERNS.items()})
+    return names
+
+
+def cmd_batch(args):
+    from .batch import run_batch
+
+    log = sys.stderr
+    summary = run_batch(args.input, args.output, fmt=args.format, workers=args.workers,
+                        chunk_size=args.chunk_size, best=args.best,
+                        progress=not args.quiet, cache_size=args.cache_size,
+                        cache_db=args.cache_db)
+
+    print(f"✅ {summary['hands']} hands in {summary['seconds']:.2f}s "
+          f"({summary['hands_per_second']:,.0f} hands/s, {summary['workers']} workers)", file=log)
+    if summary['invalid']:
+        print(f"❌ {summary['invalid']} invalid hands", file=log)
+    if 'cache' in summary:
+        c = summary['cache']
+        lookups = c['hits'] + c['misses']
+        print(f"💾 Cache: {c['hits']} hits, {c['misses']} misses ({c['db_hits']} from the database), "
+              f"{c['evictions']} evictions, {c['hits'] / max(lookups, 1):.0%} hit rate", file=log)
+    names = _pattern_names()
+    for key, count in summary['patterns'].items():
+        print(f"   {count:8d}  {names.get(key, key)}", file=log)
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary saved: {args.summary}", file=log)
+    return 0
+
+
+def cmd_build_table(args):
+    from .hand import search_suit
+    from .suit_table import SuitTable, build_table, iter_suit_vectors
+
+    print(f"🔍 Searching every suit vector of up to {args.max_tiles} tiles...", file=sys.stderr)
+    stats = build_table(args.output, args.max_tiles)
+    print(f"💾 {stats['keys']} of {stats['vectors']} suit vectors decompose "
+          f"({stats['shapes']} shapes, {stats['bytes'] / 1024:.0f} KB) "
+          f"in {stats['seconds']:.1f}s: {stats['path']}", file=sys.stderr)
+
+    if args.verify:
+        table = SuitTable(args.output)
+        bad = sum(1 for counts in iter_suit_vectors(args.max_tiles)
+                  if table.lookup(counts) != search_suit(counts))
+        table.close()
+        if bad:
+            print(f"❌ {bad} vectors read back differently", file=sys.stderr)
+            return 1
+        print("✅ Table matches the search for every vector", file=sys.stderr)
+    return 0
+
+
+def cmd_simulate(args):
+    from .simulate import print_report, simulate
+
+    log = sys.stderr
+    start = time.perf_counter()
+    progress = None
+    if not args.quiet:
+        def progress(totals, done, blocks):
+            rate = totals['games'] / (time.perf_counter() - start)
+            print(f"\r🎲 block {done}/{blocks}: {totals['games']} games, {totals['wins']} wins "
+                  f"({rate:,.0f} games/s)", end='', file=log, flush=True)
+
+    if args.checkpoint and os.path.exists(args.checkpoint) and not args.resume:
+        print(f"❌ {args.checkpoint} exists; pass --resume to continue it", file=log)
+        return 1
+    try:
+        totals = simulate(args.games, seed=args.seed, workers=args.workers,
+                          block_size=args.block_size, policy=args.policy, min_fan=args.min_fan,
+                          best=args.best, checkpoint=args.checkpoint,
+                          checkpoint_every=args.checkpoint_every, progress=progress)
+    except ValueError as e:
+        print(f"❌ {e}", file=log)
+        return 1
+    if not args.quiet:
+        print(file=log)
+    print_report(totals, file=log)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(totals, f, indent=2)
+        print(f"💾 Histograms saved: {args.output}", file=log)
+    return 0
+
+
+def cmd_crosscheck(args):
+    from .crosscheck import crosscheck
+
+    log = sys.stderr
+    start = time.perf_counter()
+    progress = None
+    if not args.quiet:
+        def progress(checked, disagreements):
+            rate = checked / (time.perf_counter() - start)
+            print(f"\r🔍 {checked} cases, {disagreements} disagreements ({rate:,.0f} cases/s)",
+                  end='', file=log, flush=True)
+
+    sink = open(args.disagreements, 'w', encoding='utf-8') if args.disagreements else None
+
+    def record(disagreement):
+        sink.write(json.dumps(disagreement, ensure_ascii=False) + '\n')
+
+    try:
+        summary = crosscheck(args.cases, mode=args.mode, seed=args.seed, workers=args.workers,
+                             block_size=args.block_size, batch_size=args.batch_size,
+                             node=args.node, on_disagreement=record if sink else None,
+                             progress=progress)
+    except (OSError, RuntimeError) as e:
+        print(f"\n❌ Could not run the JS engine: {e}", file=log)
+        return 1
+    finally:
+        if sink:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(file=log)
+
+    print(f"✅ {summary['cases']} cases in {elapsed:.1f}s ({summary['cases'] / elapsed:,.0f} cases/s): "
+          f"{summary['disagreements']} disagreements, {summary['unknown']} not known", file=log)
+    for kind in summary['kinds']:
+        mark = '  ' if kind['known'] else '❌'
+        example = kind['minimized']
+        print(f"{mark} {kind['count']:8d}  {example['signature']}", file=log)
+        print(f"             {example['case']['tiles']}  {json.dumps(example['case']['context'])}",
+              file=log)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report saved: {args.report}", file=log)
+    if args.disagreements:
+        print(f"💾 Disagreements saved: {args.disagreements}", file=log)
+    failed = summary['disagreements'] if args.strict else summary['unknown']
+    return 1 if failed else 0
+
+
+def cmd_bench(args):
+    from .bench import compare, print_results, run_benchmarks
+
+    log = sys.stderr
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    progress = None
+    if not args.quiet:
+        def progress(key):
+            print(f"\r⏱️  {key:40}", end='', file=log, flush=True)
+
+    engines = ('py', 'js') if args.js else ('py',)
+    try:
+        document = run_benchmarks(args.corpus, args.stage or None, engines, size=args.size,
+                                  repeat=args.repeat, min_time=args.min_time, node=args.node,
+                                  progress=progress)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"\n❌ Could not run the JS engine: {e}", file=log)
+        return 1
+    if not args.quiet:
+        print(file=log)
+
+    rows = compare(document, baseline, args.threshold) if baseline else None
+    print_results(document, rows, file=log)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"💾 Results saved: {args.output}", file=log)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+    if rows is not None:
+        regressions = [r for r in rows if r['status'] == 'regression']
+        if regressions:
+            print(f"❌ {len(regressions)} of {len(rows)} benchmarks are more than "
+                  f"{args.threshold:.0%} slower than {args.baseline}", file=log)
+            return 1
+        print(f"✅ No benchmark is more than {args.threshold:.0%} slower than {args.baseline}",
+              file=log)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m mahjong_scorer',
+        description='Score Hong Kong mahjong hands with the web app rules'
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    batch = sub.add_parser('batch', help='Score a JSONL or CSV file of hands')
+    batch.add_argument('input', help="JSONL or CSV of hands ('-' for stdin)")
+    batch.add_argument('-o', '--output', default='-',
+                       help="JSONL results, one line per input hand (default: stdout)")
+    batch.add_argument('--format', choices=['jsonl', 'csv'],
+                       help='Input format (default: from the file extension)')
+    batch.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    batch.add_argument('--chunk-size', type=int, default=2000,
+                       help='Hands per unit of work sent to a worker')
+    batch.add_argument('--best', action='store_true',
+                       help="Score every reading of a hand and keep the best, "
+                            "instead of the reading the web app picks")
+    batch.add_argument('--cache-size', type=int, default=0,
+                       help='Scores kept in memory per worker (0: none; with --cache-db, database only)')
+    batch.add_argument('--cache-db', help='SQLite file that keeps scores between runs')
+    batch.add_argument('--summary', help='Write the run summary as JSON here')
+    batch.add_argument('-q', '--quiet', action='store_true', help='No progress line')
+    batch.set_defaults(func=cmd_batch)
+
+    sim = sub.add_parser('simulate', help='Monte Carlo deals for Fan and payment distributions')
+    sim.add_argument('--games', type=int, default=100000)
+    sim.add_argument('--seed', type=int, default=0)
+    sim.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    sim.add_argument('--block-size', type=int, default=1000,
+                     help='Games per unit of work; each block has its own seed')
+    sim.add_argument('--policy', choices=['greedy', 'random'], default='greedy',
+                     help='Discard policy of every player')
+    sim.add_argument('--min-fan', type=int, default=MINIMUM_FAN,
+                     help='Smallest win a player will declare')
+    sim.add_argument('--best', action='store_true',
+                     help='Score the best reading of a win instead of the one the app picks')
+    sim.add_argument('--checkpoint', help='JSON file to save progress to and resume from')
+    sim.add_argument('--checkpoint-every', type=float, default=60.0, help='Seconds between saves')
+    sim.add_argument('--resume', action='store_true',
+                     help='Continue the run in --checkpoint (raise --games to extend it)')
+    sim.add_argument('-o', '--output', help='Write the final histograms as JSON here')
+    sim.add_argument('-q', '--quiet', action='store_true', help='No progress line')
+    sim.set_defaults(func=cmd_simulate)
+
+    check = sub.add_parser('crosscheck', help='Compare the scorer with the web app engine (needs node)')
+    check.add_argument('--cases', type=int, default=100000)
+    check.add_argument('--mode', choices=['sample', 'enumerate'], default='sample',
+                       help='Random hands and contexts, or every standard hand in turn')
+    check.add_argument('--seed', type=int, default=0)
+    check.add_argument('--workers', type=int,
+                       help='Worker processes, each with its own node (default: CPU count)')
+    check.add_argument('--block-size', type=int, default=20000, help='Cases per unit of work')
+    check.add_argument('--batch-size', type=int, default=2000, help='Cases per message to node')
+    check.add_argument('--node', default='node', help='Node.js executable')
+    check.add_argument('--report', help='Write the summary and minimized examples as JSON here')
+    check.add_argument('--disagreements', help='Write every disagreement as JSONL here')
+    check.add_argument('--strict', action='store_true',
+                       help='Fail on known divergences too, not only on new ones')
+    check.add_argument('-q', '--quiet', action='store_true', help='No progress line')
+    check.set_defaults(func=cmd_crosscheck)
+
+    bench = sub.add_parser('bench', help='Time parsing and scoring on fixed hand corpora')
+    bench.add_argument('--corpus', action='append',
+                       choices=['ambiguous', 'seven_pairs', 'thirteen_orphans', 'nine_gates',
+                                'bonus_heavy', 'random'],
+                       help='Corpus to run, repeatable (default: all)')
+    bench.add_argument('--stage', action='append', choices=['parse', 'score', 'pipeline'],
+                       help='Stage to time, repeatable (default: all)')
+    bench.add_argument('--size', type=int, default=1000, help='Hands per corpus')
+    bench.add_argument('--repeat', type=int, default=5, help='Timed samples per benchmark')
+    bench.add_argument('--min-time', type=float, default=0.2,
+                       help='Seconds each sample runs for, in whole passes over the corpus')
+    bench.add_argument('--js', action='store_true', help="Also time the web app's engine (needs node)")
+    bench.add_argument('--node', default='node', help='Node.js executable')
+    bench.add_argument('-o', '--output', help='Write the results JSON here (default: stdout)')
+    bench.add_argument('--baseline', help='Results JSON of an earlier run to compare with')
+    bench.add_argument('--threshold', type=float, default=0.1,
+                       help='Slowdown of the best time that counts as a regression (0.1: 10%%)')
+    bench.add_argument('-q', '--quiet', action='store_true', help='No progress line')
+    bench.set_defaults(func=cmd_bench)
+
+    table = sub.add_parser('build-table', help='Precompute the per-suit winning shape table')
+    table.add_argument('-o', '--output', default=TABLE_PATH)
+    table.add_argument('--max-tiles', type=int, default=MAX_SUIT_TILES,
+                       help='Largest number of tiles of one suit to cover')
+    table.add_argument('--verify', action='store_true',
+                       help='Read the table back and compare it with the search')
+    table.set_defaults(func=cmd_build_table)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,448 @@
+"""
+Differential testing of the Python scorer against the web app's engine.
+
+Cases (a hand plus a game context) are scored by score_hand() and by
+calculateScore(parseHand(...)) from src/utils. The JS side runs in one
+long-lived Node process (js/engine_server.mjs), fed batches of cases as
+JSON lines over a pipe. Each batch is written to Node before Python
+scores its own copy, so both engines work at the same time.
+
+Two results agree when parse success, total Fan, payment, the minimum
+Fan flag and the ordered list of pattern names are all equal. Each
+disagreement is recorded. Per distinct kind of disagreement, one example
+is shrunk to a minimal case that still disagrees: context keys dropped,
+bonus tiles dropped, tiles lowered.
+
+Hands are sent in tile-index order, the order the Python decomposition
+mirrors. One divergence is known: parseHand drops the sevenPairs and
+thirteenOrphans flags, so the app scores those hands as empty hands
+(no sets, no pair). For such hands the app's answer is modelled by
+scoring that empty reading in Python; only a JS result equal to the
+model is reported as known, anything else is compared against the model.
+"""
+
+import json
+import os
+import random
+import subprocess
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations_with_replacement
+
+from .hand import SEVEN_PAIRS, STANDARD, THIRTEEN_ORPHANS, Decomposition, Hand, decompositions
+from .scoring import calculate_score, score_hand
+from .tiles import (FLOWER_BASE, NUM_BONUS, NUM_TILES, ORPHANS, TILES, WIND_BASE, WINDS,
+                    tile_code, tile_index)
+
+SERVER = os.path.join(os.path.dirname(__file__), 'js', 'engine_server.mjs')
+
+KNOWN_PATTERNS = ('Seven Pairs (七對子)', 'Thirteen Orphans (十三么)')
+KNOWN_KIND = '<known divergence>'
+WIN_TYPES = (None, 'discard', 'selfPick', 'kongReplacement', 'doubleKongReplacement',
+             'robbingKong', 'moonUnderSea', 'heaven', 'earth', 'man')
+
+# Every set a standard hand can contain: 34 triplets, then the 21 sequences
+MELDS = [(t, t, t) for t in range(NUM_TILES)] + [
+    (t, t + 1, t + 2) for t in range(WIND_BASE) if t % 9 < 7]
+# Pairs that fit, on average, per choice of four sets
+HANDS_PER_CHOICE = 32
+
+
+class NodeEngine:
+    """The JS scoring engine in a persistent Node process."""
+
+    def __init__(self, node='node', server=SERVER):
+        self.process = subprocess.Popen([node, server], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, bufsize=1 << 20)
+        self._send({'tiles': [list(tile) for tile in TILES]})
+        if not json.loads(self._receive()).get('ready'):
+            raise RuntimeError("Node engine did not start")
+
+    def _send(self, message):
+        self.process.stdin.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+        self.process.stdin.flush()
+
+    def _receive(self):
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Node engine exited with code {self.process.poll()}")
+        return line
+
+    def submit(self, cases):
+        """Send a batch; collect() returns its results."""
+        self._send([[list(tiles), context] for tiles, context in cases])
+
+    def collect(self):
+        return [tuple(r[:4]) + (tuple(r[4]),) for r in json.loads(self._receive())]
+
+    def score(self, cases):
+        self.submit(cases)
+        return self.collect()
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _hand(tiles):
+    counts = [0] * NUM_TILES
+    bonus = []
+    for t in tiles:
+        if t < NUM_TILES:
+            counts[t] += 1
+        else:
+            bonus.append(t)
+    return Hand(counts, bonus)
+
+
+def _result_tuple(result):
+    return ('error' not in result, result['totalFan'], result['payment'], result['meetsMinimum'],
+            tuple(p['name'] for p in result['matchedPatterns']))
+
+
+def python_result(case):
+    """The Python engine's answer in the JS server's shape."""
+    tiles, context = case
+    return _result_tuple(score_hand(_hand(tiles), context))
+
+
+def app_model(case, py):
+    """
+    What the app is expected to answer: py itself, except for seven pairs
+    and thirteen orphans hands, where parseHand drops the flag and the
+    app scores an empty reading.
+    """
+    if not any(name in py[4] for name in KNOWN_PATTERNS):
+        return py
+    tiles, context = case
+    hand = _hand(tiles)
+    found = decompositions(hand)
+    if not found or found[0].pattern not in (SEVEN_PAIRS, THIRTEEN_ORPHANS):
+        return py
+    return _result_tuple(calculate_score(hand, Decomposition(STANDARD, (), None, None), context))
+
+
+# ----------------------------------------
+# Cases
+# ----------------------------------------
+
+def random_context(rng):
+    context = {}
+    win_type = rng.choice(WIN_TYPES)
+    if win_type:
+        context['winType'] = win_type
+    for key in ('seatWind', 'roundWind'):
+        if rng.random() < 0.8:
+            context[key] = rng.choice(WINDS)
+    if rng.random() < 0.8:
+        context['seatNumber'] = rng.randint(1, 4)
+    for key in ('isDealer', 'fullyConcealedHand'):
+        if rng.random() < 0.5:
+            context[key] = rng.random() < 0.5
+    for key in ('flowers', 'seasons'):
+        if rng.random() < 0.5:
+            context[key] = sorted(rng.sample(range(1, 5), rng.randint(0, 4)))
+    if rng.random() < 0.05:
+        context['noFlowersSeasons'] = True
+    return context
+
+
+def random_hand(rng):
+    """
+    14 regular tiles, mostly winning shapes, sometimes with bonus tiles.
+    A few hands get a fourth copy of a pung, as with a declared kong,
+    which both engines must reject.
+    """
+    counts = [0] * NUM_TILES
+    kind = rng.random()
+    if kind < 0.1:
+        for t in rng.sample(range(NUM_TILES), 7):
+            counts[t] = 2
+    elif kind < 0.13:
+        for t in ORPHANS:
+            counts[t] = 1
+        counts[rng.choice(ORPHANS)] += 1
+    elif kind < 0.16:
+        base = rng.randrange(3) * 9
+        for v, c in enumerate((3, 1, 1, 1, 1, 1, 1, 1, 3)):
+            counts[base + v] = c
+        counts[base + rng.randrange(9)] += 1
+    elif kind < 0.28:
+        for t in rng.sample([t for t in range(NUM_TILES) for _ in range(4)], 14):
+            counts[t] += 1
+    else:
+        # Melds from a random pool, so flushes and honour hands come up often
+        pool = rng.choice([range(NUM_TILES), range(9), range(WIND_BASE, NUM_TILES),
+                           list(range(9)) + list(range(WIND_BASE, NUM_TILES)), ORPHANS])
+        pool = set(pool)
+        melds = [m for m in MELDS if set(m) <= pool]
+        while True:
+            counts = [0] * NUM_TILES
+            for meld in (rng.choice(melds) for _ in range(4)):
+                for t in meld:
+                    counts[t] += 1
+            counts[rng.choice(sorted(pool))] += 2
+            if max(counts) <= 4:
+                break
+    pungs = [t for t in range(NUM_TILES) if counts[t] == 3]
+    if pungs and rng.random() < 0.03:
+        counts[rng.choice(pungs)] += 1
+    tiles = [t for t in range(NUM_TILES) for _ in range(counts[t])]
+    if rng.random() < 0.3:
+        tiles += sorted(rng.sample(range(FLOWER_BASE, FLOWER_BASE + NUM_BONUS), rng.randint(1, 8)))
+    return tuple(tiles)
+
+
+def sample_cases(seed, block, size):
+    """size random cases, reproducible from (seed, block)."""
+    rng = random.Random(f'{seed}:{block}')
+    return [(random_hand(rng), random_context(rng)) for _ in range(size)]
+
+
+@lru_cache(maxsize=1)
+def set_choices():
+    """Every choice of four sets (repeats allowed) using no tile more than four times."""
+    choices = []
+    for melds in combinations_with_replacement(range(len(MELDS)), 4):
+        counts = Counter(t for m in melds for t in MELDS[m])
+        if max(counts.values()) <= 4:
+            choices.append(melds)
+    return choices
+
+
+def standard_hands(melds):
+    """The hands of these four sets plus each pair that still fits."""
+    counts = [0] * NUM_TILES
+    for m in melds:
+        for t in MELDS[m]:
+            counts[t] += 1
+    hands = []
+    for pair in range(NUM_TILES):
+        if counts[pair] <= 2:
+            counts[pair] += 2
+            hands.append(tuple(t for t in range(NUM_TILES) for _ in range(counts[t])))
+            counts[pair] -= 2
+    return hands
+
+
+def enumerate_cases(seed, block, size):
+    """
+    Block of the exhaustive enumeration of standard hands: every choice
+    of four sets and a pair, 11.6M hands from 366,528 choices of sets. A
+    block covers size // HANDS_PER_CHOICE choices, about size hands;
+    past the end it is empty. Each hand
+    gets a random context, reproducible from (seed, block).
+    """
+    per_block = max(1, size // HANDS_PER_CHOICE)
+    rng = random.Random(f'{seed}:enumerate:{block}')
+    return [(tiles, random_context(rng))
+            for melds in set_choices()[block * per_block:(block + 1) * per_block]
+            for tiles in standard_hands(melds)]
+
+
+# ----------------------------------------
+# Comparison
+# ----------------------------------------
+
+def signature(case, py, js):
+    """
+    Kind of disagreement: parse results and the patterns only one side
+    found, against app_model(). A JS result that is exactly the known
+    divergence is one kind per special hand; when it differs from the
+    model in any other way the case is compared against the model.
+    """
+    expected = app_model(case, py)
+    if expected is not py and expected == js:
+        name = next(name for name in KNOWN_PATTERNS if name in py[4])
+        return (py[0], js[0], (name,), (KNOWN_KIND,))
+    only_py = Counter(expected[4]) - Counter(js[4])
+    only_js = Counter(js[4]) - Counter(expected[4])
+    if not only_py and not only_js:
+        return (expected[0], js[0], ('<same patterns>',), ())
+    return (expected[0], js[0], tuple(sorted(only_py.elements())), tuple(sorted(only_js.elements())))
+
+
+def is_known(sig):
+    return sig[3] == (KNOWN_KIND,)
+
+
+def case_dict(case):
+    tiles, context = case
+    return {'tiles': ' '.join(tile_code(t) for t in tiles), 'context': context}
+
+
+def result_dict(result):
+    parsed, fan, payment, meets, names = result
+    return {'parsed': parsed, 'totalFan': fan, 'payment': payment,
+            'meetsMinimum': meets, 'patterns': list(names)}
+
+
+def disagreement(case, py, js):
+    sig = signature(case, py, js)
+    record = {'case': case_dict(case), 'python': result_dict(py), 'js': result_dict(js),
+              'signature': _sig_text(sig), 'known': is_known(sig)}
+    expected = app_model(case, py)
+    if expected is not py:
+        record['app_model'] = result_dict(expected)
+    return record
+
+
+def _sig_text(sig):
+    py_parsed, js_parsed, only_py, only_js = sig
+    return (f"parsed py={py_parsed} js={js_parsed}; python only: {', '.join(only_py) or '-'}; "
+            f"js only: {', '.join(only_js) or '-'}")
+
+
+def compare(engine, cases, batch_size=2000):
+    """Score cases with both engines. Returns (disagreements, count)."""
+    found = []
+    batches = [cases[i:i + batch_size] for i in range(0, len(cases), batch_size)]
+    for batch in batches:
+        engine.submit(batch)
+        py_results = [python_result(case) for case in batch]
+        for case, py, js in zip(batch, py_results, engine.collect()):
+            if py != js:
+                found.append(disagreement(case, py, js))
+    return found, len(cases)
+
+
+def minimize(engine, case):
+    """
+    Shrink a disagreeing case while it keeps the same kind of
+    disagreement: drop context keys and list entries, drop bonus tiles,
+    then lower tiles one at a time.
+    """
+    def sig_of(c):
+        py, js = python_result(c), engine.score([c])[0]
+        return signature(c, py, js) if py != js else None
+
+    target = sig_of(case)
+    tiles, context = list(case[0]), dict(case[1])
+
+    def still(tiles, context):
+        return sig_of((tuple(sorted(tiles)), context)) == target
+
+    changed = True
+    while changed:
+        changed = False
+        for key in list(context):
+            trial = {k: v for k, v in context.items() if k != key}
+            if still(tiles, trial):
+                context, changed = trial, True
+                continue
+            if isinstance(context[key], list):
+                for i in range(len(context[key])):
+                    trial = dict(context, **{key: context[key][:i] + context[key][i + 1:]})
+                    if still(tiles, trial):
+                        context, changed = trial, True
+                        break
+        for t in sorted(set(t for t in tiles if t >= NUM_TILES)):
+            trial = list(tiles)
+            trial.remove(t)
+            if still(trial, context):
+                tiles, changed = trial, True
+        for i, t in enumerate(tiles):
+            if t >= NUM_TILES:
+                continue
+            for lower in range(t):
+                trial = tiles[:i] + [lower] + tiles[i + 1:]
+                if trial.count(lower) <= 4 and still(trial, context):
+                    tiles, changed = sorted(trial), True
+                    break
+            if changed:
+                break
+    return tuple(sorted(tiles)), context
+
+
+# ----------------------------------------
+# Runs
+# ----------------------------------------
+
+_engine = None
+
+
+MODES = ('sample', 'enumerate')
+
+
+def _init_worker(node):
+    global _engine
+    _engine = NodeEngine(node)
+
+
+def check_block(mode, seed, block, block_size, batch_size):
+    make = sample_cases if mode == 'sample' else enumerate_cases
+    cases = make(seed, block, block_size)
+    return compare(_engine, cases, batch_size)
+
+
+def crosscheck(cases, mode='sample', seed=0, workers=None, block_size=20000, batch_size=2000,
+               node='node', on_disagreement=None, progress=None):
+    """
+    Run about cases cases through both engines in blocks across workers
+    (one Node process each). Enumeration stops early when it runs out of
+    hands. on_disagreement(record) is called for every
+    disagreement, in block order. Returns a summary with the counts per
+    kind of disagreement and a minimized example of each.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    blocks = -(-cases // block_size)
+    if mode == 'enumerate':
+        blocks = min(blocks, -(-len(set_choices()) // max(1, block_size // HANDS_PER_CHOICE)))
+    workers = workers or os.cpu_count() or 1
+    checked = 0
+    kinds = {}
+
+    def finish(result):
+        nonlocal checked
+        found, count = result
+        checked += count
+        for record in found:
+            kind = kinds.setdefault(record['signature'], {'count': 0, 'known': record['known'],
+                                                          'example': record})
+            kind['count'] += 1
+            if on_disagreement:
+                on_disagreement(record)
+        if progress:
+            progress(checked, sum(k['count'] for k in kinds.values()))
+
+    if workers == 1:
+        _init_worker(node)
+        try:
+            for block in range(blocks):
+                finish(check_block(mode, seed, block, block_size, batch_size))
+        finally:
+            _engine.close()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(node,)) as pool:
+            pending = deque()
+            for block in range(blocks):
+                pending.append(pool.submit(check_block, mode, seed, block, block_size, batch_size))
+                if len(pending) >= workers * 2:
+                    finish(pending.popleft().result())
+            while pending:
+                finish(pending.popleft().result())
+
+    with NodeEngine(node) as engine:
+        for kind in kinds.values():
+            example = kind['example']
+            tiles = tuple(sorted(tile_index(code) for code in example['case']['tiles'].split()))
+            small = minimize(engine, (tiles, example['case']['context']))
+            kind['minimized'] = disagreement(small, python_result(small), engine.score([small])[0])
+
+    return {
+        'cases': checked,
+        'disagreements': sum(k['count'] for k in kinds.values()),
+        'unknown': sum(k['count'] for k in kinds.values() if not k['known']),
+        'kinds': sorted(kinds.values(), key=lambda k: -k['count']),
+    }
+
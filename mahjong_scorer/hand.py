@@ -0,0 +1,320 @@
+"""
+Hands as tile-count vectors, and every way to read them as a win.
+
+A Hand is a 34-slot count vector of regular tiles plus the bonus tiles.
+decompositions() enumerates all winning readings of it: standard (four
+sets and a pair), seven pairs and thirteen orphans.
+
+The standard search works per suit. Tiles of different suits can never
+share a set, so each suit's 9-slot count vector is split into sets (plus
+at most one pair) on its own by a memoized recursion. The recursion
+always takes the lowest remaining tile and tries a sequence, a triplet,
+a quadruplet or a pair starting there. The suits' shapes are then
+combined. A suit vector recurs across many hands, so after warm-up most
+lookups are cache hits. The shapes of every suit vector of up to 14
+tiles are also precomputed in a memory-mapped table (suit_table.py),
+which is used instead of the search when present.
+
+Like parseHand, only hands of 13 or 14 regular tiles are read at all
+(HAND_SIZES): a hand with declared kongs has 15 or more and never wins,
+even though the per-suit search can place quadruplets.
+
+The first decomposition returned is the one parseHand in
+src/utils/handValidator.js finds for the same tiles in index order:
+standard before seven pairs before thirteen orphans; lowest pair first;
+then sequence before triplet before quadruplet from the lowest tile.
+"""
+
+import os
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+from .tiles import (COUNT_BITS, FLOWER_BASE, NUM_BONUS, NUM_TILES, ORPHANS, WIND_BASE, is_bonus,
+                    pack_counts, tile_code, tile_dict, tile_index, tile_mask, unpack_counts)
+
+# Hand.pack(): counts, then the bonus tile bits, then the concealed flag
+_BONUS_SHIFT = COUNT_BITS * NUM_TILES
+_CONCEALED_SHIFT = _BONUS_SHIFT + NUM_BONUS
+
+SEQUENCE = 'sequence'
+TRIPLET = 'triplet'
+QUADRUPLET = 'quadruplet'
+PAIR = 'pair'
+
+STANDARD = 'standard'
+SEVEN_PAIRS = 'sevenPairs'
+THIRTEEN_ORPHANS = 'thirteenOrphans'
+
+# Regular tile counts parseHand accepts; anything else is not a win
+HAND_SIZES = (13, 14)
+
+# Search order of parseHand: sequence, then triplet, then quadruplet
+_KIND_RANK = {SEQUENCE: 0, TRIPLET: 1, QUADRUPLET: 2}
+_SET_SIZE = {SEQUENCE: 3, TRIPLET: 3, QUADRUPLET: 4}
+
+Meld = namedtuple('Meld', 'kind tile')
+Meld.__doc__ = "A set; tile is its lowest tile index."
+
+Decomposition = namedtuple('Decomposition', 'pattern melds pair pairs')
+Decomposition.__doc__ = """
+One reading of a winning hand.
+
+pattern is STANDARD, SEVEN_PAIRS or THIRTEEN_ORPHANS. Standard hands
+have four melds and a pair (a tile index). Seven pairs have the seven
+pair tiles in pairs (four of a kind counts as two pairs, as in parseHand).
+Thirteen orphans have the duplicated tile in pair.
+"""
+
+
+class Hand:
+    """Regular tile counts (34 slots), bonus tile ids and concealment."""
+
+    __slots__ = ('counts', 'bonus', 'concealed')
+
+    def __init__(self, counts, bonus=(), concealed=True):
+        self.counts = tuple(counts)
+        self.bonus = tuple(sorted(bonus))
+        self.concealed = concealed
+        if len(self.counts) != NUM_TILES:
+            raise ValueError(f"expected {NUM_TILES} counts, got {len(self.counts)}")
+        if any(c < 0 or c > 4 for c in self.counts):
+            raise ValueError("tile counts must be between 0 and 4")
+
+    @classmethod
+    def from_tiles(cls, tiles):
+        """Build from tile dicts or codes; dicts may carry a concealed flag."""
+        counts = [0] * NUM_TILES
+        bonus = []
+        concealed = True
+        for tile in tiles:
+            index = tile_index(tile)
+            if is_bonus(index):
+                bonus.append(index)
+            else:
+                counts[index] += 1
+            if isinstance(tile, dict) and tile.get('concealed') is False:
+                concealed = False
+        return cls(counts, bonus, concealed)
+
+    @classmethod
+    def unpack(cls, packed):
+        """Inverse of pack()."""
+        bonus = [FLOWER_BASE + i for i in range(NUM_BONUS) if packed >> (_BONUS_SHIFT + i) & 1]
+        return cls(unpack_counts(packed), bonus, bool(packed >> _CONCEALED_SHIFT & 1))
+
+    def pack(self):
+        """
+        The whole hand as one int: 3 bits per tile count, a bit per bonus
+        tile and the concealed flag (111 bits).
+        """
+        bonus = tile_mask(self.bonus) >> FLOWER_BASE
+        return pack_counts(self.counts) | bonus << _BONUS_SHIFT | int(self.concealed) << _CONCEALED_SHIFT
+
+    @property
+    def size(self):
+        """Number of regular tiles."""
+        return sum(self.counts)
+
+    def tiles(self):
+        """Regular tile indices in ascending order."""
+        return [i for i, c in enumerate(self.counts) for _ in range(c)]
+
+    def to_tiles(self):
+        """The hand as web app tile dicts, regular tiles first."""
+        return [tile_dict(i, self.concealed) for i in self.tiles()] + [tile_dict(i) for i in self.bonus]
+
+    def key(self):
+        """Canonical string: pack() as 28 hex digits."""
+        return f"{self.pack():028x}"
+
+    def __eq__(self, other):
+        return isinstance(other, Hand) and self.pack() == other.pack()
+
+    def __hash__(self):
+        return hash(self.pack())
+
+    def __repr__(self):
+        return f"Hand({' '.join(tile_code(i) for i in self.tiles() + list(self.bonus))})"
+
+
+# ----------------------------------------
+# Per-suit shapes
+# ----------------------------------------
+
+@lru_cache(maxsize=None)
+def suit_shapes(counts):
+    """
+    Every way to split one suit's 9-slot counts into melds plus at most
+    one pair. Returns a tuple of (melds, pair) with melds a tuple of
+    (kind, offset) pairs and pair an offset or None.
+
+    Answered from the precomputed suit table when one is available (see
+    suit_table.py), otherwise by search_suit().
+    """
+    table = _suit_table()
+    if table is not None:
+        found = table.lookup(counts)
+        if found is not None:
+            return found
+    return search_suit(counts)
+
+
+def search_suit(counts):
+    """The recursive search behind suit_shapes(), without the table or memo."""
+    shapes = set()
+    _split(counts, (), shapes)
+    return tuple(sorted(shapes, key=_shape_key))
+
+
+def _split(counts, melds, out, pair=None):
+    i = next((k for k, c in enumerate(counts) if c), None)
+    if i is None:
+        out.add((tuple(sorted(melds, key=_meld_key)), pair))
+        return
+    c = counts
+    if i <= len(c) - 3 and c[i + 1] and c[i + 2]:
+        rest = c[:i] + (c[i] - 1, c[i + 1] - 1, c[i + 2] - 1) + c[i + 3:]
+        _split(rest, melds + ((SEQUENCE, i),), out, pair)
+    for kind, size in ((TRIPLET, 3), (QUADRUPLET, 4)):
+        if c[i] >= size:
+            rest = c[:i] + (c[i] - size,) + c[i + 1:]
+            _split(rest, melds + ((kind, i),), out, pair)
+    if pair is None and c[i] >= 2:
+        rest = c[:i] + (c[i] - 2,) + c[i + 1:]
+        _split(rest, melds, out, i)
+
+
+_table = False
+
+
+def _suit_table():
+    global _table
+    if _table is False:
+        from .suit_table import TABLE_PATH, SuitTable
+        _table = SuitTable(TABLE_PATH) if os.path.exists(TABLE_PATH) else None
+    return _table
+
+
+def use_suit_table(path):
+    """
+    Answer suit_shapes() from the table at path, or pass None to always
+    search. By default the table shipped with the package is used if present.
+    """
+    global _table
+    if path is None:
+        _table = None
+    else:
+        from .suit_table import SuitTable
+        _table = SuitTable(path)
+    suit_shapes.cache_clear()
+    _decompose.cache_clear()
+
+
+def _meld_key(meld):
+    kind, tile = meld
+    return tile, _KIND_RANK[kind]
+
+
+def _shape_key(shape):
+    melds, pair = shape
+    return (-1 if pair is None else pair), [_meld_key(m) for m in melds]
+
+
+@lru_cache(maxsize=None)
+def honour_shapes(count):
+    """Shapes of a single honour tile: no sequences, so at most one meld or pair."""
+    return {0: (((), None),), 2: (((), 0),), 3: ((((TRIPLET, 0),), None),),
+            4: ((((QUADRUPLET, 0),), None),)}.get(count, ())
+
+
+def _groups(counts):
+    """(base index, shapes) for the three suits and each honour tile."""
+    groups = [(base, suit_shapes(counts[base:base + 9])) for base in (0, 9, 18)]
+    groups += [(i, honour_shapes(counts[i])) for i in range(WIND_BASE, NUM_TILES)]
+    return groups
+
+
+# ----------------------------------------
+# Whole hands
+# ----------------------------------------
+
+def standard_decompositions(counts):
+    """All four-melds-and-a-pair readings of a 34-slot count vector."""
+    counts = tuple(counts)
+    groups = _groups(counts)
+    if any(not shapes for _, shapes in groups):
+        return []
+
+    found = []
+    for combo in product(*(shapes for _, shapes in groups)):
+        pairs = [base + pair for (base, _), (_, pair) in zip(groups, combo) if pair is not None]
+        if len(pairs) != 1:
+            continue
+        melds = tuple(Meld(kind, base + offset)
+                      for (base, _), (shape_melds, _) in zip(groups, combo)
+                      for kind, offset in shape_melds)
+        if len(melds) == 4:
+            found.append(Decomposition(STANDARD, melds, pairs[0], ()))
+
+    found.sort(key=lambda d: (d.pair, [_meld_key(m) for m in d.melds]))
+    return found
+
+
+def seven_pairs(counts):
+    if sum(counts) != 14 or any(c % 2 for c in counts):
+        return None
+    pairs = tuple(i for i, c in enumerate(counts) for _ in range(c // 2))
+    return Decomposition(SEVEN_PAIRS, (), None, pairs)
+
+
+def thirteen_orphans(counts):
+    if sum(counts) != 14 or any(counts[i] == 0 for i in ORPHANS):
+        return None
+    extra = [i for i in ORPHANS if counts[i] == 2]
+    if len(extra) != 1 or sum(counts[i] for i in ORPHANS) != 14:
+        return None
+    return Decomposition(THIRTEEN_ORPHANS, (), extra[0], ())
+
+
+@lru_cache(maxsize=1 << 16)
+def _decompose(counts):
+    if sum(counts) not in HAND_SIZES:
+        return ()
+    found = standard_decompositions(counts)
+    for special in (seven_pairs(counts), thirteen_orphans(counts)):
+        if special:
+            found.append(special)
+    return tuple(found)
+
+
+def decompositions(hand):
+    """
+    Every winning reading of a Hand (or 34-slot count vector), in
+    parseHand's preference order. Empty if the hand does not win,
+    including every hand whose size is not in HAND_SIZES.
+    """
+    counts = hand.counts if isinstance(hand, Hand) else tuple(hand)
+    return list(_decompose(counts))
+
+
+def decompose(hand):
+    """The reading parseHand would pick, or None."""
+    found = decompositions(hand)
+    return found[0] if found else None
+
+
+def is_winning(hand):
+    return bool(decompositions(hand))
+
+
+def meld_tiles(meld):
+    """Tile indices of a meld."""
+    if meld.kind == SEQUENCE:
+        return [meld.tile, meld.tile + 1, meld.tile + 2]
+    return [meld.tile] * _SET_SIZE[meld.kind]
+
+
+def cache_info():
+    """Hit/miss counters of the per-suit and whole-hand memo tables."""
+    return {'suit_shapes': suit_shapes.cache_info(), 'hands': _decompose.cache_info()}
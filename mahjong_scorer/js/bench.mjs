@@ -0,0 +1,68 @@
+/**
+ * Times the web app's engine on the benchmark corpora of
+ * mahjong_scorer/bench.py.
+ *
+ * Reads one JSON job from stdin:
+ *   {"tiles": [[type, value], ...], "stages": [...], "repeat": n, "minTime": s,
+ *    "corpora": {name: [[tileIndices, gameContext], ...]}}
+ * and writes {name: {stage: [seconds per pass, ...]}} to stdout, one
+ * sample per repeat. Each sample runs enough passes to take minTime.
+ */
+import { parseHand } from '../../src/utils/handValidator.js';
+import { calculateScore } from '../../src/utils/scoringEngine.js';
+
+const readStdin = async () => {
+  const chunks = [];
+  for await (const chunk of process.stdin) chunks.push(chunk);
+  return Buffer.concat(chunks).toString('utf8');
+};
+
+const seconds = (fn, loops) => {
+  const start = process.hrtime.bigint();
+  for (let i = 0; i < loops; i++) fn();
+  return Number(process.hrtime.bigint() - start) / 1e9;
+};
+
+const sample = (fn, repeat, minTime) => {
+  fn(); // warm up the JIT
+  let loops = 1;
+  let elapsed = seconds(fn, loops);
+  while (elapsed < minTime) {
+    loops *= 2;
+    elapsed = seconds(fn, loops);
+  }
+  const samples = [elapsed / loops];
+  while (samples.length < repeat) samples.push(seconds(fn, loops) / loops);
+  return samples;
+};
+
+const job = JSON.parse(await readStdin());
+const tiles = job.tiles.map(([type, value]) => ({ type, value }));
+
+const stages = {
+  parse: (hands) => () => {
+    for (const { hand } of hands) parseHand(hand);
+  },
+  score: (hands) => {
+    const parsed = hands.map(({ hand, context }) => [parseHand(hand), context]);
+    return () => {
+      for (const [handData, context] of parsed) calculateScore(handData, context);
+    };
+  },
+  pipeline: (hands) => () => {
+    for (const { hand, context } of hands) calculateScore(parseHand(hand), context);
+  },
+};
+
+const results = {};
+for (const [name, cases] of Object.entries(job.corpora)) {
+  const hands = cases.map(([indices, context]) => ({
+    hand: indices.map(i => ({ ...tiles[i], concealed: true })),
+    context,
+  }));
+  results[name] = {};
+  for (const stage of job.stages) {
+    results[name][stage] = sample(stages[stage](hands), job.repeat, job.minTime);
+  }
+}
+process.stdout.write(JSON.stringify(results) + '\n');
@@ -0,0 +1,40 @@
+/**
+ * Scores hands with the web app's engine for the Python cross-check
+ * (mahjong_scorer/crosscheck.py), over stdin/stdout.
+ *
+ * The first line from Python is the tile table, {"tiles": [[type, value], ...]},
+ * indexed like mahjong_scorer/tiles.py; the server answers {"ready": true}.
+ * Every following line is a JSON array of [tileIndices, gameContext] cases
+ * and is answered with one line: an array of
+ * [parsed, totalFan, payment, meetsMinimum, [pattern names]] in the same order.
+ */
+import { createInterface } from 'node:readline';
+import { parseHand } from '../../src/utils/handValidator.js';
+import { calculateScore } from '../../src/utils/scoringEngine.js';
+
+let tiles = null;
+
+const scoreCase = ([indices, context]) => {
+  const hand = indices.map(i => ({ ...tiles[i], concealed: true }));
+  const handData = parseHand(hand);
+  const result = calculateScore(handData, context || {});
+  return [
+    handData !== null,
+    result.totalFan,
+    result.payment,
+    result.meetsMinimum,
+    result.matchedPatterns.map(p => p.name),
+  ];
+};
+
+const lines = createInterface({ input: process.stdin, crlfDelay: Infinity });
+for await (const line of lines) {
+  if (!line) continue;
+  const message = JSON.parse(line);
+  if (tiles === null) {
+    tiles = message.tiles.map(([type, value]) => ({ type, value }));
+    process.stdout.write('{"ready":true}\n');
+    continue;
+  }
+  process.stdout.write(JSON.stringify(message.map(scoreCase)) + '\n');
+}
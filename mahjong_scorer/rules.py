@@ -0,0 +1,92 @@
+"""
+Scoring tables, kept in step with src/data/scoringRules.js.
+
+The bonus-tile patterns that scoringEngine.js defines inline (Eight and
+Seven Flowers, All Flowers/Seasons, Seat Flower/Season) are included
+with the same names and Fan as the engine uses.
+"""
+
+
+def _pattern(name, fan, description, name_zh=None):
+    pattern = {'name': name, 'fan': fan, 'description': description}
+    if name_zh:
+        pattern['nameZh'] = name_zh
+    return pattern
+
+
+SCORING_PATTERNS = {
+    'WIN_ACTIONS': {
+        'SELF_PICK': _pattern('Self-Pick (自摸)', 1, 'You select your winning tile from the wall'),
+        'WIN_BY_KONG_REPLACEMENT': _pattern('Win by Kong Replacement (槓上開花)', 1, 'Win is a replacement tile due to calling a Kong'),
+        'DOUBLE_KONG_REPLACEMENT': _pattern('Double Kong Replacement (槓上槓)', 9, 'If you call a kong, call a second kong using the replacement tile, then win on the second replacement'),
+        'CONCEALED_HAND': _pattern('Concealed Hand (門前清)', 1, 'You did not take any tiles from other players in order to win'),
+        'ROBBING_THE_KONG': _pattern('Robbing the Kong (搶槓)', 1, 'Win win by interrupting another player upgrading a pong to a kong using your winning tile'),
+        'MOON_UNDER_THE_SEA': _pattern('Moon Under The Sea (海底撈月)', 1, 'Your winning tile was the last tile in the wall and you drew it'),
+    },
+    'SINGLE_SET_TYPE': {
+        'ALL_SEQUENCES': _pattern('All Sequences (平糊)', 1, 'All sets are sequences'),
+        'ALL_TRIPLETS': _pattern('All Triplets (對對糊)', 3, 'All sets are triplets'),
+        'ALL_CONCEALED_TRIPLETS': _pattern('All Concealed Triplets (四暗刻)', 8, 'All sets are triplets and no tiles taken from other players. Self pick or discard for the pair to win only'),
+        'ALL_QUADRUPLETS': _pattern('All Quadruplets (四槓子)', 13, 'All four sets are quadruplets'),
+    },
+    'SPECIAL_TILE_HANDS': {
+        'DRAGON': _pattern('Dragon (三元牌)', 1, 'A triplet of dragon tiles. Score for each triplet'),
+        'SMALL_THREE_DRAGONS': _pattern('Small Three Dragons (小三元)', 5, 'Two dragon triplets and a pair of the third dragon'),
+        'BIG_THREE_DRAGONS': _pattern('Big Three Dragons (大三元)', 8, 'Three dragon triplets'),
+        'ROUND_WIND': _pattern('Round Wind (圈風)', 1, 'A triplet of either the round wind or your seat wind. If the triplet is both the round and seat wind, count for 2 Fan'),
+        'SEAT_WIND': _pattern('Seat Wind (門風)', 1, 'A triplet of your seat wind'),
+        'SMALL_FOUR_WINDS': _pattern('Small Four Winds (小四喜)', 6, 'Three wind triplets and a pair of the fourth wind'),
+        'BIG_FOUR_WINDS': _pattern('Big Four Winds (大四喜)', 13, 'Four wind triplets'),
+        'MIXED_FLUSH': _pattern('Mixed Flush (混一色)', 3, 'Your hand contains only one suit plus honours'),
+        'FULL_FLUSH': _pattern('Full Flush (清一色)', 7, 'Your hand contains only one suit'),
+        'MIXED_TERMINALS': _pattern('Mixed Terminals (混么九)', 4, 'Your hand contains only ones, nines and honours. 3 Fan from All Triplets is included'),
+        'ALL_TERMINALS': _pattern('All Terminals (清么九)', 13, 'Your hand contains only ones and nines. 3 Fan from All Triplets is already included'),
+        'ALL_HONOURS': _pattern('All Honours (字一色)', 10, 'Your hand contains only honours tiles. 3 Fan from All Triplets is already included'),
+    },
+    'FLOWERS_SEASONS': {
+        'NO_FLOWERS_SEASONS': _pattern('No Flowers or Seasons (無花)', 1, 'You have no flowers or seasons'),
+        'SEAT_FLOWER': _pattern('Seat Flower or Season (正花)', 1, '1 fan for each flower or season of your seat number'),
+        'ALL_FLOWERS_SEASONS': _pattern('All Flowers or All Seasons (一樣花)', 2, 'You have either all four flowers or all four seasons'),
+        'SEVEN_FLOWERS': _pattern('Seven Flowers (花糊)', 3, 'You can choose to win immediately upon declaring the 7th flower tile'),
+        'EIGHT_FLOWERS': _pattern('Eight Flowers (大花糊)', 8, 'You can choose to win immediately upon declaring the 8th flower tile'),
+    },
+    'SPECIAL_HANDS': {
+        'BLESSING_OF_HEAVEN': _pattern('Blessing of Heaven (天糊)', 13, 'As dealer, your beginning hand wins'),
+        'BLESSING_OF_EARTH': _pattern('Blessing of Earth (地糊)', 13, "As non-dealer, you win using the dealer's first discard"),
+        'BLESSING_OF_MAN': _pattern('Blessing of Man (人糊)', 13, 'As non-dealer, you win on your first turn with a self-pick'),
+        'NINE_GATES': _pattern('Nine Gates (九連寶燈)', 13, '111 234567 999 of a single suit, plus a 14th tile of the same suit'),
+        'THIRTEEN_ORPHANS': _pattern('Thirteen Orphans (十三么)', 13, 'One of each one, nine, wind and dragon, plus a 14th tile that matches one of the other thirteen'),
+        'SEVEN_PAIRS': _pattern('Seven Pairs (七對子)', 4, 'Seven different pairs. Can stack with All Honours, Semi-Pure and Pure Hand. Only played in certain variants'),
+    },
+}
+
+# Defined inline in scoringEngine.js, with their own names
+ENGINE_PATTERNS = {
+    'EIGHT_FLOWERS': _pattern('Eight Flowers', 8, 'Collected all 8 bonus tiles (4 flowers + 4 seasons)', '大花糊'),
+    'SEVEN_FLOWERS': _pattern('Seven Flowers', 3, 'Collected 7 bonus tiles', '花糊'),
+    'ALL_FLOWERS': _pattern('All Flowers', 2, 'Collected all 4 flowers', '一檯花'),
+    'ALL_SEASONS': _pattern('All Seasons', 2, 'Collected all 4 seasons', '一檯花'),
+    'SEAT_FLOWER': _pattern('Seat Flower', 1, 'Flower {seat} matches your seat', '正花'),
+    'SEAT_SEASON': _pattern('Seat Season', 1, 'Season {seat} matches your seat', '正花'),
+}
+
+PAYMENT_TABLE = {fan: 2 ** fan for fan in range(14)}
+
+MINIMUM_FAN = 3
+MAX_FAN = 13
+
+
+def get_payment(fan):
+    """Payment for a Fan total; 13 Fan and above all pay the limit."""
+    if fan >= MAX_FAN:
+        return PAYMENT_TABLE[MAX_FAN]
+    return PAYMENT_TABLE.get(fan) or 1
+
+
+def pattern(group, key, **fmt):
+    """A fresh copy of a pattern dict, tagged with its key."""
+    source = ENGINE_PATTERNS if group == 'ENGINE' else SCORING_PATTERNS[group]
+    found = dict(source[key], key=key)
+    if fmt:
+        found['description'] = found['description'].format(**fmt)
+    return found
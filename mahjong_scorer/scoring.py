@@ -0,0 +1,273 @@
+"""
+Fan calculation, a port of calculateScore in src/utils/scoringEngine.js.
+
+The checks run in the same order and produce the same pattern dicts
+(plus a 'key' naming the pattern). Game context uses the web app's keys:
+winType, seatWind, roundWind, seatNumber, isDealer, fullyConcealedHand,
+flowers, seasons (seat numbers 1-4) and noFlowersSeasons.
+
+Seven pairs and thirteen orphans are scored as their special hands
+(4 and 13 Fan), the way calculateScore handles them.
+"""
+
+from .hand import (QUADRUPLET, SEQUENCE, SEVEN_PAIRS, THIRTEEN_ORPHANS, TRIPLET, Hand,
+                   decompositions, meld_tiles)
+from .rules import MINIMUM_FAN, get_payment, pattern
+from .tiles import (DRAGON_MASK, FLOWER_BASE, FLOWERS, HONOUR_MASK, ORPHAN_MASK, SEASON_BASE,
+                    SEASONS, SUIT_MASKS, SUITED_MASK, TERMINAL_MASK, WIND_BASE, WIND_MASK, WINDS,
+                    popcount, tile_code)
+
+WIN_ACTIONS = {
+    'selfPick': 'SELF_PICK',
+    'kongReplacement': 'WIN_BY_KONG_REPLACEMENT',
+    'doubleKongReplacement': 'DOUBLE_KONG_REPLACEMENT',
+    'robbingKong': 'ROBBING_THE_KONG',
+    'moonUnderSea': 'MOON_UNDER_THE_SEA',
+}
+
+def _invalid():
+    """calculateScore's result for a hand that does not parse; a new dict and list each call."""
+    return {
+        'totalFan': 0,
+        'matchedPatterns': [],
+        'payment': 0,
+        'meetsMinimum': False,
+        'error': 'Invalid hand',
+    }
+
+
+def _bonus_seats(hand, context):
+    """(flowers, seasons) as seat numbers, from the context or the hand's bonus tiles."""
+    flowers = seat_numbers(context.get('flowers'), FLOWERS)
+    seasons = seat_numbers(context.get('seasons'), SEASONS)
+    if not flowers and not seasons and hand.bonus:
+        flowers = seat_numbers([b - FLOWER_BASE + 1 for b in hand.bonus if b < SEASON_BASE])
+        seasons = seat_numbers([b - SEASON_BASE + 1 for b in hand.bonus if b >= SEASON_BASE])
+    return flowers, seasons
+
+
+def seat_numbers(values, names=()):
+    """
+    Distinct seat numbers 1-4, sorted, from a flowers or seasons list of
+    numbers or names. Repeated and out-of-range seats are dropped, so
+    the scalar and vectorized scorers count the same bonus tiles.
+    """
+    seats = set()
+    for value in values or []:
+        value = names.index(value) + 1 if value in names else value
+        if isinstance(value, int) and 1 <= value <= 4:
+            seats.add(value)
+    return sorted(seats)
+
+
+def _all_tiles(decomposition):
+    tiles = [t for meld in decomposition.melds for t in meld_tiles(meld)]
+    if decomposition.pair is not None:
+        tiles += [decomposition.pair] * 2
+    return tiles
+
+
+def _masks(decomposition):
+    """(tiles, pungs): bitmasks of every tile used and of the triplet/quadruplet tiles."""
+    tiles = pungs = 0
+    for kind, tile in decomposition.melds:
+        if kind == SEQUENCE:
+            tiles |= 0b111 << tile
+        else:
+            pungs |= 1 << tile
+    tiles |= pungs
+    if decomposition.pair is not None:
+        tiles |= 1 << decomposition.pair
+    return tiles, pungs
+
+
+def _is_nine_gates(decomposition):
+    # Every tile of exactly one suit must be present
+    if _masks(decomposition)[0] not in SUIT_MASKS:
+        return False
+    tiles = _all_tiles(decomposition)
+    counts = [0] * 9
+    for t in tiles:
+        counts[t % 9] += 1
+    return (counts[0] >= 3 and counts[8] >= 3 and all(counts[1:8])
+            and len(tiles) == 14)
+
+
+def check_special_hands(hand, decomposition, context):
+    if decomposition.pattern == THIRTEEN_ORPHANS:
+        return pattern('SPECIAL_HANDS', 'THIRTEEN_ORPHANS')
+    if decomposition.pattern == SEVEN_PAIRS:
+        return pattern('SPECIAL_HANDS', 'SEVEN_PAIRS')
+
+    win_type = context.get('winType')
+    dealer = bool(context.get('isDealer'))
+    if win_type == 'heaven' and dealer:
+        return pattern('SPECIAL_HANDS', 'BLESSING_OF_HEAVEN')
+    if win_type == 'earth' and not dealer:
+        return pattern('SPECIAL_HANDS', 'BLESSING_OF_EARTH')
+    if win_type == 'man' and not dealer:
+        return pattern('SPECIAL_HANDS', 'BLESSING_OF_MAN')
+    if _is_nine_gates(decomposition):
+        return pattern('SPECIAL_HANDS', 'NINE_GATES')
+
+    flowers, seasons = _bonus_seats(hand, context)
+    total_bonus = len(flowers) + len(seasons)
+    if total_bonus == 8:
+        return pattern('ENGINE', 'EIGHT_FLOWERS')
+    if total_bonus == 7:
+        return pattern('ENGINE', 'SEVEN_FLOWERS')
+    return None
+
+
+def check_win_actions(context):
+    win_type = context.get('winType')
+    patterns = []
+    if win_type in ('selfPick', 'kongReplacement', 'doubleKongReplacement'):
+        patterns.append(pattern('WIN_ACTIONS', WIN_ACTIONS[win_type]))
+    if context.get('fullyConcealedHand') and win_type == 'discard':
+        patterns.append(pattern('WIN_ACTIONS', 'CONCEALED_HAND'))
+    if win_type in ('robbingKong', 'moonUnderSea'):
+        patterns.append(pattern('WIN_ACTIONS', WIN_ACTIONS[win_type]))
+    return patterns
+
+
+def check_single_set_type(decomposition):
+    kinds = [meld.kind for meld in decomposition.melds]
+    if not kinds:
+        return None
+    if len(kinds) == 4 and all(k == QUADRUPLET for k in kinds):
+        return pattern('SINGLE_SET_TYPE', 'ALL_QUADRUPLETS')
+    if all(k == TRIPLET for k in kinds):
+        # calculateScore awards this for any four triplets, concealed or not
+        return pattern('SINGLE_SET_TYPE', 'ALL_CONCEALED_TRIPLETS' if len(kinds) == 4 else 'ALL_TRIPLETS')
+    if all(k == SEQUENCE for k in kinds):
+        return pattern('SINGLE_SET_TYPE', 'ALL_SEQUENCES')
+    return None
+
+
+def check_special_tile_hands(decomposition, context):
+    patterns = []
+    tiles, pungs = _masks(decomposition)
+    pair = 0 if decomposition.pair is None else 1 << decomposition.pair
+
+    dragons = popcount(pungs & DRAGON_MASK)
+    if dragons == 3:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'BIG_THREE_DRAGONS'))
+    elif dragons == 2 and pair & DRAGON_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'SMALL_THREE_DRAGONS'))
+    else:
+        patterns.extend(pattern('SPECIAL_TILE_HANDS', 'DRAGON') for _ in range(dragons))
+
+    winds = pungs & WIND_MASK
+    seat_wind, round_wind = context.get('seatWind'), context.get('roundWind')
+    if winds == WIND_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'BIG_FOUR_WINDS'))
+    elif popcount(winds) == 3 and pair & WIND_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'SMALL_FOUR_WINDS'))
+    elif winds and seat_wind and round_wind:
+        for i, wind in enumerate(WINDS):
+            if winds >> (WIND_BASE + i) & 1:
+                if wind == round_wind:
+                    patterns.append(pattern('SPECIAL_TILE_HANDS', 'ROUND_WIND'))
+                if wind == seat_wind:
+                    patterns.append(pattern('SPECIAL_TILE_HANDS', 'SEAT_WIND'))
+
+    suited = tiles & SUITED_MASK
+    one_suit = any(not suited & ~mask for mask in SUIT_MASKS)
+    if not suited:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'ALL_HONOURS'))
+    elif one_suit and not tiles & HONOUR_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'FULL_FLUSH'))
+    elif one_suit:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'MIXED_FLUSH'))
+
+    if not tiles & ~TERMINAL_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'ALL_TERMINALS'))
+    elif tiles & HONOUR_MASK and not tiles & ~ORPHAN_MASK:
+        patterns.append(pattern('SPECIAL_TILE_HANDS', 'MIXED_TERMINALS'))
+    return patterns
+
+
+def check_flowers_and_seasons(hand, context):
+    flowers, seasons = _bonus_seats(hand, context)
+    if not flowers and not seasons or context.get('noFlowersSeasons'):
+        return [pattern('FLOWERS_SEASONS', 'NO_FLOWERS_SEASONS')]
+
+    patterns = []
+    if len(flowers) == 4:
+        patterns.append(pattern('ENGINE', 'ALL_FLOWERS'))
+    if len(seasons) == 4:
+        patterns.append(pattern('ENGINE', 'ALL_SEASONS'))
+    seat = context.get('seatNumber') or 1
+    if seat in flowers:
+        patterns.append(pattern('ENGINE', 'SEAT_FLOWER', seat=seat))
+    if seat in seasons:
+        patterns.append(pattern('ENGINE', 'SEAT_SEASON', seat=seat))
+    return patterns
+
+
+def calculate_score(hand, decomposition, context=None):
+    """Score one reading of a hand. Returns calculateScore's result dict."""
+    if decomposition is None:
+        return _invalid()
+    context = context or {}
+
+    special = check_special_hands(hand, decomposition, context)
+    if special:
+        return {
+            'totalFan': special['fan'],
+            'matchedPatterns': [special],
+            'payment': get_payment(special['fan']),
+            'meetsMinimum': special['fan'] >= MINIMUM_FAN,
+            'isSpecialHand': True,
+        }
+
+    patterns = check_win_actions(context)
+    single = check_single_set_type(decomposition)
+    if single:
+        patterns.append(single)
+    patterns += check_special_tile_hands(decomposition, context)
+    patterns += check_flowers_and_seasons(hand, context)
+
+    total = sum(p['fan'] for p in patterns)
+    return {
+        'totalFan': total,
+        'matchedPatterns': patterns,
+        'payment': get_payment(total),
+        'meetsMinimum': total >= MINIMUM_FAN,
+    }
+
+
+def score_hand(hand, context=None, best=False):
+    """
+    Parse and score a Hand (or a list of tiles).
+
+    By default the reading parseHand would pick is scored, as in the web
+    app. With best=True every reading is scored and the highest-scoring
+    one is returned. The result carries the 'decomposition' it used.
+    """
+    if not isinstance(hand, Hand):
+        hand = Hand.from_tiles(hand)
+    found = decompositions(hand)
+    if not found:
+        return _invalid()
+    if not best:
+        found = found[:1]
+
+    scored = [(calculate_score(hand, d, context), d) for d in found]
+    result, decomposition = max(scored, key=lambda s: s[0]['totalFan'])
+    result['decomposition'] = decomposition
+    return result
+
+
+def decomposition_dict(decomposition):
+    """JSON-friendly form of a decomposition: pattern, melds, pair, pairs."""
+    if decomposition is None:
+        return None
+    return {
+        'pattern': decomposition.pattern,
+        'melds': [[m.kind, [tile_code(t) for t in meld_tiles(m)]] for m in decomposition.melds],
+        'pair': tile_code(decomposition.pair) if decomposition.pair is not None else None,
+        'pairs': [tile_code(t) for t in decomposition.pairs],
+    }
+
@@ -0,0 +1,320 @@
+"""
+Monte Carlo simulation of whole deals, for checking house rules
+(minimum Fan, payment caps) against the Fan distribution of real wins.
+
+Each game shuffles a full wall (136 tiles plus the 8 bonus tiles) and
+deals four concealed hands. Players then draw and discard until someone
+wins or the wall runs out. Bonus tiles are set aside and replaced. There
+are no pungs, chows or kongs; every hand stays concealed. A discard
+policy picks the tile to throw:
+
+    random  any tile in the hand
+    greedy  the tile with the fewest same/neighbouring tiles, keeping
+            pairs, triplets and near-sequences
+
+A player wins on a winning tile (drawn or discarded) only if the hand
+scores at least min_fan; smaller wins are declined and counted. Wins are
+scored with the package's rules, with the context the game implies:
+seat and round winds, dealer, self-pick or discard, the blessings, Moon
+Under the Sea and the winner's bonus tiles.
+
+Games are played in blocks of block_size. Each block has its own random
+seed derived from (seed, block number), so a run gives the same totals
+whatever the number of workers and however often it was resumed. The
+totals are checkpointed as JSON after finished blocks.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import ScoreCache
+from .hand import Hand
+from .rules import MINIMUM_FAN
+from .tiles import FLOWER_BASE, NUM_TILES, SEASON_BASE, WINDS, is_bonus, is_suited
+from .waits import WaitAnalyzer
+
+POLICIES = ('random', 'greedy')
+HISTOGRAMS = ('fan', 'payment', 'patterns', 'win_types')
+COUNTERS = ('games', 'wins', 'self_picks', 'discard_wins', 'exhausted', 'declined')
+
+_scorer = None
+
+
+def _init_worker(cache_size):
+    global _scorer
+    _scorer = ScoreCache(cache_size)
+
+
+# ----------------------------------------
+# Policies
+# ----------------------------------------
+
+def _keep_value(counts, t):
+    """How much a tile helps the hand; the lowest is discarded."""
+    c = counts[t]
+    value = 4 * (c >= 2) + 4 * (c >= 3)
+    if is_suited(t):
+        offset = t % 9
+        for d, weight in ((-2, 1), (-1, 2), (1, 2), (2, 1)):
+            if 0 <= offset + d < 9 and counts[t + d]:
+                value += weight
+        value += 1 if 0 < offset < 8 else 0
+    return value
+
+
+def discard_greedy(counts, rng):
+    candidates = [t for t in range(NUM_TILES) if counts[t]]
+    return min(candidates, key=lambda t: (_keep_value(counts, t), rng.random()))
+
+
+def discard_random(counts, rng):
+    return rng.choice([t for t in range(NUM_TILES) for _ in range(counts[t])])
+
+
+DISCARD = {'random': discard_random, 'greedy': discard_greedy}
+
+
+# ----------------------------------------
+# One game
+# ----------------------------------------
+
+def _context(player, dealer, round_wind, bonus, win_type):
+    seat = (player - dealer) % 4
+    return {
+        'winType': win_type,
+        'seatWind': WINDS[seat],
+        'roundWind': round_wind,
+        'seatNumber': seat + 1,
+        'isDealer': player == dealer,
+        'fullyConcealedHand': True,
+        'flowers': [b - FLOWER_BASE + 1 for b in bonus if b < SEASON_BASE],
+        'seasons': [b - SEASON_BASE + 1 for b in bonus if b >= SEASON_BASE],
+    }
+
+
+def play_game(rng, dealer, round_wind, policy='greedy', min_fan=MINIMUM_FAN, best=False):
+    """
+    Play one deal. Returns (win, declined): win is None for an
+    exhausted wall, otherwise {'winType', 'totalFan', 'payment',
+    'patterns'}; declined counts wins refused for scoring below min_fan.
+    """
+    wall = [t for t in range(NUM_TILES) for _ in range(4)] + list(range(FLOWER_BASE, FLOWER_BASE + 8))
+    rng.shuffle(wall)
+    front, back = 0, len(wall)
+    bonus = [[] for _ in range(4)]
+    discard = DISCARD[policy]
+    scorer = _scorer or ScoreCache(0)
+    declined = 0
+
+    def draw(player):
+        nonlocal front, back
+        tile = wall[front]
+        front += 1
+        while is_bonus(tile):
+            bonus[player].append(tile)
+            if front >= back:
+                return None
+            back -= 1
+            tile = wall[back]
+        return tile
+
+    counts = [[0] * NUM_TILES for _ in range(4)]
+    order = [(dealer + i) % 4 for i in range(4)]
+    for _ in range(13):
+        for p in order:
+            tile = draw(p)
+            if tile is None:
+                return None, 0
+            counts[p][tile] += 1
+    players = [WaitAnalyzer(Hand(counts[p])) for p in range(4)]
+    waits = [set(a.winning_tiles()) for a in players]
+
+    def try_win(p, tile, win_type):
+        nonlocal declined
+        counts = list(players[p].counts)
+        counts[tile] += 1
+        result = scorer.score(Hand(counts, bonus[p]),
+                              _context(p, dealer, round_wind, bonus[p], win_type), best)
+        if result['totalFan'] < min_fan:
+            declined += 1
+            return None
+        return {
+            'winType': win_type,
+            'totalFan': result['totalFan'],
+            'payment': result['payment'],
+            'patterns': [m['key'] for m in result['matchedPatterns']],
+        }
+
+    turn = 0
+    while True:
+        p = order[turn % 4]
+        first_turn = turn < 4
+        if front >= back:
+            return None, declined
+        tile = draw(p)
+        if tile is None:
+            return None, declined
+        if tile in waits[p]:
+            if first_turn:
+                win_type = 'heaven' if p == dealer else 'man'
+            elif front >= back:
+                win_type = 'moonUnderSea'
+            else:
+                win_type = 'selfPick'
+            win = try_win(p, tile, win_type)
+            if win:
+                return win, declined
+
+        analyzer = players[p]
+        analyzer.add(tile)
+        thrown = discard(analyzer.counts, rng)
+        analyzer.remove(thrown)
+        waits[p] = set(analyzer.winning_tiles())
+
+        for i in range(1, 4):
+            other = order[(turn + i) % 4]
+            if thrown in waits[other]:
+                win_type = 'earth' if turn == 0 and other != dealer else 'discard'
+                win = try_win(other, thrown, win_type)
+                if win:
+                    return win, declined
+        turn += 1
+
+
+# ----------------------------------------
+# Blocks and runs
+# ----------------------------------------
+
+def empty_totals():
+    totals = {key: 0 for key in COUNTERS}
+    totals.update({key: {} for key in HISTOGRAMS})
+    return totals
+
+
+def merge_totals(totals, block):
+    for key in COUNTERS:
+        totals[key] += block[key]
+    for key in HISTOGRAMS:
+        merged = Counter(totals[key])
+        merged.update(block[key])
+        totals[key] = {k: merged[k] for k in sorted(merged, key=_hist_sort)}
+    return totals
+
+
+def _hist_sort(key):
+    return (0, int(key)) if str(key).lstrip('-').isdigit() else (1, str(key))
+
+
+def run_block(seed, block, block_size, policy='greedy', min_fan=MINIMUM_FAN, best=False):
+    """Play games block*block_size .. (block+1)*block_size - 1; returns their totals."""
+    rng = random.Random(f'{seed}:{block}')
+    counters = Counter()
+    fan, payment, patterns, win_types = Counter(), Counter(), Counter(), Counter()
+    for number in range(block * block_size, (block + 1) * block_size):
+        dealer = number % 4
+        round_wind = WINDS[number // 4 % 4]
+        win, declined = play_game(rng, dealer, round_wind, policy, min_fan, best)
+        counters['games'] += 1
+        counters['declined'] += declined
+        if win is None:
+            counters['exhausted'] += 1
+            continue
+        counters['wins'] += 1
+        counters['discard_wins' if win['winType'] in ('discard', 'earth') else 'self_picks'] += 1
+        fan[str(win['totalFan'])] += 1
+        payment[str(win['payment'])] += 1
+        patterns.update(win['patterns'])
+        win_types[win['winType']] += 1
+
+    block_totals = {key: counters[key] for key in COUNTERS}
+    block_totals.update({'fan': dict(fan), 'payment': dict(payment),
+                         'patterns': dict(patterns), 'win_types': dict(win_types)})
+    return block_totals
+
+
+def load_checkpoint(path, config):
+    """Totals and finished block count from a checkpoint of the same run, or fresh ones."""
+    if not path or not os.path.exists(path):
+        return empty_totals(), 0
+    with open(path) as f:
+        state = json.load(f)
+    saved = {k: v for k, v in state['config'].items() if k != 'games'}
+    wanted = {k: v for k, v in config.items() if k != 'games'}
+    if saved != wanted:
+        raise ValueError(f"{path} is a checkpoint of a different run: {state['config']}")
+    return state['totals'], state['blocks_done']
+
+
+def save_checkpoint(path, config, totals, blocks_done):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'config': config, 'blocks_done': blocks_done, 'totals': totals}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def simulate(games, seed=0, workers=None, block_size=1000, policy='greedy',
+             min_fan=MINIMUM_FAN, best=False, checkpoint=None, checkpoint_every=60.0,
+             cache_size=1 << 16, progress=None):
+    """
+    Simulate games (rounded up to whole blocks) across worker processes.
+    With a checkpoint path, resumes from it and saves to it every
+    checkpoint_every seconds and at the end. progress(totals, blocks_done,
+    blocks) is called after every block. Returns the totals.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+    config = {'seed': seed, 'block_size': block_size, 'policy': policy,
+              'min_fan': min_fan, 'best': best, 'games': games}
+    totals, done = load_checkpoint(checkpoint, config)
+    blocks = -(-games // block_size)
+    workers = workers or os.cpu_count() or 1
+    last_save = time.monotonic()
+
+    def finish(block_totals):
+        nonlocal done, last_save
+        merge_totals(totals, block_totals)
+        done += 1
+        if progress:
+            progress(totals, done, blocks)
+        if checkpoint and time.monotonic() - last_save >= checkpoint_every:
+            save_checkpoint(checkpoint, config, totals, done)
+            last_save = time.monotonic()
+
+    try:
+        if workers == 1:
+            _init_worker(cache_size)
+            for block in range(done, blocks):
+                finish(run_block(seed, block, block_size, policy, min_fan, best))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(cache_size,)) as pool:
+                pending = deque()
+                for block in range(done, blocks):
+                    pending.append(pool.submit(run_block, seed, block, block_size,
+                                               policy, min_fan, best))
+                    if len(pending) >= workers * 2:
+                        finish(pending.popleft().result())
+                while pending:
+                    finish(pending.popleft().result())
+    finally:
+        # Blocks finish in order, so the checkpoint always covers a prefix of them
+        if checkpoint:
+            save_checkpoint(checkpoint, config, totals, done)
+    return totals
+
+
+def print_report(totals, file=sys.stderr):
+    games, wins = totals['games'], totals['wins']
+    print(f"✅ {games} games: {wins} wins ({wins / max(games, 1):.1%}), "
+          f"{totals['self_picks']} self-picks, {totals['discard_wins']} on discards, "
+          f"{totals['exhausted']} exhausted walls, {totals['declined']} wins declined "
+          f"for too little Fan", file=file)
+    for key, label in (('fan', 'Fan'), ('payment', 'Payment')):
+        print(f"   {label:>7} {'wins':>10}   share", file=file)
+        for value, count in totals[key].items():
+            print(f"   {value:>7} {count:10d}  {count / max(wins, 1):6.2%}", file=file)
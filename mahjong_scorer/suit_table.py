@@ -0,0 +1,163 @@
+"""
+Precomputed table of every winning shape of a single suit.
+
+A suit's 9-slot count vector holding at most MAX_SUIT_TILES tiles has
+one of 405,350 values. Only about 35k of them can be split into sets
+(plus at most one pair). build_table() runs the search in hand.py over
+all of them once and writes the shapes to a small binary file. A
+SuitTable memory-maps that file, so a lookup is a binary search over
+sorted keys. Worker processes share the mapped pages and skip the
+recursive search entirely.
+
+File layout (little-endian uint32 throughout, after a 24-byte header):
+
+    header   magic, max_tiles, key count, shape count, reserved
+    keys     sorted base-5 codes of the decomposable count vectors
+    offsets  start of each key's shapes in the shape array (+1 end entry)
+    shapes   one word per shape, in suit_shapes() order:
+             bits 0-3 pair offset + 1 (0 = no pair), bits 4-6 meld count,
+             then 6 bits per meld from bit 7: kind << 4 | offset
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+from .hand import QUADRUPLET, SEQUENCE, TRIPLET
+
+MAGIC = b'MJSUIT01'
+HEADER = struct.Struct('<8s4I')
+MAX_SUIT_TILES = 14
+TABLE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'suit_shapes.bin')
+
+_KINDS = (SEQUENCE, TRIPLET, QUADRUPLET)
+_KIND_CODE = {kind: i for i, kind in enumerate(_KINDS)}
+
+
+def suit_key(counts):
+    """Base-5 code of a 9-slot count vector (first slot most significant)."""
+    key = 0
+    for c in counts:
+        key = key * 5 + c
+    return key
+
+
+def encode_shape(shape):
+    melds, pair = shape
+    word = (0 if pair is None else pair + 1) | len(melds) << 4
+    for i, (kind, offset) in enumerate(melds):
+        word |= (_KIND_CODE[kind] << 4 | offset) << (7 + 6 * i)
+    return word
+
+
+def decode_shape(word):
+    pair = (word & 0xF) - 1
+    melds = []
+    for i in range(word >> 4 & 0x7):
+        code = word >> (7 + 6 * i) & 0x3F
+        melds.append((_KINDS[code >> 4], code & 0xF))
+    return tuple(melds), (None if pair < 0 else pair)
+
+
+def iter_suit_vectors(max_tiles=MAX_SUIT_TILES):
+    """Every 9-slot vector of counts 0-4 with at most max_tiles tiles."""
+    def extend(prefix, left):
+        if len(prefix) == 9:
+            yield prefix
+            return
+        for c in range(min(4, left) + 1):
+            yield from extend(prefix + (c,), left - c)
+    yield from extend((), max_tiles)
+
+
+def build_table(path=TABLE_PATH, max_tiles=MAX_SUIT_TILES):
+    """Search every suit vector and write the table. Returns build stats."""
+    from .hand import search_suit
+
+    start = time.perf_counter()
+    vectors = 0
+    keys, offsets, shapes = array('I'), array('I'), array('I')
+    for counts in iter_suit_vectors(max_tiles):
+        vectors += 1
+        found = search_suit(counts)
+        if not found:
+            continue
+        keys.append(suit_key(counts))
+        offsets.append(len(shapes))
+        shapes.extend(encode_shape(s) for s in found)
+    offsets.append(len(shapes))
+
+    # iter_suit_vectors() counts up in base 5, so keys are already sorted
+    if sys.byteorder != 'little':
+        for part in (keys, offsets, shapes):
+            part.byteswap()
+
+    # Write beside the target and rename, so processes that have the old
+    # table mapped keep reading a complete file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, max_tiles, len(keys), len(shapes), 0))
+        keys.tofile(f)
+        offsets.tofile(f)
+        shapes.tofile(f)
+    os.replace(tmp_path, path)
+    return {
+        'path': path,
+        'vectors': vectors,
+        'keys': len(keys),
+        'shapes': len(shapes),
+        'bytes': os.path.getsize(path),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class SuitTable:
+    """Read-only, memory-mapped view of a table written by build_table()."""
+
+    def __init__(self, path=TABLE_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_tiles, n_keys, n_shapes, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a suit shape table")
+
+        if sys.byteorder == 'little':
+            self._views = [memoryview(self._map)]
+            self._views.append(self._views[0][HEADER.size:].cast('I'))
+            words = self._views[-1]
+        else:
+            self._views = []
+            words = array('I', self._map[HEADER.size:])
+            words.byteswap()
+        self._keys = words[:n_keys]
+        self._offsets = words[n_keys:2 * n_keys + 1]
+        self._shapes = words[2 * n_keys + 1:2 * n_keys + 1 + n_shapes]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, counts):
+        """
+        suit_shapes() for a 9-slot count vector: a tuple of (melds, pair),
+        empty if the suit cannot be split. None if the vector holds more
+        tiles than the table covers.
+        """
+        if sum(counts) > self.max_tiles:
+            return None
+        key = suit_key(counts)
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return ()
+        return tuple(decode_shape(w) for w in self._shapes[self._offsets[i]:self._offsets[i + 1]])
+
+    def close(self):
+        for view in (self._keys, self._offsets, self._shapes, *reversed(self._views)):
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
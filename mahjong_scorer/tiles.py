@@ -0,0 +1,153 @@
+"""
+Tile indices shared by the whole package.
+
+Regular tiles are 0-33: dots 1-9 (0-8), sticks 1-9 (9-17), man 1-9
+(18-26), winds east/south/west/north (27-30) and dragons red/green/white
+(31-33). Bonus tiles are 34-41: flowers plum/orchid/mum/bamboo, then
+seasons spring/summer/autumn/winter.
+
+Tiles can be given as the web app's {type, value} dicts or as the
+detector's class codes ('1D', '9B', '5C', 'EW', 'RD', '2F', '3S').
+
+Sets of tiles are bitmasks over the indices (see tile_mask); the tile
+classes (suits, honours, terminals, ...) are precomputed masks. A hand's
+counts pack into one int with pack_counts.
+"""
+
+from functools import lru_cache
+
+SUITS = ('dots', 'sticks', 'man')
+WINDS = ('east', 'south', 'west', 'north')
+DRAGONS = ('red', 'green', 'white')
+FLOWERS = ('plum', 'orchid', 'mum', 'bamboo')
+SEASONS = ('spring', 'summer', 'autumn', 'winter')
+
+NUM_TILES = 34
+NUM_BONUS = 8
+WIND_BASE = 27
+DRAGON_BASE = 31
+FLOWER_BASE = 34
+SEASON_BASE = 38
+
+TILES = (
+    [(suit, value) for suit in SUITS for value in range(1, 10)]
+    + [('winds', w) for w in WINDS]
+    + [('dragons', d) for d in DRAGONS]
+    + [('flowers', f) for f in FLOWERS]
+    + [('seasons', s) for s in SEASONS]
+)
+TILE_INDEX = {tile: i for i, tile in enumerate(TILES)}
+
+# Detector class codes: B=sticks, C=man, D=dots (see tileDetection.js)
+SUIT_CODES = {'D': 'dots', 'B': 'sticks', 'C': 'man'}
+CODE_OF_SUIT = {suit: code for code, suit in SUIT_CODES.items()}
+HONOUR_CODES = ('EW', 'SW', 'WW', 'NW', 'RD', 'GD', 'WD')
+
+TERMINALS = tuple(base + v for base in (0, 9, 18) for v in (0, 8))
+HONOURS = tuple(range(WIND_BASE, NUM_TILES))
+ORPHANS = TERMINALS + HONOURS
+
+# Bitmasks over tile indices (bit i set = tile i), so a whole-hand test
+# such as "only one suit plus honours" is one AND against a hand's mask
+SUIT_MASKS = tuple(((1 << 9) - 1) << base for base in (0, 9, 18))
+SUITED_MASK = (1 << WIND_BASE) - 1
+WIND_MASK = ((1 << 4) - 1) << WIND_BASE
+DRAGON_MASK = ((1 << 3) - 1) << DRAGON_BASE
+HONOUR_MASK = WIND_MASK | DRAGON_MASK
+TERMINAL_MASK = sum(1 << i for i in TERMINALS)
+ORPHAN_MASK = TERMINAL_MASK | HONOUR_MASK
+FLOWER_MASK = ((1 << 4) - 1) << FLOWER_BASE
+SEASON_MASK = ((1 << 4) - 1) << SEASON_BASE
+BONUS_MASK = FLOWER_MASK | SEASON_MASK
+
+# Packed counts: 3 bits per regular tile, tile 0 in the lowest bits
+COUNT_BITS = 3
+COUNT_MASK = (1 << COUNT_BITS) - 1
+
+
+def is_suited(index):
+    return index < WIND_BASE
+
+
+def is_bonus(index):
+    return bool(BONUS_MASK >> index & 1)
+
+
+def tile_mask(indices):
+    """Bitmask with the bit of each index set."""
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def pack_counts(counts):
+    """34 tile counts packed into one int, COUNT_BITS bits each."""
+    packed = 0
+    for i, c in enumerate(counts):
+        packed |= c << (COUNT_BITS * i)
+    return packed
+
+
+def unpack_counts(packed):
+    return tuple(packed >> (COUNT_BITS * i) & COUNT_MASK for i in range(NUM_TILES))
+
+
+@lru_cache(maxsize=256)
+def _from_code(code):
+    code = code.strip().upper()
+    if code in HONOUR_CODES:
+        return NUM_TILES - 7 + HONOUR_CODES.index(code)
+    if len(code) == 2 and code[0].isdigit():
+        num, kind = int(code[0]), code[1]
+        if kind in SUIT_CODES and 1 <= num <= 9:
+            return TILE_INDEX[(SUIT_CODES[kind], num)]
+        if kind == 'F' and 1 <= num <= 4:
+            return FLOWER_BASE + num - 1
+        if kind == 'S' and 1 <= num <= 4:
+            return SEASON_BASE + num - 1
+    raise ValueError(f"Unknown tile code: {code!r}")
+
+
+def tile_index(tile):
+    """Index of a {type, value} dict, a (type, value) pair, a class code or an index."""
+    if isinstance(tile, int):
+        if not 0 <= tile < FLOWER_BASE + NUM_BONUS:
+            raise ValueError(f"Unknown tile index: {tile}")
+        return tile
+    if isinstance(tile, str):
+        return _from_code(tile)
+    if isinstance(tile, dict):
+        key = (tile.get('type'), tile.get('value'))
+    else:
+        key = tuple(tile)
+    if key[0] in ('flowers', 'seasons') and isinstance(key[1], int):
+        # GameContextForm stores bonus tiles as seat numbers 1-4
+        names = FLOWERS if key[0] == 'flowers' else SEASONS
+        if not 1 <= key[1] <= len(names):
+            raise ValueError(f"Unknown tile: {tile!r} (seat numbers are 1-{len(names)})")
+        key = (key[0], names[key[1] - 1])
+    try:
+        return TILE_INDEX[key]
+    except KeyError:
+        raise ValueError(f"Unknown tile: {tile!r}") from None
+
+
+def tile_dict(index, concealed=True):
+    tile_type, value = TILES[index]
+    return {'type': tile_type, 'value': value, 'concealed': concealed}
+
+
+def tile_code(index):
+    tile_type, value = TILES[index]
+    if tile_type in CODE_OF_SUIT:
+        return f'{value}{CODE_OF_SUIT[tile_type]}'
+    if index < FLOWER_BASE:
+        return HONOUR_CODES[index - WIND_BASE]
+    if index < SEASON_BASE:
+        return f'{index - FLOWER_BASE + 1}F'
+    return f'{index - SEASON_BASE + 1}S'
@@ -0,0 +1,269 @@
+"""
+Vectorized scoring of large batches of hands with NumPy.
+
+score_batch() takes an (N, 34) count matrix plus per-hand context arrays
+and scores the whole batch with array operations wherever the result
+does not depend on how the hand is split into sets. That covers win
+actions, blessings, flowers and seasons, flushes, All Honours and the
+terminal hands. Dragon and wind pungs are covered too: an honour tile
+has no sequences, so in a standard reading 3 or 4 of it is always a
+pung and 2 is the pair.
+
+What does need a decomposition is whether the hand wins, whether it is
+read as standard, seven pairs or thirteen orphans, and its single set
+type (All Sequences, All Triplets, ...). That comes from one
+decompose() per distinct count row; batches of simulated hands repeat
+rows heavily. Results match calculate_score() on the reading parseHand
+picks (score_hand with best=False).
+
+Bonus tiles are only taken from the flowers/seasons arrays, not from
+the count matrix.
+"""
+
+import numpy as np
+
+from .hand import SEVEN_PAIRS, STANDARD, THIRTEEN_ORPHANS, decompose
+from .rules import MAX_FAN, MINIMUM_FAN, get_payment, pattern
+from .scoring import WIN_ACTIONS, check_single_set_type, seat_numbers
+from .tiles import (DRAGON_BASE, FLOWERS, HONOURS, NUM_TILES, SEASONS, SUIT_MASKS, TERMINALS,
+                    WIND_BASE, WINDS)
+
+WIN_TYPES = ('discard', 'selfPick', 'kongReplacement', 'doubleKongReplacement', 'robbingKong',
+             'moonUnderSea', 'heaven', 'earth', 'man')
+WIN_TYPE_CODE = {name: i for i, name in enumerate(WIN_TYPES)}
+
+# Readings, as returned in the 'reading' array
+INVALID, READ_STANDARD, READ_SEVEN_PAIRS, READ_THIRTEEN_ORPHANS = range(4)
+_READING = {STANDARD: READ_STANDARD, SEVEN_PAIRS: READ_SEVEN_PAIRS,
+            THIRTEEN_ORPHANS: READ_THIRTEEN_ORPHANS}
+
+# Every pattern calculate_score can award: (group, key); ENGINE is scoringEngine.js
+PATTERNS = (
+    ('SPECIAL_HANDS', 'THIRTEEN_ORPHANS'),
+    ('SPECIAL_HANDS', 'SEVEN_PAIRS'),
+    ('SPECIAL_HANDS', 'BLESSING_OF_HEAVEN'),
+    ('SPECIAL_HANDS', 'BLESSING_OF_EARTH'),
+    ('SPECIAL_HANDS', 'BLESSING_OF_MAN'),
+    ('SPECIAL_HANDS', 'NINE_GATES'),
+    ('ENGINE', 'EIGHT_FLOWERS'),
+    ('ENGINE', 'SEVEN_FLOWERS'),
+    ('WIN_ACTIONS', 'SELF_PICK'),
+    ('WIN_ACTIONS', 'WIN_BY_KONG_REPLACEMENT'),
+    ('WIN_ACTIONS', 'DOUBLE_KONG_REPLACEMENT'),
+    ('WIN_ACTIONS', 'CONCEALED_HAND'),
+    ('WIN_ACTIONS', 'ROBBING_THE_KONG'),
+    ('WIN_ACTIONS', 'MOON_UNDER_THE_SEA'),
+    ('SINGLE_SET_TYPE', 'ALL_QUADRUPLETS'),
+    ('SINGLE_SET_TYPE', 'ALL_CONCEALED_TRIPLETS'),
+    ('SINGLE_SET_TYPE', 'ALL_TRIPLETS'),
+    ('SINGLE_SET_TYPE', 'ALL_SEQUENCES'),
+    ('SPECIAL_TILE_HANDS', 'BIG_THREE_DRAGONS'),
+    ('SPECIAL_TILE_HANDS', 'SMALL_THREE_DRAGONS'),
+    ('SPECIAL_TILE_HANDS', 'DRAGON'),
+    ('SPECIAL_TILE_HANDS', 'BIG_FOUR_WINDS'),
+    ('SPECIAL_TILE_HANDS', 'SMALL_FOUR_WINDS'),
+    ('SPECIAL_TILE_HANDS', 'ROUND_WIND'),
+    ('SPECIAL_TILE_HANDS', 'SEAT_WIND'),
+    ('SPECIAL_TILE_HANDS', 'ALL_HONOURS'),
+    ('SPECIAL_TILE_HANDS', 'FULL_FLUSH'),
+    ('SPECIAL_TILE_HANDS', 'MIXED_FLUSH'),
+    ('SPECIAL_TILE_HANDS', 'ALL_TERMINALS'),
+    ('SPECIAL_TILE_HANDS', 'MIXED_TERMINALS'),
+    ('FLOWERS_SEASONS', 'NO_FLOWERS_SEASONS'),
+    ('ENGINE', 'ALL_FLOWERS'),
+    ('ENGINE', 'ALL_SEASONS'),
+    ('ENGINE', 'SEAT_FLOWER'),
+    ('ENGINE', 'SEAT_SEASON'),
+)
+PATTERN_KEYS = tuple(key for _, key in PATTERNS)
+PATTERN_FAN = np.array([pattern(group, key)['fan'] for group, key in PATTERNS], dtype=np.int32)
+_COLUMN = {key: i for i, key in enumerate(PATTERN_KEYS)}
+
+_TERMINAL = np.zeros(NUM_TILES, bool)
+_TERMINAL[list(TERMINALS)] = True
+_HONOUR = np.zeros(NUM_TILES, bool)
+_HONOUR[list(HONOURS)] = True
+_SUIT = [np.array([(mask >> i) & 1 for i in range(NUM_TILES)], bool) for mask in SUIT_MASKS]
+
+
+def empty_context_arrays(n):
+    """Context arrays of n empty contexts."""
+    return {
+        'win_type': np.full(n, -1, np.int8),
+        'seat_wind': np.full(n, -1, np.int8),
+        'round_wind': np.full(n, -1, np.int8),
+        'seat_number': np.ones(n, np.int8),
+        'is_dealer': np.zeros(n, bool),
+        'fully_concealed': np.zeros(n, bool),
+        'no_flowers_seasons': np.zeros(n, bool),
+        'flowers': np.zeros((n, 4), bool),
+        'seasons': np.zeros((n, 4), bool),
+    }
+
+
+def contexts_to_arrays(contexts):
+    """
+    Context arrays for score_batch() from a list of gameContext dicts
+    (the web app's keys). Flowers and seasons are seat numbers 1-4 or names.
+    """
+    arrays = empty_context_arrays(len(contexts))
+    wind_code = {w: i for i, w in enumerate(WINDS)}
+    for i, context in enumerate(contexts):
+        context = context or {}
+        arrays['win_type'][i] = WIN_TYPE_CODE.get(context.get('winType'), -1)
+        arrays['seat_wind'][i] = wind_code.get(context.get('seatWind'), -1)
+        arrays['round_wind'][i] = wind_code.get(context.get('roundWind'), -1)
+        arrays['seat_number'][i] = context.get('seatNumber') or 1
+        arrays['is_dealer'][i] = bool(context.get('isDealer'))
+        arrays['fully_concealed'][i] = bool(context.get('fullyConcealedHand'))
+        arrays['no_flowers_seasons'][i] = bool(context.get('noFlowersSeasons'))
+        for key, names in (('flowers', FLOWERS), ('seasons', SEASONS)):
+            for seat in seat_numbers(context.get(key), names):
+                arrays[key][i, seat - 1] = True
+    return arrays
+
+
+def structure(counts):
+    """
+    Per-row (reading, single set type column or -1) from one
+    decompose() per distinct row of the count matrix.
+    """
+    counts = np.ascontiguousarray(counts, dtype=np.uint8)
+    rows = counts.view(np.dtype((np.void, NUM_TILES))).ravel()
+    unique, inverse = np.unique(rows, return_inverse=True)
+
+    reading = np.zeros(len(unique), np.int8)
+    single = np.full(len(unique), -1, np.int8)
+    for u, row in enumerate(unique):
+        decomposition = decompose(tuple(np.frombuffer(row.tobytes(), np.uint8).tolist()))
+        if decomposition is None:
+            continue
+        reading[u] = _READING[decomposition.pattern]
+        found = check_single_set_type(decomposition)
+        if found:
+            single[u] = _COLUMN[found['key']]
+    inverse = inverse.ravel()
+    return reading[inverse], single[inverse]
+
+
+def score_batch(counts, contexts=None, **arrays):
+    """
+    Score N hands given as an (N, 34) count matrix.
+
+    Context comes from a list of dicts (contexts) or from the arrays of
+    contexts_to_arrays() passed as keyword arguments; missing arrays
+    take the defaults of an empty context. Returns a dict of arrays:
+    total_fan, payment, meets_minimum, reading (INVALID, READ_STANDARD,
+    ...), special, and patterns, an (N, len(PATTERN_KEYS)) matrix of how
+    many times each pattern was awarded.
+    """
+    counts = np.asarray(counts)
+    if counts.ndim != 2 or counts.shape[1] != NUM_TILES:
+        raise ValueError(f"expected an (N, {NUM_TILES}) count matrix, got {counts.shape}")
+    n = len(counts)
+    ctx = contexts_to_arrays(contexts) if contexts is not None else empty_context_arrays(n)
+    ctx.update(arrays)
+    win_type = np.asarray(ctx['win_type'])
+    dealer = np.asarray(ctx['is_dealer'], bool)
+    flowers = np.asarray(ctx['flowers'], bool)
+    seasons = np.asarray(ctx['seasons'], bool)
+
+    reading, single = structure(counts)
+    valid = reading != INVALID
+    standard = reading == READ_STANDARD
+    out = np.zeros((n, len(PATTERNS)), np.uint8)
+
+    def award(key, where, times=1):
+        out[:, _COLUMN[key]] = np.where(where, times, 0)
+
+    # Special hands, in check order; the first that applies replaces everything else
+    present = counts > 0
+    one_suit = [~(present & ~suit).any(axis=1) for suit in _SUIT]
+    nine_gates = np.zeros(n, bool)
+    for s, suit in enumerate(_SUIT):
+        c = counts[:, suit]
+        nine_gates |= (one_suit[s] & (c[:, 0] >= 3) & (c[:, 8] >= 3)
+                       & (c[:, 1:8] >= 1).all(axis=1) & (c.sum(axis=1) == 14))
+    bonus = flowers.sum(axis=1) + seasons.sum(axis=1)
+    specials = [
+        ('THIRTEEN_ORPHANS', reading == READ_THIRTEEN_ORPHANS),
+        ('SEVEN_PAIRS', reading == READ_SEVEN_PAIRS),
+        ('BLESSING_OF_HEAVEN', (win_type == WIN_TYPE_CODE['heaven']) & dealer),
+        ('BLESSING_OF_EARTH', (win_type == WIN_TYPE_CODE['earth']) & ~dealer),
+        ('BLESSING_OF_MAN', (win_type == WIN_TYPE_CODE['man']) & ~dealer),
+        ('NINE_GATES', nine_gates),
+        ('EIGHT_FLOWERS', bonus == 8),
+        ('SEVEN_FLOWERS', bonus == 7),
+    ]
+    special = np.zeros(n, bool)
+    for key, where in specials:
+        where = where & valid & ~special
+        award(key, where)
+        special |= where
+    regular = standard & ~special
+
+    # Win actions
+    for name, key in WIN_ACTIONS.items():
+        award(key, regular & (win_type == WIN_TYPE_CODE[name]))
+    award('CONCEALED_HAND', regular & np.asarray(ctx['fully_concealed'], bool)
+          & (win_type == WIN_TYPE_CODE['discard']))
+
+    # Single set type, from the decomposition
+    for key in ('ALL_QUADRUPLETS', 'ALL_CONCEALED_TRIPLETS', 'ALL_TRIPLETS', 'ALL_SEQUENCES'):
+        award(key, regular & (single == _COLUMN[key]))
+
+    # Honour pungs and pairs
+    dragons = counts[:, DRAGON_BASE:NUM_TILES]
+    winds = counts[:, WIND_BASE:DRAGON_BASE]
+    dragon_pungs = (dragons >= 3).sum(axis=1)
+    wind_pungs = (winds >= 3).sum(axis=1)
+    award('BIG_THREE_DRAGONS', regular & (dragon_pungs == 3))
+    award('SMALL_THREE_DRAGONS', regular & (dragon_pungs == 2) & (dragons == 2).any(axis=1))
+    plain_dragons = regular & (out[:, _COLUMN['BIG_THREE_DRAGONS']] == 0) \
+        & (out[:, _COLUMN['SMALL_THREE_DRAGONS']] == 0)
+    award('DRAGON', plain_dragons, dragon_pungs)
+
+    seat_wind = np.asarray(ctx['seat_wind'])
+    round_wind = np.asarray(ctx['round_wind'])
+    big_winds = regular & (wind_pungs == 4)
+    small_winds = regular & (wind_pungs == 3) & (winds == 2).any(axis=1)
+    award('BIG_FOUR_WINDS', big_winds)
+    award('SMALL_FOUR_WINDS', small_winds)
+    rows = np.arange(n)
+    scored_winds = regular & ~big_winds & ~small_winds & (seat_wind >= 0) & (round_wind >= 0)
+    award('ROUND_WIND', scored_winds & (winds[rows, np.clip(round_wind, 0, 3)] >= 3))
+    award('SEAT_WIND', scored_winds & (winds[rows, np.clip(seat_wind, 0, 3)] >= 3))
+
+    # Flushes and terminals: which tiles are present
+    suited = (present & ~_HONOUR).any(axis=1)
+    honours = (present & _HONOUR).any(axis=1)
+    single_suit = np.logical_or.reduce([~(present & ~suit & ~_HONOUR).any(axis=1) for suit in _SUIT])
+    non_terminal = (present & ~_TERMINAL).any(axis=1)
+    non_orphan = (present & ~_TERMINAL & ~_HONOUR).any(axis=1)
+    award('ALL_HONOURS', regular & ~suited)
+    award('FULL_FLUSH', regular & suited & single_suit & ~honours)
+    award('MIXED_FLUSH', regular & suited & single_suit & honours)
+    award('ALL_TERMINALS', regular & ~non_terminal)
+    award('MIXED_TERMINALS', regular & non_terminal & honours & ~non_orphan)
+
+    # Flowers and seasons
+    none = np.asarray(ctx['no_flowers_seasons'], bool) | (bonus == 0)
+    seat = np.clip(np.asarray(ctx['seat_number']), 1, 4) - 1
+    seat_ok = (np.asarray(ctx['seat_number']) >= 1) & (np.asarray(ctx['seat_number']) <= 4)
+    award('NO_FLOWERS_SEASONS', regular & none)
+    award('ALL_FLOWERS', regular & ~none & flowers.all(axis=1))
+    award('ALL_SEASONS', regular & ~none & seasons.all(axis=1))
+    award('SEAT_FLOWER', regular & ~none & seat_ok & flowers[rows, seat])
+    award('SEAT_SEASON', regular & ~none & seat_ok & seasons[rows, seat])
+
+    total = out.astype(np.int32) @ PATTERN_FAN
+    payment = np.where(total >= MAX_FAN, get_payment(MAX_FAN), 2 ** np.minimum(total, MAX_FAN))
+    payment = np.where(valid, payment, 0)
+    return {
+        'total_fan': total,
+        'payment': payment,
+        'meets_minimum': valid & (total >= MINIMUM_FAN),
+        'reading': reading,
+        'special': special,
+        'patterns': out,
+    }
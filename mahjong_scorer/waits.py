@@ -0,0 +1,180 @@
+"""
+Waiting tiles (tenpai) of a hand one tile short of a win.
+
+A standard win needs four melds and one pair across the ten tile groups
+(three suits, seven honours). Each group state is summarized by its
+profiles: the (melds, pairs) counts its shapes can produce. It also
+records the profiles it would have after taking one more of each of its
+tiles. A tile t of group g completes the hand if some profile of g
+with t added, plus some combination of the other groups' profiles,
+comes to exactly (4, 1).
+
+Group summaries are memoized on the group's counts. Drawing or
+discarding changes one group, so a WaitAnalyzer re-reads only that
+group's summary, which is usually a cache hit. The other nine are
+reused. Only the few tiles that do complete the hand are fully
+decomposed and scored. Seven pairs and thirteen orphans waits are
+checked directly.
+"""
+
+from functools import lru_cache
+
+from .hand import HAND_SIZES, Hand, honour_shapes, seven_pairs, suit_shapes, thirteen_orphans
+from .scoring import decomposition_dict, score_hand
+from .tiles import NUM_TILES, ORPHANS, WIND_BASE, is_bonus, tile_code, tile_index
+
+MELDS = 4
+
+# (base index, width) of the ten groups
+GROUPS = tuple([(base, 9) for base in (0, 9, 18)] + [(i, 1) for i in range(WIND_BASE, NUM_TILES)])
+_GROUP_OF = [g for g, (base, width) in enumerate(GROUPS) for _ in range(width)]
+
+
+def _profiles(shapes):
+    return frozenset((len(melds), pair is not None) for melds, pair in shapes)
+
+
+@lru_cache(maxsize=1 << 14)
+def group_summary(counts):
+    """
+    (profiles, completions) of one group's counts; completions maps a
+    tile offset to the profiles after adding that tile, for the offsets
+    whose addition still decomposes.
+    """
+    shapes_of = suit_shapes if len(counts) == 9 else (lambda c: honour_shapes(c[0]))
+    completions = {}
+    for offset, c in enumerate(counts):
+        if c < 4:
+            after = _profiles(shapes_of(counts[:offset] + (c + 1,) + counts[offset + 1:]))
+            if after:
+                completions[offset] = after
+    return _profiles(shapes_of(counts)), completions
+
+
+@lru_cache(maxsize=1 << 12)
+def _combine(a, b):
+    return frozenset((ma + mb, pa + pb) for ma, pa in a for mb, pb in b
+                     if ma + mb <= MELDS and pa + pb <= 1)
+
+
+class WaitAnalyzer:
+    """
+    Tracks a hand through draws and discards and reports its waits.
+
+        analyzer = WaitAnalyzer(['1D', '2D', ...], {'seatWind': 'east'})
+        analyzer.waits()
+        analyzer.add('5B'); analyzer.remove('9C')
+        analyzer.waits()
+    """
+
+    def __init__(self, hand, context=None):
+        if not isinstance(hand, Hand):
+            hand = Hand.from_tiles(hand)
+        self.counts = list(hand.counts)
+        self.bonus = list(hand.bonus)
+        self.concealed = hand.concealed
+        self.context = context or {}
+        self._summaries = [group_summary(self._group_counts(g)) for g in range(len(GROUPS))]
+        self._cached = None
+
+    def _group_counts(self, g):
+        base, width = GROUPS[g]
+        return tuple(self.counts[base:base + width])
+
+    def _update(self, tile, delta):
+        index = tile_index(tile)
+        if is_bonus(index):
+            (self.bonus.append if delta > 0 else self.bonus.remove)(index)
+        else:
+            if not 0 <= self.counts[index] + delta <= 4:
+                raise ValueError(f"cannot {'add' if delta > 0 else 'remove'} {tile_code(index)}")
+            self.counts[index] += delta
+            g = _GROUP_OF[index]
+            self._summaries[g] = group_summary(self._group_counts(g))
+        self._cached = None
+
+    def add(self, tile):
+        """Draw a tile (index, code or tile dict)."""
+        self._update(tile, 1)
+
+    def remove(self, tile):
+        """Discard a tile."""
+        self._update(tile, -1)
+
+    @property
+    def hand(self):
+        return Hand(self.counts, self.bonus, self.concealed)
+
+    def winning_tiles(self):
+        """Indices of the tiles that would complete the hand, ascending."""
+        if sum(self.counts) + 1 not in HAND_SIZES:
+            # Hands with kongs never win, as in parseHand
+            return []
+        profiles = [p for p, _ in self._summaries]
+        # others[g]: what every group except g can contribute together
+        prefix = [frozenset({(0, 0)})]
+        for p in profiles:
+            prefix.append(_combine(prefix[-1], p))
+        suffix = [frozenset({(0, 0)})]
+        for p in reversed(profiles):
+            suffix.append(_combine(suffix[-1], p))
+        suffix.reverse()
+
+        found = set()
+        for g, (_, completions) in enumerate(self._summaries):
+            if not completions:
+                continue
+            others = _combine(prefix[g], suffix[g + 1])
+            if not others:
+                continue
+            base = GROUPS[g][0]
+            for offset, after in completions.items():
+                if (MELDS, 1) in _combine(after, others):
+                    found.add(base + offset)
+
+        counts = self.counts
+        if sum(counts) == 13:
+            odd = [t for t, c in enumerate(counts) if c % 2]
+            if len(odd) == 1 and seven_pairs(self._with(odd[0])):
+                found.add(odd[0])
+            if sum(counts[i] for i in ORPHANS) == 13:
+                found.update(t for t in ORPHANS if thirteen_orphans(self._with(t)))
+        return sorted(found)
+
+    def _with(self, t):
+        counts = list(self.counts)
+        counts[t] += 1
+        return counts
+
+    def waits(self):
+        """
+        One dict per winning tile: tile index and code, how many of it
+        are not in the hand, and the best score of the completed hand
+        (highest-scoring reading) under the analyzer's context.
+        """
+        if self._cached is None:
+            self._cached = [self._score_wait(t) for t in self.winning_tiles()]
+        return self._cached
+
+    def _score_wait(self, t):
+        result = score_hand(Hand(self._with(t), self.bonus, self.concealed), self.context, best=True)
+        return {
+            'tile': t,
+            'code': tile_code(t),
+            'remaining': 4 - self.counts[t],
+            'totalFan': result['totalFan'],
+            'payment': result['payment'],
+            'meetsMinimum': result['meetsMinimum'],
+            'matchedPatterns': result['matchedPatterns'],
+            'decomposition': decomposition_dict(result['decomposition']),
+        }
+
+
+def waits(hand, context=None):
+    """Every tile that completes the hand, with the best score for each."""
+    return WaitAnalyzer(hand, context).waits()
+
+
+def winning_tiles(hand):
+    """Just the completing tile indices, without scoring."""
+    return WaitAnalyzer(hand).winning_tiles()
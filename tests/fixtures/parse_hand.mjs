@@ -0,0 +1,50 @@
+/**
+ * Rewrites the expectations in parse_hand.json with the web app's
+ * parseHand, for tests/test_hand.py. Run from the repository root after
+ * changing the hands or src/utils/handValidator.js:
+ *
+ *     node tests/fixtures/parse_hand.mjs
+ *
+ * Each entry's tiles are detector class codes in tile index order; parsed,
+ * sets ([type, codes]) and pair (codes) are what parseHand returns for them.
+ */
+import { readFileSync, writeFileSync } from 'node:fs';
+import { parseHand } from '../../src/utils/handValidator.js';
+
+const path = new URL('./parse_hand.json', import.meta.url);
+const SUITS = { D: 'dots', B: 'sticks', C: 'man' };
+const HONOURS = {
+  EW: ['winds', 'east'], SW: ['winds', 'south'], WW: ['winds', 'west'], NW: ['winds', 'north'],
+  RD: ['dragons', 'red'], GD: ['dragons', 'green'], WD: ['dragons', 'white'],
+};
+const BONUS = {
+  F: ['flowers', ['plum', 'orchid', 'mum', 'bamboo']],
+  S: ['seasons', ['spring', 'summer', 'autumn', 'winter']],
+};
+
+const toTile = code => {
+  if (HONOURS[code]) return { type: HONOURS[code][0], value: HONOURS[code][1], concealed: true };
+  const value = Number(code[0]);
+  if (SUITS[code[1]]) return { type: SUITS[code[1]], value, concealed: true };
+  const [type, names] = BONUS[code[1]];
+  return { type, value: names[value - 1], concealed: true };
+};
+
+const toCode = tile => {
+  const suit = Object.keys(SUITS).find(key => SUITS[key] === tile.type);
+  if (suit) return `${tile.value}${suit}`;
+  return Object.keys(HONOURS).find(key => HONOURS[key][0] === tile.type && HONOURS[key][1] === tile.value);
+};
+
+const cases = JSON.parse(readFileSync(path, 'utf8'));
+const updated = cases.map(({ tiles }) => {
+  const result = parseHand(tiles.map(toTile));
+  return {
+    tiles,
+    parsed: result !== null,
+    sets: result ? result.sets.map(set => [set.type, set.tiles.map(toCode)]) : [],
+    pair: result && result.pair ? result.pair.map(toCode) : null,
+  };
+});
+writeFileSync(path, `[\n${updated.map(entry => ` ${JSON.stringify(entry)}`).join(',\n')}\n]\n`);
+console.log(`${updated.length} hands written to ${path.pathname}`);
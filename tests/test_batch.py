@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from mahjong_scorer.batch import score_record
+from mahjong_scorer.scoring import score_hand
+from mahjong_scorer.tiles import tile_index
+
+HAND = '1D 2D 3D 4B 5B 6B 7C 8C 9C 5D 6D 7D EW EW'
+
+
+def test_jsonl_record_is_scored():
+    out = score_record(json.dumps({'id': 'h1', 'tiles': HAND.split(),
+                                   'context': {'winType': 'selfPick'}}), 'jsonl')
+    assert out['id'] == 'h1' and 'error' not in out
+    assert 'SELF_PICK' in [p['key'] for p in out['patterns']]
+
+
+def test_csv_record_is_scored():
+    out = score_record({'id': 'h2', 'tiles': HAND, 'winType': 'selfPick'}, 'csv')
+    assert out['id'] == 'h2' and out['totalFan'] >= 1
+
+
+@pytest.mark.parametrize('row', [{'id': 'x', 'tiles': ''}, {'id': 'x', 'tiles': None}, {'id': 'x'}])
+def test_csv_row_without_tiles_is_a_record_error(row):
+    out = score_record(row, 'csv')
+    assert 'no tiles' in out['error']
+
+
+@pytest.mark.parametrize('value', [0, 5, -1])
+def test_bonus_seat_out_of_range_is_a_record_error(value):
+    tiles = HAND.split() + [{'type': 'flowers', 'value': value}]
+    out = score_record(json.dumps({'id': 'b', 'tiles': tiles}), 'jsonl')
+    assert out['id'] == 'b'
+    assert 'seat numbers are 1-4' in out['error']
+
+
+def test_bonus_seat_numbers_map_to_names():
+    assert tile_index({'type': 'flowers', 'value': 1}) == tile_index('1F')
+    assert tile_index({'type': 'seasons', 'value': 4}) == tile_index('4S')
+    with pytest.raises(ValueError):
+        tile_index({'type': 'seasons', 'value': 0})
+
+
+def test_invalid_results_do_not_share_state():
+    first = score_hand(['1D'])
+    first['matchedPatterns'].append({'key': 'MUTATED'})
+    assert score_hand(['2D'])['matchedPatterns'] == []
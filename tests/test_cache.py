@@ -0,0 +1,42 @@
+from mahjong_scorer.cache import ScoreCache, context_hash
+from mahjong_scorer.scoring import score_hand
+
+HAND = '1D 2D 3D 4B 5B 6B 7C 8C 9C 5D 6D 7D EW EW'.split()
+
+
+def test_results_match_score_hand():
+    cache = ScoreCache(16)
+    for context in ({}, {'winType': 'selfPick'}, {'seatWind': 'east', 'roundWind': 'east'}):
+        assert cache.score(HAND, context) == score_hand(HAND, context)
+        assert cache.score(HAND, context) == score_hand(HAND, context)
+    assert cache.stats()['hits'] == 3
+
+
+def test_lru_evicts_oldest():
+    cache = ScoreCache(2)
+    for win_type in ('discard', 'selfPick', 'robbingKong'):
+        cache.score(HAND, {'winType': win_type})
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.score(HAND, {'winType': 'discard'})
+    assert cache.misses == 4
+
+
+def test_database_only_cache(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    with ScoreCache(0, path) as cache:
+        cache.score(HAND)
+        cache.score(HAND, {'winType': 'selfPick'})
+        assert len(cache) == 0 and cache.evictions == 0
+
+    with ScoreCache(0, path) as cache:
+        assert cache.score(HAND) == score_hand(HAND)
+        assert cache.db_hits == 1 and cache.evictions == 0
+
+
+def test_contexts_that_score_alike_share_a_key():
+    # Winds only count together; isDealer only for blessings
+    assert context_hash({'seatWind': 'east'}) == context_hash({})
+    assert context_hash({'winType': 'discard', 'isDealer': True}) == \
+        context_hash({'winType': 'discard'})
+    assert context_hash({'winType': 'heaven', 'isDealer': True}) != \
+        context_hash({'winType': 'heaven'})
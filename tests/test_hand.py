@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+from collections import Counter
+
+import pytest
+
+from mahjong_scorer.crosscheck import NodeEngine, compare, sample_cases
+from mahjong_scorer.hand import (SEVEN_PAIRS, STANDARD, THIRTEEN_ORPHANS, Hand, decompose,
+                                 decompositions, meld_tiles)
+from mahjong_scorer.scoring import decomposition_dict
+from mahjong_scorer.tiles import NUM_TILES
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'parse_hand.json')
+
+with open(FIXTURES) as f:
+    PARSE_HAND = json.load(f)
+
+
+@pytest.mark.parametrize('case', PARSE_HAND, ids=lambda case: ' '.join(case['tiles']))
+def test_first_reading_is_parse_hands(case):
+    decomposition = decompose(Hand.from_tiles(case['tiles']))
+    assert (decomposition is not None) == case['parsed']
+    if decomposition is None:
+        return
+    if decomposition.pattern in (SEVEN_PAIRS, THIRTEEN_ORPHANS):
+        # parseHand returns these with no sets and no pair
+        assert case['sets'] == [] and case['pair'] is None
+        return
+    found = decomposition_dict(decomposition)
+    assert sorted(found['melds']) == sorted(case['sets'])
+    assert [found['pair']] * 2 == case['pair']
+
+
+def test_kong_hands_do_not_win():
+    hand = Hand.from_tiles('RD RD RD RD GD GD GD WD WD WD 1D 2D 3D 9C 9C'.split())
+    assert hand.size == 15
+    assert decompositions(hand) == []
+
+
+def test_standard_readings_use_every_tile():
+    for tiles, _ in sample_cases(3, 0, 300):
+        hand = Hand.from_tiles([t for t in tiles if t < NUM_TILES])
+        for d in decompositions(hand):
+            if d.pattern == STANDARD:
+                used = Counter(t for m in d.melds for t in meld_tiles(m)) + Counter([d.pair] * 2)
+                assert used == Counter(hand.tiles())
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs node')
+def test_scores_match_app_engine():
+    with NodeEngine() as engine:
+        found, count = compare(engine, sample_cases(0, 0, 2000))
+    assert count == 2000
+    assert [d['case'] for d in found if not d['known']] == []
@@ -0,0 +1,39 @@
+import random
+
+from mahjong_scorer.cache import cache_key
+from mahjong_scorer.crosscheck import sample_cases
+from mahjong_scorer.hand import Hand
+from mahjong_scorer.tiles import NUM_TILES, pack_counts, unpack_counts
+
+
+def hands(seed, n):
+    rng = random.Random(seed)
+    for tiles, _ in sample_cases(seed, 0, n):
+        hand = Hand.from_tiles(tiles)
+        yield Hand(hand.counts, hand.bonus, rng.random() < 0.5)
+
+
+def test_pack_round_trips():
+    for hand in hands(1, 500):
+        packed = hand.pack()
+        assert packed < 1 << 111
+        again = Hand.unpack(packed)
+        assert (again.counts, again.bonus, again.concealed) == \
+            (hand.counts, hand.bonus, hand.concealed)
+        assert unpack_counts(pack_counts(hand.counts)) == hand.counts
+
+
+def test_equal_hands_share_pack_hash_and_cache_key():
+    for hand in hands(2, 200):
+        shuffled = hand.tiles() + list(hand.bonus)
+        random.Random(0).shuffle(shuffled)
+        other = Hand(Hand.from_tiles(shuffled).counts, reversed(hand.bonus), hand.concealed)
+        assert other == hand and hash(other) == hash(hand)
+        assert cache_key(other, {}) == cache_key(hand, {})
+        assert Hand(hand.counts, hand.bonus, not hand.concealed) != hand
+
+
+def test_every_count_survives_packing():
+    for c in range(5):
+        counts = tuple([c] * NUM_TILES)
+        assert unpack_counts(pack_counts(counts)) == counts
@@ -0,0 +1,56 @@
+import numpy as np
+
+from mahjong_scorer.crosscheck import enumerate_cases, sample_cases
+from mahjong_scorer.hand import Hand
+from mahjong_scorer.scoring import score_hand
+from mahjong_scorer.tiles import NUM_TILES
+from mahjong_scorer.vectorized import PATTERN_KEYS, score_batch
+
+
+def regular_cases(cases):
+    """Bonus tiles dropped: score_batch takes them from the context only."""
+    return [([t for t in tiles if t < NUM_TILES], context) for tiles, context in cases]
+
+
+def check_against_scalar(cases):
+    counts = np.array([Hand.from_tiles(tiles).counts for tiles, _ in cases], dtype=np.uint8)
+    batch = score_batch(counts, [context for _, context in cases])
+    for i, (tiles, context) in enumerate(cases):
+        expected = score_hand(tiles, context)
+        assert batch['total_fan'][i] == expected['totalFan'], (tiles, context)
+        assert batch['payment'][i] == expected['payment'], (tiles, context)
+        assert batch['meets_minimum'][i] == expected['meetsMinimum'], (tiles, context)
+        awarded = {key: n for key, n in zip(PATTERN_KEYS, batch['patterns'][i]) if n}
+        scalar = {}
+        for p in expected['matchedPatterns']:
+            scalar[p['key']] = scalar.get(p['key'], 0) + 1
+        assert awarded == scalar, (tiles, context)
+
+
+def test_sampled_hands_match_scalar_scores():
+    check_against_scalar(regular_cases(sample_cases(11, 0, 3000)))
+
+
+def test_enumerated_hands_match_scalar_scores():
+    check_against_scalar(regular_cases(enumerate_cases(11, 4, 3000)))
+
+
+def test_invalid_hands_score_nothing():
+    counts = np.zeros((2, NUM_TILES), dtype=np.uint8)
+    counts[1, :15] = 1
+    batch = score_batch(counts)
+    assert batch['total_fan'].tolist() == [0, 0]
+    assert batch['payment'].tolist() == [0, 0]
+    assert not batch['meets_minimum'].any()
+
+
+def test_repeated_and_out_of_range_seats_match_scalar():
+    tiles = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 12]
+    contexts = [
+        {'flowers': [1, 2, 3, 4], 'seasons': [1, 2, 3, 3]},        # 7 distinct
+        {'flowers': [1, 2, 3, 4, 4], 'seasons': [1, 2, 3, 9]},     # 7 distinct
+        {'flowers': [1, 2, 3, 4], 'seasons': [1, 2, 3, 4, 0]},     # 8 distinct
+        {'flowers': [5, 0], 'seasons': [7]},                       # none valid
+        {'flowers': ['plum', 1, 2, 3, 'bamboo'], 'seatNumber': 1},
+    ]
+    check_against_scalar([(tiles, context) for context in contexts])
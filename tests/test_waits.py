@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from mahjong_scorer.crosscheck import sample_cases
+from mahjong_scorer.hand import Hand, decompositions, is_winning
+from mahjong_scorer.tiles import NUM_TILES
+from mahjong_scorer.waits import WaitAnalyzer, waits, winning_tiles
+
+
+def brute_force(counts):
+    found = []
+    for t in range(NUM_TILES):
+        if counts[t] < 4:
+            counts[t] += 1
+            if decompositions(counts):
+                found.append(t)
+            counts[t] -= 1
+    return found
+
+
+def one_short(seed, n):
+    """Winning hands with one tile taken out, so most of them wait on something."""
+    rng = random.Random(seed)
+    hands = []
+    for tiles, _ in sample_cases(seed, 0, n):
+        regular = [t for t in tiles if t < NUM_TILES]
+        regular.pop(rng.randrange(len(regular)))
+        hands.append(regular)
+    return hands
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_winning_tiles_match_brute_force(seed):
+    for tiles in one_short(seed, 400):
+        counts = list(Hand.from_tiles(tiles).counts)
+        assert winning_tiles(tiles) == brute_force(counts), tiles
+
+
+def test_analyzer_follows_draws_and_discards():
+    rng = random.Random(5)
+    hand = one_short(5, 1)[0]
+    analyzer = WaitAnalyzer(hand)
+    wall = [t for t in range(NUM_TILES) for _ in range(4 - hand.count(t))]
+    rng.shuffle(wall)
+    for drawn in wall[:200]:
+        analyzer.add(drawn)
+        hand.append(drawn)
+        discard = hand.pop(rng.randrange(len(hand)))
+        analyzer.remove(discard)
+        assert analyzer.winning_tiles() == brute_force(list(Hand.from_tiles(hand).counts))
+
+
+def test_waits_score_the_completed_hand():
+    tiles = '1D 2D 3D 4B 5B 6B 7C 8C 9C 5D 6D 7D EW'.split()
+    [wait] = waits(tiles)
+    assert wait['code'] == 'EW' and wait['remaining'] == 3
+    assert is_winning(Hand.from_tiles(tiles + ['EW']))
+
+
+def test_kong_hands_have_no_waits():
+    assert winning_tiles('RD RD RD RD GD GD GD WD WD WD 1D 2D 3D 9C'.split()) == []
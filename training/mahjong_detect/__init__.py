@@ -0,0 +1,19 @@
+"""
+Offline reference for the browser's YOLOv8 tile detector.
+
+Runs the exported detector (ONNX, TFLite or SavedModel) on CPU with the
+same letterbox preprocessing as src/utils/tileDetection.js and decodes
+its [1, 46, 8400] output with NumPy. Use it for batch detection over
+photo folders and as a golden reference for the browser path:
+
+    python -m mahjong_detect detect --model best.onnx photos/*.jpg
+
+The class table comes from public/models/mahjong-detector/metadata.yaml.
+Only NumPy, Pillow and PyYAML are imported up front; the inference
+runtime is imported when a model is loaded.
+"""
+
+from .classes import ClassTable, class_to_tile, load_class_table
+from .postprocess import decode_output
+
+__all__ = ['ClassTable', 'class_to_tile', 'load_class_table', 'decode_output']
@@ -0,0 +1,139 @@
+"""
+Benchmark the NumPy NMS against the browser's removeDuplicateDetections.
+
+js_remove_duplicate_detections is a line-by-line port of the JS routine
+(pairwise IoU with a suppressed set, then the position sort, the 4-per-
+tile cap and the 22-tile cutoff as separate passes). Both run on the
+same recorded detections (the JSONL written by `mahjong_detect detect`);
+the hands they return must be identical.
+"""
+
+import json
+import time
+
+import numpy as np
+
+from .nms import IOU_THRESHOLD, remove_duplicates, remove_duplicates_batch
+
+
+def _js_iou(box1, box2):
+    x1_min, x1_max = box1['x'] - box1['w'] / 2, box1['x'] + box1['w'] / 2
+    y1_min, y1_max = box1['y'] - box1['h'] / 2, box1['y'] + box1['h'] / 2
+    x2_min, x2_max = box2['x'] - box2['w'] / 2, box2['x'] + box2['w'] / 2
+    y2_min, y2_max = box2['y'] - box2['h'] / 2, box2['y'] + box2['h'] / 2
+
+    inter_x_min, inter_x_max = max(x1_min, x2_min), min(x1_max, x2_max)
+    inter_y_min, inter_y_max = max(y1_min, y2_min), min(y1_max, y2_max)
+    if inter_x_max <= inter_x_min or inter_y_max <= inter_y_min:
+        return 0
+    inter_area = (inter_x_max - inter_x_min) * (inter_y_max - inter_y_min)
+    return inter_area / (box1['w'] * box1['h'] + box2['w'] * box2['h'] - inter_area)
+
+
+def js_remove_duplicate_detections(detections, iou_threshold=IOU_THRESHOLD):
+    """Port of removeDuplicateDetections in src/utils/tileDetection.js."""
+    if not detections:
+        return []
+    ordered = sorted(detections, key=lambda d: -d['confidence'])
+
+    kept, suppressed = [], set()
+    for i, current in enumerate(ordered):
+        if i in suppressed:
+            continue
+        kept.append(current)
+        for j in range(i + 1, len(ordered)):
+            if j in suppressed:
+                continue
+            if _js_iou(current['bbox'], ordered[j]['bbox']) > iou_threshold:
+                suppressed.add(j)
+
+    xs = [d['bbox']['x'] for d in kept]
+    ys = [d['bbox']['y'] for d in kept]
+    axis = 'y' if max(ys) - min(ys) > max(xs) - min(xs) else 'x'
+    by_position = sorted(kept, key=lambda d: d['bbox'][axis])
+
+    counts, result = {}, []
+    for det in by_position:
+        key = f"{det['type']}-{det['value']}"
+        if counts.get(key, 0) < 4:
+            result.append({'type': det['type'], 'value': det['value'], 'concealed': True})
+            counts[key] = counts.get(key, 0) + 1
+    return result[:22]
+
+
+def load_recorded(path):
+    """Records from a `mahjong_detect detect` JSONL file."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_to_result(record, class_table):
+    """Rebuild decode_output-style arrays from a record's detection dicts."""
+    detections = record['detections']
+    index = {name: i for i, name in enumerate(class_table.names)}
+    return {
+        'boxes': np.array([[d['bbox'][k] for k in 'xywh'] for d in detections],
+                          dtype=np.float64).reshape(-1, 4),
+        'scores': np.array([d['confidence'] for d in detections], dtype=np.float64),
+        'class_ids': np.array([index[d['className']] for d in detections], dtype=np.int64),
+    }
+
+
+def synthetic_records(class_table, images=50, tiles=14, copies=30, seed=0):
+    """
+    Detections shaped like the detector's raw output: a row of tiles,
+    each hit by many jittered anchors of mixed classes.
+    """
+    rng = np.random.default_rng(seed)
+    records = []
+    for n in range(images):
+        detections = []
+        for t in range(tiles):
+            cx, cy = 40 + t * 40, 320 + rng.normal(0, 5)
+            true_class = int(rng.integers(len(class_table)))
+            for _ in range(copies):
+                class_id = true_class if rng.random() < 0.8 else int(rng.integers(len(class_table)))
+                tile = class_table.tile(class_id)
+                detections.append({
+                    **tile,
+                    'confidence': float(rng.uniform(0.15, 0.95)),
+                    'className': class_table.name(class_id),
+                    'bbox': {'x': cx + rng.normal(0, 3), 'y': cy + rng.normal(0, 3),
+                             'w': 36 + rng.normal(0, 2), 'h': 52 + rng.normal(0, 2)},
+                })
+        records.append({'image': f'synthetic-{n}', 'detections': detections})
+    return records
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def run_benchmark(records, class_table, repeat=5):
+    """Time both implementations on the records and check their hands match."""
+    results = [record_to_result(r, class_table) for r in records]
+    boxes = sum(len(r['scores']) for r in results)
+
+    js_time, js_hands = _time(
+        lambda: [js_remove_duplicate_detections(r['detections']) for r in records], repeat)
+    np_time, np_hands = _time(
+        lambda: [remove_duplicates(r, class_table) for r in results], repeat)
+    batched_time, batched_hands = _time(lambda: remove_duplicates_batch(results, class_table), repeat)
+
+    mismatches = [rec['image'] for rec, a, b, c in zip(records, js_hands, np_hands, batched_hands)
+                  if not a == b == c]
+    return {
+        'images': len(records),
+        'boxes': boxes,
+        'js_port_ms': js_time * 1000,
+        'numpy_ms': np_time * 1000,
+        'numpy_batched_ms': batched_time * 1000,
+        'speedup': js_time / np_time if np_time else float('inf'),
+        'batched_speedup': js_time / batched_time if batched_time else float('inf'),
+        'mismatches': mismatches,
+    }
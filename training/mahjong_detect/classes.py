@@ -0,0 +1,70 @@
+"""
+Detector class table, read from the model's metadata.yaml.
+"""
+
+import os
+
+import yaml
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'public', 'models',
+                             'mahjong-detector', 'metadata.yaml')
+
+SUITS = {'B': 'sticks', 'C': 'man', 'D': 'dots'}
+FLOWERS = {1: 'plum', 2: 'orchid', 3: 'mum', 4: 'bamboo'}
+SEASONS = {1: 'spring', 2: 'summer', 3: 'autumn', 4: 'winter'}
+HONOURS = {
+    'EW': ('winds', 'east'),
+    'SW': ('winds', 'south'),
+    'WW': ('winds', 'west'),
+    'NW': ('winds', 'north'),
+    'RD': ('dragons', 'red'),
+    'GD': ('dragons', 'green'),
+    'WD': ('dragons', 'white'),
+}
+
+
+def class_to_tile(class_name):
+    """
+    Convert a model class name ('1B', 'EW', ...) to the web app's tile
+    dict, like classToTile in tileDetection.js. Returns None if unknown.
+    """
+    if len(class_name) == 2 and class_name[0].isdigit():
+        num, kind = int(class_name[0]), class_name[1]
+        if kind in SUITS and 1 <= num <= 9:
+            return {'type': SUITS[kind], 'value': num, 'concealed': True}
+        if kind == 'F' and num in FLOWERS:
+            return {'type': 'flowers', 'value': FLOWERS[num], 'concealed': True}
+        if kind == 'S' and num in SEASONS:
+            return {'type': 'seasons', 'value': SEASONS[num], 'concealed': True}
+    if class_name in HONOURS:
+        tile_type, value = HONOURS[class_name]
+        return {'type': tile_type, 'value': value, 'concealed': True}
+    return None
+
+
+class ClassTable:
+    """Class names of the detector plus the input size it was exported with."""
+
+    def __init__(self, names, imgsz=(640, 640)):
+        self.names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+        self.imgsz = tuple(imgsz)
+        self.tiles = [class_to_tile(name) for name in self.names]
+
+    def __len__(self):
+        return len(self.names)
+
+    def name(self, class_id):
+        return self.names[class_id]
+
+    def tile(self, class_id):
+        return self.tiles[class_id]
+
+
+def load_class_table(path=METADATA_PATH):
+    """Read names and imgsz from an ultralytics metadata.yaml (or a data.yaml)."""
+    with open(path) as f:
+        metadata = yaml.safe_load(f)
+    imgsz = metadata.get('imgsz', 640)
+    if isinstance(imgsz, int):
+        imgsz = (imgsz, imgsz)
+    return ClassTable(metadata['names'], imgsz)
@@ -0,0 +1,151 @@
+"""
+Command line entry point: python -m mahjong_detect <command> ...
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .classes import METADATA_PATH, load_class_table
+from .nms import IOU_THRESHOLD, remove_duplicates
+from .postprocess import decode_output, to_tiles
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def collect_images(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in sorted(files)
+                             if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.append(item)
+    return sorted(paths)
+
+
+def _record(name, result, class_table, iou_threshold=IOU_THRESHOLD):
+    return {
+        'image': name,
+        'max_score': result['max_score'],
+        'detections': result['tiles'],
+        'hand': remove_duplicates(result, class_table, iou_threshold),
+    }
+
+
+def cmd_detect(args):
+    from .detector import Detector
+
+    paths = collect_images(args.images)
+    if not paths:
+        print("❌ No images found")
+        return 1
+
+    table = load_class_table(args.metadata)
+    detector = Detector(args.model, table,
+                        conf_threshold=args.conf, threads=args.threads)
+    print(f"🔍 Detecting tiles in {len(paths)} images with {args.model}")
+
+    start = time.perf_counter()
+    total = 0
+    with open(args.output, 'w') as out:
+        for path, result in detector.detect_files(paths, args.batch_size):
+            total += len(result['tiles'])
+            for tile, box in zip(result['tiles'], result['image_boxes'].tolist()):
+                tile['image_bbox'] = dict(zip('xywh', box))
+            out.write(json.dumps(_record(path, result, table, args.iou)) + '\n')
+    elapsed = time.perf_counter() - start
+
+    t = detector.timings
+    print(f"✅ {total} raw detections in {elapsed:.1f}s ({len(paths) / elapsed:.1f} images/s): {args.output}")
+    print(f"   preprocess {t['preprocess']:.2f}s, inference {t['inference']:.2f}s, "
+          f"postprocess {t['postprocess']:.3f}s")
+    return 0
+
+
+def cmd_decode(args):
+    """Decode a raw output tensor saved as .npy (e.g. dumped from the browser)."""
+    table = load_class_table(args.metadata)
+    output = np.load(args.output_tensor)
+    for b, result in enumerate(decode_output(output, args.conf)):
+        result['tiles'] = to_tiles(result, table)
+        print(json.dumps(_record(f'{args.output_tensor}[{b}]', result, table, args.iou)))
+    return 0
+
+
+def cmd_bench_nms(args):
+    from .benchmark import load_recorded, run_benchmark, synthetic_records
+
+    table = load_class_table(args.metadata)
+    records = load_recorded(args.detections) if args.detections else synthetic_records(table)
+    report = run_benchmark(records, table, args.repeat)
+
+    print(f"⏱️  {report['images']} images, {report['boxes']} boxes (best of {args.repeat})")
+    print(f"   JS algorithm (Python port): {report['js_port_ms']:9.2f} ms")
+    print(f"   NumPy, one image per call:  {report['numpy_ms']:9.2f} ms  ({report['speedup']:.1f}x)")
+    print(f"   NumPy, all images batched:  {report['numpy_batched_ms']:9.2f} ms  ({report['batched_speedup']:.1f}x)")
+    if report['mismatches']:
+        print(f"❌ Hands differ for {len(report['mismatches'])} images: {report['mismatches'][:5]}")
+    else:
+        print("✅ Identical hands for every image")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved: {args.report}")
+    return 1 if report['mismatches'] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='mahjong_detect',
+        description='Run the exported YOLOv8 tile detector offline'
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    detect = sub.add_parser('detect', help='Detect tiles in images or folders of images')
+    detect.add_argument('images', nargs='+', help='Image files or folders')
+    detect.add_argument('--model', required=True,
+                        help='Exported detector: .onnx, .tflite or a SavedModel directory')
+    detect.add_argument('--metadata', default=METADATA_PATH,
+                        help='metadata.yaml with the class names')
+    detect.add_argument('--conf', type=float, default=0.15,
+                        help='Score threshold (the web app uses 0.15)')
+    detect.add_argument('--batch-size', type=int, default=8)
+    detect.add_argument('--threads', type=int, help='Inference threads')
+    detect.add_argument('--iou', type=float, default=IOU_THRESHOLD,
+                        help='IoU threshold for duplicate removal')
+    detect.add_argument('--output', default='detections.jsonl')
+    detect.set_defaults(func=cmd_detect)
+
+    decode = sub.add_parser('decode', help='Decode a saved [B, 46, 8400] output tensor')
+    decode.add_argument('output_tensor', help='.npy file')
+    decode.add_argument('--metadata', default=METADATA_PATH)
+    decode.add_argument('--conf', type=float, default=0.15)
+    decode.add_argument('--iou', type=float, default=IOU_THRESHOLD)
+    decode.set_defaults(func=cmd_decode)
+
+    bench = sub.add_parser('bench-nms',
+                           help='Time NumPy NMS against the browser algorithm on recorded detections')
+    bench.add_argument('detections', nargs='?',
+                       help='JSONL written by detect (synthetic detections if omitted)')
+    bench.add_argument('--metadata', default=METADATA_PATH)
+    bench.add_argument('--repeat', type=int, default=5)
+    bench.add_argument('--report', help='Write the timings as JSON here')
+    bench.set_defaults(func=cmd_bench_nms)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
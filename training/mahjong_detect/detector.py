@@ -0,0 +1,162 @@
+"""
+CPU inference for the exported YOLOv8 detector.
+
+The backend is picked from the model path:
+
+- *.onnx                  onnxruntime (CPUExecutionProvider)
+- *.tflite                tflite_runtime, or tf.lite if TensorFlow is installed
+- a SavedModel directory  tf.saved_model
+
+Each backend exposes max_batch (1 for the default batch=1 exports) and
+run(batch) -> [B, 46, 8400] NumPy array. The TF.js graph model in
+public/models cannot be run from Python; export one of the formats above
+from the same best.pt (yolo export format=onnx|tflite|saved_model).
+"""
+
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from .classes import load_class_table
+from .postprocess import decode_output, letterbox, to_tiles, unletterbox
+
+
+def _static_batch(shape):
+    dim = shape[0] if shape else None
+    return dim if isinstance(dim, int) and dim > 0 else None
+
+
+class OnnxBackend:
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # ultralytics ONNX exports are NCHW
+        self.channels_first = len(inp.shape) == 4 and inp.shape[1] == 3
+        self.max_batch = _static_batch(inp.shape)
+        self.box_scale = 1.0
+
+    def run(self, batch):
+        if self.channels_first:
+            batch = batch.transpose(0, 3, 1, 2)
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(batch)})[0]
+
+
+class TFLiteBackend:
+    def __init__(self, path, threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=path, num_threads=threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.max_batch = int(self.input['shape'][0])
+        # TFLite exports emit boxes normalized by the input size
+        self.box_scale = float(self.input['shape'][1])
+
+    def run(self, batch):
+        scale, zero_point = self.input.get('quantization', (0.0, 0))
+        if scale:
+            batch = np.round(batch / scale + zero_point)
+        self.interpreter.set_tensor(self.input['index'], batch.astype(self.input['dtype']))
+        self.interpreter.invoke()
+        out = self.interpreter.get_tensor(self.output['index'])
+        scale, zero_point = self.output.get('quantization', (0.0, 0))
+        if scale:
+            out = (out.astype(np.float32) - zero_point) * scale
+        return out
+
+
+class SavedModelBackend:
+    def __init__(self, path, threads=None):
+        import tensorflow as tf
+
+        if threads:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+        self.tf = tf
+        self.fn = tf.saved_model.load(path).signatures['serving_default']
+        spec = next(iter(self.fn.structured_input_signature[1].values()))
+        self.max_batch = _static_batch(spec.shape.as_list())
+        self.box_scale = 1.0
+
+    def run(self, batch):
+        outputs = self.fn(self.tf.constant(batch))
+        return next(iter(outputs.values())).numpy()
+
+
+def load_backend(model_path, threads=None):
+    if os.path.isdir(model_path):
+        return SavedModelBackend(model_path, threads)
+    ext = os.path.splitext(model_path)[1].lower()
+    if ext == '.onnx':
+        return OnnxBackend(model_path, threads)
+    if ext == '.tflite':
+        return TFLiteBackend(model_path, threads)
+    raise ValueError(f"Unsupported model format: {model_path} (expected .onnx, .tflite or a SavedModel dir)")
+
+
+def load_image(path):
+    """RGB uint8 array, with EXIF orientation applied like the browser does."""
+    with Image.open(path) as image:
+        return np.asarray(ImageOps.exif_transpose(image).convert('RGB'))
+
+
+class Detector:
+    """
+    Letterbox -> model -> vectorized decode, the offline twin of
+    detectTilesFromImage (before duplicate removal).
+    """
+
+    def __init__(self, model_path, class_table=None, conf_threshold=0.15, threads=None):
+        self.class_table = class_table or load_class_table()
+        self.conf_threshold = conf_threshold
+        self.backend = load_backend(model_path, threads)
+        self.size = self.class_table.imgsz[0]
+        self.timings = {'preprocess': 0.0, 'inference': 0.0, 'postprocess': 0.0}
+
+    def predict(self, batch):
+        """Raw [B, 46, 8400] output for a [B, size, size, 3] float32 batch."""
+        step = self.backend.max_batch or len(batch)
+        outputs = [self.backend.run(batch[i:i + step]) for i in range(0, len(batch), step)]
+        return np.concatenate(outputs, axis=0)
+
+    def detect(self, images):
+        """
+        Detect tiles in a list of HxWx3 uint8 images.
+
+        Returns one dict per image: the decode_output arrays (boxes in
+        model input pixels), 'image_boxes' (boxes in original image
+        pixels) and 'tiles' (the web app's detection dicts).
+        """
+        start = time.perf_counter()
+        prepared = [letterbox(image, self.size) for image in images]
+        batch = np.stack([inp for inp, _ in prepared])
+        self.timings['preprocess'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        output = self.predict(batch)
+        self.timings['inference'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = decode_output(output, self.conf_threshold, self.backend.box_scale)
+        for result, (_, meta) in zip(results, prepared):
+            result['image_boxes'] = unletterbox(result['boxes'], meta)
+            result['tiles'] = to_tiles(result, self.class_table)
+        self.timings['postprocess'] += time.perf_counter() - start
+        return results
+
+    def detect_files(self, paths, batch_size=8):
+        """Yield (path, result) for image files, batch_size images at a time."""
+        for i in range(0, len(paths), batch_size):
+            chunk = paths[i:i + batch_size]
+            yield from zip(chunk, self.detect([load_image(p) for p in chunk]))
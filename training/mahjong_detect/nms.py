@@ -0,0 +1,258 @@
+"""
+Non-maximum suppression and hand selection on NumPy box arrays.
+
+Boxes are [n, 4] centre x, y, w, h, as decode_output returns them.
+
+- nms: greedy (or soft) NMS for one image, agnostic or per class. Each
+  kept box suppresses the rest with one vectorized IoU row, so the cost
+  is O(kept x n) array work instead of a Python double loop.
+- batched_nms: many images (and, optionally, classes) in one call. All
+  image/class groups run their greedy steps together on a padded grid.
+- select_tiles: reading-order sort, the 4-per-tile cap and the 22-tile
+  cutoff of removeDuplicateDetections, done together on index arrays.
+- remove_duplicates / remove_duplicates_batch: the whole browser routine
+  (agnostic NMS at IoU 0.65, then select_tiles) on decode_output results.
+"""
+
+import numpy as np
+
+IOU_THRESHOLD = 0.65
+MAX_PER_TILE = 4
+MAX_TILES = 22
+
+
+def to_corners(boxes):
+    """[n, 4] centre x, y, w, h -> [n, 5] x1, y1, x2, y2, area."""
+    boxes = np.asarray(boxes, dtype=np.float64)
+    half = boxes[:, 2:4] / 2
+    return np.concatenate([boxes[:, :2] - half, boxes[:, :2] + half,
+                           (boxes[:, 2] * boxes[:, 3])[:, None]], axis=1)
+
+
+def iou(box, boxes):
+    """IoU of one to_corners row against [n, 5] to_corners rows."""
+    w = np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0])
+    h = np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1])
+    inter = np.where((w > 0) & (h > 0), w * h, 0.0)
+    union = box[4] + boxes[:, 4] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise [n, m] IoU of two centre-format box arrays."""
+    a, b = to_corners(boxes_a), to_corners(boxes_b)
+    w = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    h = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.where((w > 0) & (h > 0), w * h, 0.0)
+    union = a[:, None, 4] + b[None, :, 4] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _greedy_one(corners, scores, iou_threshold):
+    """Greedy NMS of a single group: one IoU row per kept box."""
+    # Stable sorts keep equal scores in input order, like Array.prototype.sort
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        order = rest[iou(corners[i], corners[rest]) <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _greedy(corners, scores, groups, iou_threshold):
+    """
+    Greedy NMS of every group in lockstep. Boxes are laid out as a padded
+    [groups, boxes] grid sorted best-first per group; each step keeps the
+    best live box of every group and suppresses its overlaps within the
+    group, so the loop runs (most boxes kept by one group) times.
+    """
+    order = np.lexsort((-scores, groups))
+    _, starts, counts = np.unique(groups[order], return_index=True, return_counts=True)
+    row = np.repeat(np.arange(len(starts)), counts)
+    col = np.arange(len(order)) - np.repeat(starts, counts)
+
+    grid = np.zeros((len(starts), counts.max(), corners.shape[1]))
+    grid[row, col] = corners[order]
+    alive = np.zeros(grid.shape[:2], dtype=bool)
+    alive[row, col] = True
+    kept = np.zeros_like(alive)
+
+    while True:
+        rows = np.flatnonzero(alive.any(axis=1))
+        if not rows.size:
+            break
+        best = alive[rows].argmax(axis=1)
+        kept[rows, best] = True
+        alive[rows, best] = False
+
+        box, others = grid[rows, best][:, None, :], grid[rows]
+        w = np.minimum(box[..., 2], others[..., 2]) - np.maximum(box[..., 0], others[..., 0])
+        h = np.minimum(box[..., 3], others[..., 3]) - np.maximum(box[..., 1], others[..., 1])
+        inter = np.where((w > 0) & (h > 0), w * h, 0.0)
+        union = box[..., 4] + others[..., 4] - inter
+        overlap = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        alive[rows] &= overlap <= iou_threshold
+
+    return order[kept[row, col]]
+
+
+def _soft(corners, scores, iou_threshold, sigma, score_threshold, method):
+    scores = scores.astype(np.float64)
+    remaining = np.arange(len(scores))
+    keep = []
+    while remaining.size:
+        top = np.argmax(scores[remaining])
+        i = remaining[top]
+        keep.append(i)
+        remaining = np.delete(remaining, top)
+        if not remaining.size:
+            break
+        overlap = iou(corners[i], corners[remaining])
+        if method == 'gaussian':
+            decay = np.exp(-(overlap ** 2) / sigma)
+        else:
+            decay = np.where(overlap > iou_threshold, 1.0 - overlap, 1.0)
+        scores[remaining] *= decay
+        remaining = remaining[scores[remaining] > score_threshold]
+    return np.asarray(keep, dtype=np.int64), scores
+
+
+def _grouped_nms(boxes, scores, groups, iou_threshold, soft, sigma, score_threshold):
+    """Keep indices (best first) and final scores for boxes split into groups."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(boxes):
+        return np.zeros(0, dtype=np.int64), scores
+    corners = to_corners(boxes)
+
+    if soft:
+        keep, decayed = [], scores.copy()
+        for group in np.unique(groups):
+            members = np.flatnonzero(groups == group)
+            k, s = _soft(corners[members], scores[members], iou_threshold, sigma,
+                         score_threshold, soft)
+            keep.append(members[k])
+            decayed[members] = s
+        keep = np.concatenate(keep)
+        scores = decayed
+    elif (groups == groups[0]).all():
+        keep = _greedy_one(corners, scores, iou_threshold)
+    else:
+        keep = _greedy(corners, scores, groups, iou_threshold)
+
+    keep = keep[np.argsort(-scores[keep], kind='stable')]
+    return keep, scores[keep]
+
+
+def nms(boxes, scores, iou_threshold=IOU_THRESHOLD, class_ids=None, soft=None,
+        sigma=0.5, score_threshold=0.001):
+    """
+    NMS for one image. Returns (keep, scores): indices of the kept boxes,
+    best first, and their (for soft-NMS, decayed) scores.
+
+    With class_ids, boxes only suppress boxes of the same class; without,
+    suppression is class-agnostic like the web app. soft='linear' or
+    'gaussian' decays overlapping scores instead of dropping them and
+    discards boxes that fall to score_threshold or below.
+    """
+    groups = np.zeros(len(scores), dtype=np.int64) if class_ids is None else np.asarray(class_ids)
+    return _grouped_nms(boxes, scores, groups, iou_threshold, soft, sigma, score_threshold)
+
+
+def batched_nms(results, iou_threshold=IOU_THRESHOLD, per_class=False, soft=None,
+                sigma=0.5, score_threshold=0.001):
+    """
+    NMS over a list of decode_output results (one per image) in one call.
+
+    Returns a list of (keep, scores) pairs like nms, one per image.
+    """
+    sizes = [len(r['scores']) for r in results]
+    image_ids = np.repeat(np.arange(len(results)), sizes)
+    if not sum(sizes):
+        return [(np.zeros(0, dtype=np.int64), np.zeros(0)) for _ in results]
+
+    boxes = np.concatenate([r['boxes'] for r in results])
+    scores = np.concatenate([r['scores'] for r in results])
+    groups = image_ids
+    if per_class:
+        class_ids = np.concatenate([r['class_ids'] for r in results])
+        groups = image_ids * (int(class_ids.max()) + 1) + class_ids
+
+    keep, kept_scores = _grouped_nms(boxes, scores, groups, iou_threshold, soft, sigma,
+                                     score_threshold)
+    starts = np.cumsum([0] + sizes)
+    kept_images = image_ids[keep]
+    return [(keep[kept_images == b] - starts[b], kept_scores[kept_images == b])
+            for b in range(len(results))]
+
+
+def select_tiles(boxes, class_ids, max_per_tile=MAX_PER_TILE, max_tiles=MAX_TILES):
+    """
+    Indices of the boxes that make the hand, in reading order.
+
+    Reading order is left to right, or top to bottom when the boxes are
+    spread further vertically. Walking that order, each tile class keeps
+    at most max_per_tile boxes and the first max_tiles survivors are
+    returned. Input boxes should be best-first (NMS order): ties in
+    position keep that order.
+    """
+    boxes = np.asarray(boxes)
+    class_ids = np.asarray(class_ids)
+    n = len(class_ids)
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+
+    x_spread = np.ptp(boxes[:, 0])
+    y_spread = np.ptp(boxes[:, 1])
+    order = np.argsort(boxes[:, 1] if y_spread > x_spread else boxes[:, 0], kind='stable')
+
+    # Occurrence number of each box within its class, in reading order
+    keys = class_ids[order]
+    grouped = np.lexsort((np.arange(n), keys))
+    starts = np.flatnonzero(np.r_[True, np.diff(keys[grouped]) != 0])
+    counts = np.diff(np.r_[starts, n])
+    rank = np.empty(n, dtype=np.int64)
+    rank[grouped] = np.arange(n) - np.repeat(starts, counts)
+
+    return order[rank < max_per_tile][:max_tiles]
+
+
+def _known(result, class_table):
+    """The result restricted to classes that map to a tile (the browser drops the rest)."""
+    known = np.array([class_table.tile(c) is not None for c in result['class_ids'].tolist()], dtype=bool)
+    return {key: result[key][known] for key in ('boxes', 'scores', 'class_ids')}
+
+
+def _hand(class_ids, class_table):
+    tiles = []
+    for class_id in class_ids.tolist():
+        tile = class_table.tile(class_id)
+        tiles.append({'type': tile['type'], 'value': tile['value'], 'concealed': True})
+    return tiles
+
+
+def remove_duplicates(result, class_table, iou_threshold=IOU_THRESHOLD,
+                      max_per_tile=MAX_PER_TILE, max_tiles=MAX_TILES):
+    """
+    removeDuplicateDetections for one decode_output result: the final
+    hand as [{type, value, concealed}] in reading order.
+    """
+    result = _known(result, class_table)
+    keep, _ = nms(result['boxes'], result['scores'], iou_threshold)
+    chosen = keep[select_tiles(result['boxes'][keep], result['class_ids'][keep],
+                               max_per_tile, max_tiles)]
+    return _hand(result['class_ids'][chosen], class_table)
+
+
+def remove_duplicates_batch(results, class_table, iou_threshold=IOU_THRESHOLD,
+                            max_per_tile=MAX_PER_TILE, max_tiles=MAX_TILES):
+    """remove_duplicates for many images, with one batched_nms call for all of them."""
+    results = [_known(r, class_table) for r in results]
+    hands = []
+    for result, (keep, _) in zip(results, batched_nms(results, iou_threshold)):
+        chosen = keep[select_tiles(result['boxes'][keep], result['class_ids'][keep],
+                                   max_per_tile, max_tiles)]
+        hands.append(_hand(result['class_ids'][chosen], class_table))
+    return hands
@@ -0,0 +1,130 @@
+"""
+YOLOv8 pre- and post-processing in NumPy.
+
+The exported detector takes a [1, 640, 640, 3] float image in [0, 1] and
+returns [1, 46, 8400]: rows 0-3 are box centre x, y, width and height in
+input pixels, rows 4-45 are the 42 class probabilities (sigmoid already
+applied). decode_output reads that feature-major layout directly: one
+argmax over the class axis and one threshold mask per batch, with no
+loop over anchors or classes.
+"""
+
+import math
+
+import numpy as np
+
+PAD_VALUE = 114
+
+
+def _js_round(x):
+    """Math.round: halves round up, unlike Python's round()."""
+    return int(math.floor(x + 0.5))
+
+
+def resize_bilinear(image, height, width):
+    """
+    Bilinear resize matching tf.image.resizeBilinear in TF.js with its
+    defaults (alignCorners=false, halfPixelCenters=false), so the result
+    is the same as the browser's input tensor. Returns float32.
+    """
+    image = np.asarray(image, dtype=np.float32)
+    in_h, in_w = image.shape[:2]
+
+    ys = np.arange(height, dtype=np.float32) * (in_h / height)
+    xs = np.arange(width, dtype=np.float32) * (in_w / width)
+    y0 = np.floor(ys).astype(np.int64)
+    x0 = np.floor(xs).astype(np.int64)
+    y1 = np.minimum(y0 + 1, in_h - 1)
+    x1 = np.minimum(x0 + 1, in_w - 1)
+    dy = (ys - y0)[:, None, None]
+    dx = (xs - x0)[None, :, None]
+
+    top = image[y0][:, x0] * (1 - dx) + image[y0][:, x1] * dx
+    bottom = image[y1][:, x0] * (1 - dx) + image[y1][:, x1] * dx
+    return top * (1 - dy) + bottom * dy
+
+
+def letterbox(image, size=640):
+    """
+    Scale an HxWx3 image to fit size x size keeping its aspect ratio and
+    pad the rest with grey 114, as preprocessImage in tileDetection.js.
+
+    Returns (input, meta): a float32 [size, size, 3] array in [0, 1] and
+    the scale/padding needed to map boxes back to the original image.
+    """
+    orig_h, orig_w = image.shape[:2]
+    scale = min(size / orig_w, size / orig_h)
+    new_w, new_h = _js_round(orig_w * scale), _js_round(orig_h * scale)
+    pad_top = (size - new_h) // 2
+    pad_left = (size - new_w) // 2
+
+    out = np.full((size, size, 3), PAD_VALUE, dtype=np.float32)
+    out[pad_top:pad_top + new_h, pad_left:pad_left + new_w] = resize_bilinear(image[..., :3], new_h, new_w)
+    out /= 255.0
+
+    meta = {'scale': scale, 'pad_left': pad_left, 'pad_top': pad_top,
+            'width': orig_w, 'height': orig_h}
+    return out, meta
+
+
+def decode_output(output, conf_threshold=0.25, box_scale=1.0):
+    """
+    Decode a [B, 4 + C, N] (or [4 + C, N]) YOLOv8 output.
+
+    Each anchor gets its highest-scoring class; anchors whose score is
+    above conf_threshold are kept. box_scale multiplies the box rows
+    (TFLite exports emit boxes normalized to [0, 1]; pass the input size).
+
+    Returns one dict per image with 'boxes' ([n, 4] centre x, y, w, h),
+    'scores', 'class_ids', 'anchors' (anchor index of each box) and
+    'max_score' (the best score over all anchors, kept or not).
+    """
+    out = np.asarray(output, dtype=np.float32)
+    if out.ndim == 2:
+        out = out[None]
+
+    scores = out[:, 4:, :]
+    class_ids = scores.argmax(axis=1)
+    best = np.take_along_axis(scores, class_ids[:, None, :], axis=1)[:, 0, :]
+    keep = best > conf_threshold
+
+    results = []
+    for b in range(out.shape[0]):
+        anchors = np.flatnonzero(keep[b])
+        results.append({
+            'boxes': out[b][:4, anchors].T * box_scale,
+            'scores': best[b, anchors],
+            'class_ids': class_ids[b, anchors],
+            'anchors': anchors,
+            'max_score': float(best[b].max()) if best.shape[1] else 0.0,
+        })
+    return results
+
+
+def unletterbox(boxes, meta):
+    """Map [n, 4] centre x, y, w, h boxes from model input to original image pixels."""
+    boxes = np.array(boxes, dtype=np.float32, copy=True)
+    boxes[:, 0] -= meta['pad_left']
+    boxes[:, 1] -= meta['pad_top']
+    boxes /= meta['scale']
+    return boxes
+
+
+def to_tiles(result, class_table):
+    """
+    The decoded detections as the web app's tile dicts (type, value,
+    concealed, confidence, className, bbox), like postprocessDetections.
+    """
+    tiles = []
+    for (x, y, w, h), score, class_id in zip(result['boxes'].tolist(), result['scores'].tolist(),
+                                             result['class_ids'].tolist()):
+        tile = class_table.tile(class_id)
+        if tile is None:
+            continue
+        tiles.append({
+            **tile,
+            'confidence': score,
+            'className': class_table.name(class_id),
+            'bbox': {'x': x, 'y': y, 'w': w, 'h': h},
+        })
+    return tiles
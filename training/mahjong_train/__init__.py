@@ -0,0 +1,17 @@
+"""
+Shared training library for the mahjong tile classifier.
+
+One MobileNetV2 two-phase pipeline (frozen backbone, then fine-tuning)
+with pluggable dataset sources and a TensorFlow.js export step. Run it
+headless with:
+
+    python -m mahjong_train train --source camerash --path ./mahjong-dataset/
+
+TensorFlow is only imported by the modules that need it (data, model,
+pipeline), so importing the package and the dataset tools stays cheap.
+"""
+
+from .config import TrainConfig
+from .sources import SOURCES, DatasetSource, get_source
+
+__all__ = ['TrainConfig', 'SOURCES', 'DatasetSource', 'get_source']
@@ -0,0 +1,506 @@
+"""
+Command line entry point: python -m mahjong_train <command> ...
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .config import TrainConfig, YoloTrainConfig
+from .organize import LINK_MODES
+from .quantize import VARIANTS as QUANT_VARIANTS
+from .sampling import BALANCE_MODES
+from .sources import SOURCES, get_source
+
+
+def add_fetch_args(parser):
+    parser.add_argument('--dataset-cache',
+                        help='Content-addressed archive cache (default: ~/.cache/mahjong_train/datasets)')
+    parser.add_argument('--mirror', help='Read-only cache copy to take archives from before the network')
+    parser.add_argument('--offline', action='store_true',
+                        help='Never download; use only the cache and --mirror')
+    parser.add_argument('--verify', action='store_true',
+                        help='Re-hash cached archives instead of only checking their size')
+
+
+def dataset_cache(args):
+    from .fetch import DatasetCache
+
+    return DatasetCache(args.dataset_cache, args.mirror, args.offline or None)
+
+
+def resolve_path(args, path, layout):
+    """path itself, or the local copy of a dataset spec (roboflow:..., kaggle:..., camerash)."""
+    from .fetch import fetch_dataset, is_spec
+
+    if not is_spec(path):
+        return path
+    return fetch_dataset(path, dataset_cache(args), layout=layout, verify=args.verify)
+
+
+def add_train_args(parser):
+    defaults = TrainConfig()
+    parser.add_argument('--source', choices=sorted(SOURCES), default='folder',
+                        help='Dataset layout at --path')
+    parser.add_argument('--path', required=True,
+                        help='Dataset folder or zip for the chosen source, or a dataset spec '
+                             '(roboflow:ws/project/version, kaggle:owner/name, camerash, URL)')
+    add_fetch_args(parser)
+    parser.add_argument('--work-dir', default=defaults.work_dir,
+                        help='Scratch space for extracted/organized data and caches')
+    parser.add_argument('--output-dir', default=defaults.output_dir,
+                        help='Where the model, class mapping and logs are written')
+    parser.add_argument('--img-size', type=int, default=defaults.img_size)
+    parser.add_argument('--batch-size', type=int, default=defaults.batch_size)
+    parser.add_argument('--epochs', type=int, default=defaults.epochs)
+    parser.add_argument('--fine-tune-epochs', type=int, default=defaults.fine_tune_epochs)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Decode images from disk every epoch instead of using the cache')
+    parser.add_argument('--export-tfjs', metavar='DIR',
+                        help='Convert the trained model to TF.js into DIR')
+    parser.add_argument('--fast', action='store_true',
+                        help='Mixed precision (where the GPU supports it) and XLA compilation')
+    parser.add_argument('--feature-cache', action='store_true',
+                        help='Phase 1: run the frozen backbone once and train only the head on cached features')
+    parser.add_argument('--feature-augment-copies', type=int, default=defaults.feature_augment_copies,
+                        help='Fixed augmented copies per image to add to the feature cache')
+    parser.add_argument('--balance', choices=BALANCE_MODES, default=defaults.balance,
+                        help='Oversample rare classes each epoch, or reweight their loss')
+    parser.add_argument('--balance-power', type=float, default=defaults.balance_power,
+                        help='0 keeps the natural class mix, 1 weights every class equally')
+
+
+def config_from_args(args):
+    return TrainConfig(
+        img_size=args.img_size,
+        batch_size=args.batch_size,
+        epochs=args.epochs,
+        fine_tune_epochs=args.fine_tune_epochs,
+        seed=args.seed,
+        work_dir=args.work_dir,
+        output_dir=args.output_dir,
+        cache=not args.no_cache,
+        fast=args.fast,
+        feature_cache=args.feature_cache,
+        feature_augment_copies=args.feature_augment_copies,
+        balance=args.balance,
+        balance_power=args.balance_power,
+    )
+
+
+def cmd_train(args):
+    from .export import export_tfjs
+    from .pipeline import run_training
+
+    print("🀄 Mahjong Tile Detector Training")
+    print("=" * 50)
+
+    path = resolve_path(args, args.path, 'zip' if args.source == 'yolo-zip' else 'dir')
+    source = get_source(args.source, path, args.work_dir)
+    print(f"📥 Preparing dataset ({source.name}): {path}")
+    data_dir = source.prepare()
+
+    result = run_training(data_dir, config_from_args(args))
+
+    if args.export_tfjs:
+        print(f"🔄 Converting to TensorFlow.js: {args.export_tfjs}")
+        export_tfjs(result['model_path'], args.export_tfjs, result['mapping_path'])
+        print("✅ Model converted successfully!")
+    else:
+        print("📦 Next step:")
+        print(f"   python -m mahjong_train export {result['model_path']} "
+              f"--mapping {result['mapping_path']}")
+    return 0
+
+
+def cmd_compare_precision(args):
+    from .precision import compare_precision
+
+    path = resolve_path(args, args.path, 'zip' if args.source == 'yolo-zip' else 'dir')
+    source = get_source(args.source, path, args.work_dir)
+    data_dir = source.prepare()
+    compare_precision(data_dir, config_from_args(args), epochs=args.epochs,
+                      steps_per_epoch=args.steps_per_epoch, report_path=args.report)
+    return 0
+
+
+def cmd_export(args):
+    from .export import export_tfjs
+
+    print(f"🔄 Converting {args.model} to TensorFlow.js...")
+    export_tfjs(args.model, args.output_dir, args.mapping)
+    print(f"✅ Model converted successfully: {args.output_dir}")
+    return 0
+
+
+def cmd_quantize(args):
+    from .quantize import quantize_and_select
+
+    report = quantize_and_select(
+        args.model, args.mapping, args.eval_dir, args.output_dir,
+        tolerance=args.tolerance, variants=args.variants,
+        deploy_dir=args.deploy, img_size=args.img_size, node=args.node
+    )
+    return 0 if report['chosen'] else 1
+
+
+def cmd_organize(args):
+    from .organize import organize_dataset
+
+    print(f"📋 Organizing {args.csv} into {args.output_dir} ({args.mode})...")
+    manifest = organize_dataset(args.csv, args.images, args.output_dir,
+                                mode=args.mode, workers=args.workers)
+    print(f"📄 Manifest: {manifest}")
+    return 0
+
+
+def cmd_extract_yolo(args):
+    from .zipstream import ZipDatasetIndex
+
+    index = ZipDatasetIndex(args.zip)
+    for split, counts in index.summary().items():
+        print(f"   {split}: {counts['labelled']} labelled / {counts['images']} images")
+
+    splits = ('train', 'val', 'test') if args.include_test else ('train', 'val')
+    data_yaml, report = index.materialize(args.dest, splits=splits, workers=args.workers)
+    print(f"✅ Extracted {report['extracted']} of {report['members_total']} members "
+          f"({report['skipped']} already present) in {report['seconds']:.1f}s")
+    for problem in report['problems']:
+        print(f"   ⚠️  {problem}")
+    print(f"📄 data.yaml: {data_yaml}")
+    return 1 if report['problems'] and args.strict else 0
+
+
+def balance_yolo_dataset(root, args, output=None):
+    """Write the repeat-factor train list of a YOLO dataset; returns its data.yaml."""
+    from .labelindex import LabelIndex, dataset_class_names
+    from .sampling import write_balanced_yolo
+
+    index = LabelIndex.build(root)
+    data_yaml, report = write_balanced_yolo(
+        index, output or os.path.join(root, 'balanced'), threshold=args.repeat_threshold,
+        power=args.balance_power, seed=args.seed, stratify=args.stratify_val,
+        validation_split=args.val_split, names=dataset_class_names(root),
+    )
+    print(f"⚖️  {report['train_images']} training images -> {report['train_entries']} entries "
+          f"per epoch (max repeat {report['max_repeat']:.1f}), {report['val_images']} validation "
+          f"images{' (re-stratified)' if report['stratified'] else ''}")
+    return data_yaml, report
+
+
+def add_balance_yolo_args(parser):
+    parser.add_argument('--repeat-threshold', type=float, default=0.1,
+                        help='Classes in fewer than this fraction of images are repeated')
+    parser.add_argument('--balance-power', type=float, default=0.5,
+                        help='Repeat factor is (threshold / image frequency) ** power')
+    parser.add_argument('--stratify-val', action='store_true',
+                        help='Re-split train/val so every class keeps --val-split of its images')
+    parser.add_argument('--val-split', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def cmd_balance_yolo(args):
+    root = resolve_path(args, args.dataset, 'dir')
+    data_yaml, report = balance_yolo_dataset(root, args, args.output)
+    print(f"   {'class':6s} {'images':>7s} {'sampled':>8s} {'val':>6s}")
+    for name, row in report['classes'].items():
+        print(f"   {name:6s} {row['train_images']:7d} {row['sampled']:8d} {row['val_images']:6d}")
+    print(f"📄 data.yaml: {data_yaml}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved: {args.report}")
+    return 0
+
+
+def cmd_train_yolo(args):
+    from .yolo import train_yolo
+
+    print("🀄 Mahjong Tile Detector Training (YOLOv8)")
+    print("=" * 50)
+    data = resolve_path(args, args.data, 'yolo')
+    if args.balance:
+        data, _ = balance_yolo_dataset(os.path.dirname(os.path.abspath(data)), args)
+    config = YoloTrainConfig(
+        data=data, model=args.model, epochs=args.epochs, imgsz=args.imgsz,
+        batch=args.batch, patience=args.patience, device=args.device,
+        workers=args.workers, project=args.project, name=args.name,
+    )
+    result = train_yolo(config, fresh=args.fresh)
+
+    t = result['time']
+    if t['epochs']:
+        print(f"⏱️  {t['epochs']} epochs over {t['sessions']} session(s): "
+              f"{t['mean_epoch_s']:.1f}s per epoch, {t['data_wait_share']:.0%} waiting on the "
+              f"dataloader, {t['val_share']:.0%} in validation")
+    map50 = result['metrics'].get('metrics/mAP50(B)')
+    if map50 is not None:
+        print(f"📊 mAP50 {map50:.3f}, mAP50-95 {result['metrics'].get('metrics/mAP50-95(B)', 0):.3f}")
+    print(f"💾 Weights: {result['best']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Report saved: {args.report}")
+    return 0
+
+
+def cmd_index_labels(args):
+    from .labelindex import LabelIndex
+
+    root = resolve_path(args, args.dataset, 'dir')
+    index = LabelIndex.build(root, path=args.output, rebuild=args.rebuild)
+    if any(v is not None for v in (args.cls, args.split, args.min_area, args.max_area)):
+        try:
+            rows = index.query(cls=args.cls, split=args.split,
+                               min_area=args.min_area, max_area=args.max_area)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        images = sorted(set(index.boxes['image'][rows].tolist()))
+        print(f"🔍 {len(rows)} boxes in {len(images)} images")
+        for i in images:
+            print(index.images[i])
+        return 0
+
+    splits = sorted(set(index.splits.tolist()))
+    print(f"🗂️  {len(index)} boxes in {index.num_images} images ({', '.join(splits)})")
+    counts = {split: index.class_counts(split) for split in splits}
+    image_counts = index.image_class_counts()
+    print(f"   {'class':6s} {'images':>7s} " + ' '.join(f'{s:>7s}' for s in splits))
+    for c, name in enumerate(index.names):
+        print(f"   {name:6s} {image_counts[c]:7d} " + ' '.join(f'{counts[s][c]:7d}' for s in splits))
+    missing = [name for c, name in enumerate(index.names) if not image_counts[c]]
+    if missing:
+        print(f"   ⚠️  No boxes of: {', '.join(missing)}")
+    return 0
+
+
+def cmd_sweep_yolo(args):
+    from .sweep import sweep, sweep_configs
+
+    data = resolve_path(args, args.data, 'yolo')
+    base = YoloTrainConfig(data=data, epochs=args.epochs, patience=args.patience,
+                           device=args.device, workers=args.workers)
+    configs = sweep_configs(base, args.imgsz, args.models, args.batch, args.project)
+    print(f"🔍 Sweeping {len(configs)} runs ({len(args.models)} models x {len(args.imgsz)} sizes x "
+          f"{len(args.batch)} batch sizes), {args.max_parallel} at a time, on {data}")
+    ranking = sweep(configs, max_parallel=args.max_parallel, threads=args.threads,
+                    fresh=args.fresh, train=not args.no_train, latency_runs=args.latency_runs,
+                    latency_threads=args.latency_threads, map_tolerance=args.map_tolerance)
+
+    if not ranking['runs']:
+        print("❌ No finished runs with validation metrics")
+        return 1
+    print(f"\n   {'run':22s} {'mAP50':>6s} {'mAP50-95':>8s} {'latency':>10s} {'size':>8s}")
+    for r in ranking['runs']:
+        mark = '⭐' if r['name'] == ranking['recommended'] else ('• ' if r['pareto'] else '  ')
+        print(f"{mark} {r['name']:22s} {r['map50']:6.3f} {r['map50_95'] or 0:8.3f} "
+              f"{r['latency_ms']:7.1f} ms {r['size_mb']:5.1f} MB")
+    print(f"\n⭐ Recommended: {ranking['recommended']} (fastest within {args.map_tolerance} mAP50 "
+          f"of the best; • marks the other Pareto-optimal runs)")
+    print(f"💾 Report saved: {ranking['path']}")
+    return 0
+
+
+def cmd_fetch(args):
+    cache = dataset_cache(args)
+    if args.list:
+        for record in cache.entries():
+            print(f"{record['sha256'][:12]}  {record['size'] / 1e6:9.1f} MB  {record['fetched']}  "
+                  f"{record['spec']}")
+        return 0
+    if args.export:
+        copied = cache.export(args.export, args.specs or None)
+        print(f"📀 Exported {len(copied)} archives to {args.export}")
+        return 0
+    if not args.specs:
+        print("❌ Name at least one dataset spec (or use --list / --export)")
+        return 1
+    from .fetch import fetch_dataset
+
+    for spec in args.specs:
+        try:
+            print(fetch_dataset(spec, cache, args.sha256, layout=args.layout, verify=args.verify))
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"❌ {e}")
+            return 1
+    return 0
+
+
+def cmd_sources(args):
+    for name in sorted(SOURCES):
+        print(f"{name:10s} {SOURCES[name].description}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='mahjong_train',
+        description='Train and export the mahjong tile classifier'
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    train = sub.add_parser('train', help='Train the classifier from a dataset source')
+    add_train_args(train)
+    train.set_defaults(func=cmd_train)
+
+    compare = sub.add_parser('compare-precision',
+                             help='Time float32 vs fast training and compare accuracy')
+    add_train_args(compare)
+    compare.set_defaults(epochs=3)
+    compare.add_argument('--steps-per-epoch', type=int,
+                         help='Limit each epoch to this many steps')
+    compare.add_argument('--report', default='precision_report.json')
+    compare.set_defaults(func=cmd_compare_precision)
+
+    export = sub.add_parser('export', help='Convert a trained Keras model to TF.js')
+    export.add_argument('model', help='Path to the trained .h5 model')
+    export.add_argument('--output-dir', default='../public/models/mahjong-detector/')
+    export.add_argument('--mapping', help='class_mapping JSON to copy next to the model')
+    export.set_defaults(func=cmd_export)
+
+    quantize = sub.add_parser('quantize',
+                              help='Export float16/uint16/uint8 TF.js variants and pick the smallest accurate one')
+    quantize.add_argument('model', help='Path to the trained .h5 model')
+    quantize.add_argument('--mapping', required=True, help='class_mapping JSON of the model')
+    quantize.add_argument('--eval-dir', required=True,
+                          help='Held-out class-per-folder tile images')
+    quantize.add_argument('--output-dir', default='./tfjs_variants/')
+    quantize.add_argument('--tolerance', type=float, default=0.005,
+                          help='Max top-1 accuracy drop vs float32 (absolute, default 0.005)')
+    quantize.add_argument('--variants', nargs='+', choices=list(QUANT_VARIANTS),
+                          default=list(QUANT_VARIANTS))
+    quantize.add_argument('--img-size', type=int, default=TrainConfig.img_size)
+    quantize.add_argument('--deploy', metavar='DIR',
+                          help='Copy the chosen variant here, e.g. ../public/models/mahjong-detector/')
+    quantize.add_argument('--node', default='node',
+                          help='Node.js binary that runs the exported variants (needs npm install)')
+    quantize.set_defaults(func=cmd_quantize)
+
+    organize = sub.add_parser('organize', help='Link data.csv images into class folders')
+    organize.add_argument('--csv', default='./mahjong-dataset/data.csv')
+    organize.add_argument('--images', default='./mahjong-dataset/images/')
+    organize.add_argument('--output-dir', default='./mahjong-dataset/organized/')
+    organize.add_argument('--mode', choices=LINK_MODES, default='hardlink',
+                          help='How files are placed; links fall back to copies if unsupported')
+    organize.add_argument('--workers', type=int, default=8)
+    organize.set_defaults(func=cmd_organize)
+
+    extract = sub.add_parser('extract-yolo',
+                             help='Extract only the labelled train/val members of a YOLOv8 zip')
+    extract.add_argument('zip', help='Roboflow YOLOv8 export zip')
+    extract.add_argument('--dest', default='./mahjong_dataset/')
+    extract.add_argument('--include-test', action='store_true')
+    extract.add_argument('--workers', type=int, default=8)
+    extract.add_argument('--strict', action='store_true',
+                         help='Exit non-zero if any label file has problems')
+    extract.set_defaults(func=cmd_extract_yolo)
+
+    yolo_defaults = YoloTrainConfig()
+    yolo = sub.add_parser('train-yolo',
+                          help='Train the YOLOv8 detector, resuming an interrupted run')
+    yolo.add_argument('--data', default=yolo_defaults.data,
+                      help='YOLOv8 data.yaml, or a dataset spec of a YOLOv8 export')
+    yolo.add_argument('--model', default=yolo_defaults.model,
+                      help='Starting weights or model yaml (yolov8n.pt, yolov8s.pt, ...)')
+    yolo.add_argument('--epochs', type=int, default=yolo_defaults.epochs)
+    yolo.add_argument('--imgsz', type=int, default=yolo_defaults.imgsz)
+    yolo.add_argument('--batch', type=int, default=yolo_defaults.batch)
+    yolo.add_argument('--patience', type=int, default=yolo_defaults.patience,
+                      help='Epochs without improvement before stopping early')
+    yolo.add_argument('--device', help="'cpu', '0', '0,1', ... (default: ultralytics picks)")
+    yolo.add_argument('--workers', type=int, default=yolo_defaults.workers,
+                      help='Dataloader worker processes')
+    yolo.add_argument('--project', default=yolo_defaults.project)
+    yolo.add_argument('--name', default=yolo_defaults.name,
+                      help='Run name; <project>/<name>/weights/last.pt is resumed if unfinished')
+    yolo.add_argument('--fresh', action='store_true',
+                      help='Ignore an existing last.pt and train from --model again')
+    yolo.add_argument('--report', help='Write weights, metrics and epoch timings as JSON here')
+    yolo.add_argument('--balance', action='store_true',
+                      help='Repeat images of rare classes (repeat-factor sampling) in the train list')
+    add_balance_yolo_args(yolo)
+    add_fetch_args(yolo)
+    yolo.set_defaults(func=cmd_train_yolo)
+
+    labels = sub.add_parser('index-labels',
+                            help='Index the YOLO label files of a dataset and report class balance')
+    labels.add_argument('dataset', help='YOLOv8 dataset folder, or a dataset spec')
+    labels.add_argument('--output', help='Index file (default: <dataset>/label_index.npz)')
+    labels.add_argument('--rebuild', action='store_true',
+                        help='Parse the label files again even if the index is current')
+    labels.add_argument('--class', dest='cls', help='List images with boxes of this class (e.g. 1F)')
+    labels.add_argument('--split', help='Only boxes of this split (train, val, test)')
+    labels.add_argument('--min-area', type=float, help='Min box area, as a fraction of the image')
+    labels.add_argument('--max-area', type=float, help='Max box area, as a fraction of the image')
+    add_fetch_args(labels)
+    labels.set_defaults(func=cmd_index_labels)
+
+    sweep = sub.add_parser('sweep-yolo',
+                           help='Train a grid of YOLOv8 sizes/models and rank them by mAP vs latency')
+    sweep.add_argument('--data', default=yolo_defaults.data,
+                       help='YOLOv8 data.yaml, or a dataset spec of a YOLOv8 export')
+    sweep.add_argument('--imgsz', type=int, nargs='+', default=[320, 416, 512, 640])
+    sweep.add_argument('--models', nargs='+', default=['yolov8n.pt', 'yolov8s.pt'])
+    sweep.add_argument('--batch', type=int, nargs='+', default=[yolo_defaults.batch])
+    sweep.add_argument('--epochs', type=int, default=yolo_defaults.epochs)
+    sweep.add_argument('--patience', type=int, default=yolo_defaults.patience)
+    sweep.add_argument('--device', help="'cpu', '0', ... (default: ultralytics picks)")
+    sweep.add_argument('--workers', type=int, default=yolo_defaults.workers,
+                       help='Dataloader worker processes per run')
+    sweep.add_argument('--project', default='mahjong_sweep',
+                       help='Runs go to <project>/<model>-<imgsz>-b<batch>')
+    sweep.add_argument('--max-parallel', type=int, default=1,
+                       help='Trainings running at the same time')
+    sweep.add_argument('--threads', type=int,
+                       help='CPU threads per training (default: CPUs / --max-parallel)')
+    sweep.add_argument('--fresh', action='store_true', help='Retrain runs that already finished')
+    sweep.add_argument('--no-train', action='store_true',
+                       help='Only measure and rank the runs already in --project')
+    sweep.add_argument('--latency-runs', type=int, default=20)
+    sweep.add_argument('--latency-threads', type=int, default=1,
+                       help='onnxruntime threads when timing inference')
+    sweep.add_argument('--map-tolerance', type=float, default=0.01,
+                       help='Recommend the fastest run within this mAP50 of the best')
+    add_fetch_args(sweep)
+    sweep.set_defaults(func=cmd_sweep_yolo)
+
+    balance = sub.add_parser('balance-yolo',
+                             help='Write a class-balanced train list (and stratified val) for a YOLO dataset')
+    balance.add_argument('dataset', help='YOLOv8 dataset folder, or a dataset spec')
+    balance.add_argument('--output', help='Where train.txt, val.txt and data.yaml go '
+                                          '(default: <dataset>/balanced)')
+    balance.add_argument('--report', help='Write per-class counts as JSON here')
+    add_balance_yolo_args(balance)
+    add_fetch_args(balance)
+    balance.set_defaults(func=cmd_balance_yolo)
+
+    fetch = sub.add_parser('fetch', help='Download dataset archives into the local cache once')
+    fetch.add_argument('specs', nargs='*',
+                       help='roboflow:ws/project/version[:format], kaggle:owner/name, '
+                            'github:owner/repo[@ref], camerash or a zip URL')
+    fetch.add_argument('--sha256', help='Expected archive checksum (one spec)')
+    fetch.add_argument('--layout', choices=['dir', 'zip', 'yolo'], default='dir',
+                       help='Print the unpacked folder, the archive, or a data.yaml')
+    fetch.add_argument('--list', action='store_true', help='List the cached archives')
+    fetch.add_argument('--export', metavar='DIR',
+                       help='Copy the cached archives (or just specs) into a mirror directory')
+    add_fetch_args(fetch)
+    fetch.set_defaults(func=cmd_fetch)
+
+    sources = sub.add_parser('sources', help='List the available dataset sources')
+    sources.set_defaults(func=cmd_sources)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
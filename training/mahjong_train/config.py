@@ -0,0 +1,54 @@
+"""
+Training configuration shared by the CLI and the pipeline.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class TrainConfig:
+    img_size: int = 224
+    batch_size: int = 32
+    epochs: int = 50
+    fine_tune_epochs: int = 30
+    fine_tune_layers: int = 30
+    learning_rate: float = 0.001
+    fine_tune_learning_rate: float = 0.0001
+    validation_split: float = 0.2
+    seed: int = 42
+    work_dir: str = './mahjong_train_work/'
+    output_dir: str = '.'
+    cache: bool = True
+    fast: bool = False
+    feature_cache: bool = False
+    feature_augment_copies: int = 0
+    balance: str = 'none'
+    balance_power: float = 0.5
+
+    @property
+    def cache_dir(self):
+        return os.path.join(self.work_dir, 'decoded-cache') if self.cache else None
+
+
+@dataclass
+class YoloTrainConfig:
+    """Settings of one YOLOv8 detector run (defaults from train_yolov8_mahjong_v2.py)."""
+    data: str = 'mahjong_dataset/data.yaml'
+    model: str = 'yolov8n.pt'
+    epochs: int = 50
+    imgsz: int = 640
+    batch: int = 16
+    patience: int = 15
+    device: str = None
+    workers: int = 8
+    project: str = 'mahjong_detector'
+    name: str = 'train'
+
+    @property
+    def run_dir(self):
+        return os.path.join(self.project, self.name)
+
+    @property
+    def weights_dir(self):
+        return os.path.join(self.run_dir, 'weights')
@@ -0,0 +1,345 @@
+"""
+tf.data input pipeline for the tile classifier.
+
+Replaces ImageDataGenerator.flow_from_directory: JPEGs are decoded and
+augmented in parallel inside the TensorFlow runtime instead of one at a
+time in Python, and batches are prefetched so the model never waits.
+
+With a cache directory, every image is decoded and resized once into a
+memory-mapped uint8 array that later epochs, both training phases and
+later runs read directly.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from .layout import list_image_files, split_files
+from .sampling import ClassBalancedSampler
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def build_augmentation(seed=None):
+    """
+    Keras preprocessing layers matching the old ImageDataGenerator settings
+    (rotation 20°, shift 0.15, zoom 0.15, brightness 0.7-1.3).
+
+    The layers run on whole batches, so they execute on the GPU when one is
+    available and vectorized on the CPU otherwise.
+    """
+    return keras.Sequential([
+        layers.RandomRotation(20 / 360, fill_mode='nearest', seed=seed),
+        layers.RandomTranslation(0.15, 0.15, fill_mode='nearest', seed=seed),
+        layers.RandomZoom(0.15, fill_mode='nearest', seed=seed),
+        layers.RandomBrightness(0.3, value_range=(0.0, 1.0), seed=seed),
+    ], name='augmentation')
+
+
+def _decode_uint8(img_size):
+    def decode(path, label):
+        image = tf.io.read_file(path)
+        image = tf.io.decode_image(image, channels=3, expand_animations=False)
+        image = tf.image.resize(image, (img_size, img_size))
+        image = tf.cast(tf.round(tf.clip_by_value(image, 0, 255)), tf.uint8)
+        return image, label
+    return decode
+
+
+def _finish(ds, num_classes, training, augmentation):
+    """Normalize, augment, one-hot and prefetch a batched uint8 dataset."""
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y),
+                num_parallel_calls=AUTOTUNE)
+
+    if training and augmentation is not None:
+        ds = ds.map(lambda x, y: (augmentation(x, training=True), y),
+                    num_parallel_calls=AUTOTUNE)
+
+    ds = ds.map(lambda x, y: (x, tf.one_hot(y, num_classes)),
+                num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def sampled_positions(sampler):
+    """
+    Dataset of sample positions, one ClassBalancedSampler epoch per pass:
+    every time Keras starts an epoch the sampler draws a new one.
+    """
+    def draw(_):
+        rows = tf.numpy_function(sampler.next_epoch, [], tf.int64)
+        rows.set_shape((None,))
+        return rows
+
+    ds = tf.data.Dataset.from_tensors(0).map(draw).unbatch()
+    return ds.apply(tf.data.experimental.assert_cardinality(len(sampler)))
+
+
+def make_dataset(samples, num_classes, img_size=224, batch_size=32,
+                 training=False, augmentation=None, seed=42, sampler=None):
+    """
+    Build a batched, prefetched dataset from (path, label) pairs.
+
+    With a sampler (over the same samples), training epochs follow its
+    class-balanced draws instead of a uniform shuffle.
+    """
+    paths = [p for p, _ in samples]
+    labels = [l for _, l in samples]
+
+    if sampler is not None:
+        paths, labels = tf.constant(paths), tf.constant(labels)
+        ds = sampled_positions(sampler).map(
+            lambda i: (tf.gather(paths, i), tf.gather(labels, i)))
+    else:
+        ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+        if training:
+            ds = ds.shuffle(len(samples), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.map(_decode_uint8(img_size), num_parallel_calls=AUTOTUNE)
+    ds = ds.batch(batch_size)
+    return _finish(ds, num_classes, training, augmentation)
+
+
+# ----------------------------------------
+# Decoded-image cache
+# ----------------------------------------
+
+def _cache_path(path, root=None):
+    # How a file is named inside the cache: relative to root (or absolute),
+    # so './data/x.jpg' and 'data/x.jpg' find the same row
+    return os.path.relpath(path, root) if root else os.path.abspath(path)
+
+
+def dataset_fingerprint(paths, labels, img_size, root=None):
+    """
+    Hash of everything that affects the decoded tensors.
+
+    Covers each file's relative path, size, modification time and label
+    plus the target size, so adding, removing, relabelling or editing any
+    image produces a new key and the stale cache is not reused.
+    """
+    h = hashlib.sha256(f'v1:{img_size}'.encode())
+    for path, label in zip(paths, labels):
+        st = os.stat(path)
+        h.update(f'\n{_cache_path(path, root)}\t{label}\t{st.st_size}\t{st.st_mtime_ns}'.encode())
+    return h.hexdigest()[:16]
+
+
+def build_image_cache(paths, labels, cache_dir, img_size=224, root=None):
+    """
+    Decode and resize every image once into a memory-mapped uint8 array.
+
+    Returns (images, labels, index) where images is a read-only
+    (N, img_size, img_size, 3) memmap, labels an int32 array and index
+    maps each of paths, as spelled by the caller, to its row. The cache
+    itself records paths relative to root (absolute without one), so a
+    later run may spell them differently. Entries live under
+    <cache_dir>/<hash of root>/<fingerprint>, so datasets sharing one
+    cache_dir keep their own caches. An existing cache with the same
+    fingerprint is reused; older caches of the same root are removed,
+    except builds still in progress (*.tmp-<pid>).
+    """
+    key = dataset_fingerprint(paths, labels, img_size, root)
+    root_key = hashlib.sha256(os.path.abspath(root or '').encode()).hexdigest()[:12]
+    root_dir = os.path.join(cache_dir, root_key)
+    entry_dir = os.path.join(root_dir, key)
+    images_file = os.path.join(entry_dir, 'images.npy')
+    labels_file = os.path.join(entry_dir, 'labels.npy')
+    paths_file = os.path.join(entry_dir, 'paths.json')
+
+    if not os.path.exists(paths_file):
+        print(f"🗄️  Building decoded-image cache {key} ({len(paths)} images)...")
+        start = time.perf_counter()
+        tmp_dir = f'{entry_dir}.tmp-{os.getpid()}'
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        images = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, 'images.npy'), mode='w+', dtype=np.uint8,
+            shape=(len(paths), img_size, img_size, 3)
+        )
+        ds = tf.data.Dataset.from_tensor_slices((list(paths), list(labels)))
+        ds = ds.map(_decode_uint8(img_size), num_parallel_calls=AUTOTUNE)
+        ds = ds.batch(256).prefetch(AUTOTUNE)
+        row = 0
+        for batch, _ in ds:
+            batch = batch.numpy()
+            images[row:row + len(batch)] = batch
+            row += len(batch)
+        images.flush()
+        del images
+
+        np.save(os.path.join(tmp_dir, 'labels.npy'), np.asarray(labels, dtype=np.int32))
+        with open(os.path.join(tmp_dir, 'paths.json'), 'w') as f:
+            json.dump([_cache_path(p, root) for p in paths], f)
+
+        # Publish atomically (unless a concurrent build got there first),
+        # then drop caches for older versions of this dataset
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            if not os.path.exists(paths_file):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        for name in os.listdir(root_dir):
+            if name != key and not name.startswith('.') and '.tmp-' not in name:
+                shutil.rmtree(os.path.join(root_dir, name), ignore_errors=True)
+        print(f"✅ Cache built in {time.perf_counter() - start:.1f}s: {entry_dir}")
+    else:
+        print(f"🗄️  Reusing decoded-image cache: {entry_dir}")
+
+    with open(paths_file) as f:
+        rows = {p: i for i, p in enumerate(json.load(f))}
+    index = {p: rows[_cache_path(p, root)] for p in paths}
+    return np.load(images_file, mmap_mode='r'), np.load(labels_file), index
+
+
+def make_cached_dataset(rows, images, cached_labels, num_classes, batch_size=32,
+                        training=False, augmentation=None, seed=42, sampler=None):
+    """
+    Build a batched dataset that gathers rows from the memory-mapped cache.
+
+    A sampler draws positions into rows, as in make_dataset.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    img_shape = images.shape[1:]
+
+    def gather(idx):
+        # Sorted reads keep the memmap access mostly sequential
+        order = np.argsort(idx)
+        out = np.empty((len(idx),) + img_shape, dtype=np.uint8)
+        out[order] = images[idx[order]]
+        return out, cached_labels[idx]
+
+    def load(idx):
+        x, y = tf.numpy_function(gather, [idx], (tf.uint8, tf.int32))
+        x.set_shape((None,) + img_shape)
+        y.set_shape((None,))
+        return x, y
+
+    if sampler is not None:
+        ds = sampled_positions(sampler).map(lambda i: tf.gather(rows, i))
+    else:
+        ds = tf.data.Dataset.from_tensor_slices(rows)
+        if training:
+            ds = ds.shuffle(len(rows), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size).map(load, num_parallel_calls=AUTOTUNE)
+    return _finish(ds, num_classes, training, augmentation)
+
+
+def load_tile_datasets(data_dir, img_size=224, batch_size=32,
+                       validation_split=0.2, seed=42, cache_dir=None,
+                       balance='none', balance_power=0.5):
+    """
+    Build train/validation datasets for a class-per-folder directory.
+
+    With cache_dir set, images come from the decoded-image cache (built
+    on first use). balance is a ClassBalancedSampler mode for the
+    training split; the validation split is stratified per class either
+    way. Returns (train_ds, val_ds, info) where info has class_indices,
+    train_samples and val_samples, the (path, label) lists of each split
+    as train_files and val_files, the training sampler and its
+    class_weight (for fit(), None unless balance is 'reweight').
+    """
+    paths, labels, class_indices = list_image_files(data_dir)
+    train, val = split_files(paths, labels, validation_split, seed)
+    num_classes = len(class_indices)
+    augmentation = build_augmentation(seed)
+    sampler = ClassBalancedSampler([l for _, l in train], num_classes, balance,
+                                   balance_power, seed)
+    train_sampler = sampler if balance == 'oversample' else None
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        images, cached_labels, index = build_image_cache(
+            paths, labels, cache_dir, img_size, root=data_dir
+        )
+        train_ds = make_cached_dataset(
+            [index[p] for p, _ in train], images, cached_labels, num_classes,
+            batch_size, training=True, augmentation=augmentation, seed=seed,
+            sampler=train_sampler
+        )
+        val_ds = make_cached_dataset(
+            [index[p] for p, _ in val], images, cached_labels, num_classes, batch_size
+        )
+    else:
+        train_ds = make_dataset(train, num_classes, img_size, batch_size,
+                                training=True, augmentation=augmentation, seed=seed,
+                                sampler=train_sampler)
+        val_ds = make_dataset(val, num_classes, img_size, batch_size)
+
+    info = {
+        'class_indices': class_indices,
+        'train_samples': len(train),
+        'val_samples': len(val),
+        'train_files': train,
+        'val_files': val,
+        'sampler': sampler,
+        'class_weight': sampler.class_weight(),
+    }
+    return train_ds, val_ds, info
+
+
+class ThroughputCallback(keras.callbacks.Callback):
+    """
+    Print training images/sec for each epoch.
+
+    Only the training part of the epoch is timed (validation is excluded)
+    and the rate is also written to the epoch logs as `images_per_sec`, so
+    list this callback before CSVLogger to get it into the CSV.
+    """
+
+    def __init__(self, num_samples):
+        super().__init__()
+        self.num_samples = num_samples
+        self.history = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+        self._train_end = self._start
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._train_end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = max(self._train_end - self._start, 1e-9)
+        rate = self.num_samples / elapsed
+        self.history.append(rate)
+        if logs is not None:
+            logs['images_per_sec'] = rate
+        print(f"\n⏱️  Epoch {epoch + 1}: {rate:,.1f} images/sec ({elapsed:.1f}s)")
+
+
+class StepTimeCallback(keras.callbacks.Callback):
+    """
+    Record wall-clock time per training step.
+
+    The first step of each fit() call includes tracing/XLA compilation and
+    is kept separately in `first_step` so it doesn't skew the mean.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.step_times = []
+        self.first_step = None
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        if self.first_step is None:
+            self.first_step = elapsed
+        else:
+            self.step_times.append(elapsed)
+
+    @property
+    def mean_ms(self):
+        if not self.step_times:
+            return float('nan')
+        return 1000 * sum(self.step_times) / len(self.step_times)
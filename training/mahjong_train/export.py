@@ -0,0 +1,37 @@
+"""
+Saving the trained model and converting it to TensorFlow.js.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+
+def save_class_mapping(class_indices, path):
+    """Write {index: class_name}, the format the web app and converter expect."""
+    class_mapping = {v: k for k, v in class_indices.items()}
+    with open(path, 'w') as f:
+        json.dump(class_mapping, f, indent=2)
+    return path
+
+
+def export_tfjs(model_path, output_dir, mapping_path=None, extra_args=()):
+    """
+    Convert a saved Keras model to a TF.js graph model with
+    tensorflowjs_converter and copy the class mapping next to it.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cmd = [
+        'tensorflowjs_converter',
+        '--input_format=keras',
+        '--output_format=tfjs_graph_model',
+        *extra_args,
+        model_path,
+        output_dir,
+    ]
+    subprocess.run(cmd, check=True)
+
+    if mapping_path:
+        shutil.copy(mapping_path, os.path.join(output_dir, 'class_mapping.json'))
+    return output_dir
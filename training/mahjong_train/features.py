@@ -0,0 +1,105 @@
+"""
+Frozen-backbone feature cache for phase 1.
+
+While the MobileNetV2 backbone is frozen, its pooled output for a given
+image never changes, so pushing every image through it every epoch is
+wasted work. Here each image goes through the backbone once (optionally
+plus a few fixed augmented copies), the 1280-d pooled features are stored
+as a float16 memmap, and phase 1 trains only the Dense/BatchNorm head
+on them. Phase 2 fine-tuning then runs on images as usual.
+"""
+
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from .data import AUTOTUNE, build_augmentation, dataset_fingerprint, make_dataset, sampled_positions
+
+
+def feature_extractor(base_model):
+    """Backbone + global average pooling, i.e. the first two layers of the classifier."""
+    return keras.Sequential([base_model, layers.GlobalAveragePooling2D()], name='feature_extractor')
+
+
+def head_model(model, feature_dim):
+    """
+    A model over pooled features that shares the classifier's head layers.
+
+    Training it updates the full classifier's head weights directly, so
+    nothing has to be copied back before phase 2.
+    """
+    return keras.Sequential([keras.Input((feature_dim,)), *model.layers[2:]], name='mahjong_head')
+
+
+def cache_features(extractor, samples, num_classes, cache_dir, img_size=224,
+                   batch_size=64, augment_copies=0, seed=42):
+    """
+    Compute (or reuse) pooled features for (path, label) samples.
+
+    Row i * len(samples) + j holds copy i of sample j; copy 0 is the plain
+    image, copies 1..augment_copies use fixed-seed augmentation. Returns
+    (features, labels): a read-only float16 memmap and an int32 array.
+    """
+    paths = [p for p, _ in samples]
+    labels = [l for _, l in samples]
+    key = f"{dataset_fingerprint(paths, labels, img_size)}-a{augment_copies}-s{seed}"
+    entry_dir = os.path.join(cache_dir, key)
+    features_file = os.path.join(entry_dir, 'features.npy')
+    labels_file = os.path.join(entry_dir, 'labels.npy')
+
+    if not os.path.exists(labels_file):
+        copies = 1 + augment_copies
+        print(f"🧊 Extracting backbone features for {len(samples)} images x {copies} copies...")
+        start = time.perf_counter()
+        tmp_dir = f'{entry_dir}.tmp-{os.getpid()}'
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        feature_dim = extractor.output_shape[-1]
+        features = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, 'features.npy'), mode='w+', dtype=np.float16,
+            shape=(len(samples) * copies, feature_dim)
+        )
+
+        row = 0
+        for copy in range(copies):
+            ds = make_dataset(samples, num_classes, img_size, batch_size)
+            if copy:
+                augmentation = build_augmentation(seed + copy)
+                ds = ds.map(lambda x, y: (augmentation(x, training=True), y),
+                            num_parallel_calls=AUTOTUNE)
+            for batch, _ in ds:
+                out = extractor(batch, training=False).numpy()
+                features[row:row + len(out)] = out
+                row += len(out)
+        features.flush()
+        del features
+
+        np.save(os.path.join(tmp_dir, 'labels.npy'),
+                np.tile(np.asarray(labels, dtype=np.int32), copies))
+        os.replace(tmp_dir, entry_dir)
+        print(f"✅ Features cached in {time.perf_counter() - start:.1f}s: {entry_dir}")
+    else:
+        print(f"🧊 Reusing cached features: {entry_dir}")
+
+    return np.load(features_file, mmap_mode='r'), np.load(labels_file)
+
+
+def feature_dataset(features, labels, num_classes, batch_size=32, training=False, seed=42,
+                    sampler=None):
+    """Batched dataset of (float32 features, one-hot labels), optionally class-balanced."""
+    if sampler is not None:
+        features, labels = tf.constant(np.asarray(features)), tf.constant(labels)
+        ds = sampled_positions(sampler).map(
+            lambda i: (tf.gather(features, i), tf.gather(labels, i)))
+    else:
+        ds = tf.data.Dataset.from_tensor_slices((np.asarray(features), labels))
+        if training:
+            ds = ds.shuffle(len(labels), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32), tf.one_hot(y, num_classes)),
+                num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
@@ -0,0 +1,368 @@
+"""
+Dataset archives fetched once into a content-addressed local cache.
+
+A dataset is named by a spec:
+
+    roboflow:<workspace>/<project>/<version>[:<format>]   (format: yolov8, folder, ...)
+    kaggle:<owner>/<dataset>
+    github:<owner>/<repo>[@<ref>]
+    camerash                                              (github:Camerash/mahjong-dataset)
+    https://...                                           (any zip)
+
+Archives are stored by the SHA-256 of their bytes, and a ref file maps
+each spec to its hash:
+
+    <cache>/blobs/sha256/ab/abcd....zip
+    <cache>/refs/<spec>.json        {spec, sha256, size, fetched}
+    <cache>/unpacked/<sha256>/      extracted once
+
+A spec that has been fetched is served from disk with no network call;
+its archive size is checked every time, and its hash too with verify=True
+(--verify on the command line).
+An expected sha256 pins a spec: a download or mirror copy with other
+bytes is rejected.
+
+A mirror is a directory with the same layout, such as a copy of another
+machine's cache made with export(). Loose <sha256>.zip files also work.
+It is read before the network, and with offline=True it is the only
+place looked at. Everything is written through temporary files and
+renames, so concurrent runs can share one cache.
+
+Credentials come from the environment: ROBOFLOW_API_KEY, and
+KAGGLE_USERNAME/KAGGLE_KEY or ~/.kaggle/kaggle.json. MAHJONG_DATA_CACHE,
+MAHJONG_DATA_MIRROR and MAHJONG_DATA_OFFLINE=1 set the defaults.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import urllib.parse
+import urllib.request
+import zipfile
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'mahjong_train', 'datasets')
+ALIASES = {'camerash': 'github:Camerash/mahjong-dataset'}
+SCHEMES = ('roboflow', 'kaggle', 'github', 'http', 'https')
+CHUNK = 1 << 20
+
+
+def is_spec(value):
+    """True if value names a dataset to fetch rather than a local path."""
+    if os.path.exists(value):
+        return False
+    return value in ALIASES or (':' in value and value.split(':', 1)[0] in SCHEMES)
+
+
+def normalize_spec(spec):
+    spec = ALIASES.get(spec, spec)
+    scheme = spec.split(':', 1)[0]
+    if scheme not in SCHEMES or ':' not in spec:
+        raise ValueError(f"Unknown dataset spec '{spec}'. Use one of: "
+                         f"{', '.join(s + ':' for s in SCHEMES[:3])}, a URL or {', '.join(ALIASES)}")
+    return spec
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ----------------------------------------
+# Download URLs
+# ----------------------------------------
+
+def _request(url, headers=None):
+    return urllib.request.Request(url, headers={'User-Agent': 'mahjong_train', **(headers or {})})
+
+
+def _roboflow_url(key):
+    name, _, fmt = key.partition(':')
+    api_key = os.environ.get('ROBOFLOW_API_KEY')
+    if not api_key:
+        raise RuntimeError("Set ROBOFLOW_API_KEY to fetch Roboflow datasets")
+    url = f"https://api.roboflow.com/{name}/{fmt or 'yolov8'}?api_key={urllib.parse.quote(api_key)}"
+    # Roboflow builds the export on first request; poll until the link is there
+    for _ in range(60):
+        with urllib.request.urlopen(_request(url), timeout=60) as response:
+            info = json.load(response)
+        link = (info.get('export') or {}).get('link')
+        if link:
+            return _request(link)
+        time.sleep(5)
+    raise RuntimeError(f"Roboflow export of {name} was not ready after 5 minutes")
+
+
+def _kaggle_url(key):
+    user, secret = os.environ.get('KAGGLE_USERNAME'), os.environ.get('KAGGLE_KEY')
+    config = os.path.join(os.path.expanduser('~'), '.kaggle', 'kaggle.json')
+    if not (user and secret) and os.path.exists(config):
+        with open(config) as f:
+            credentials = json.load(f)
+        user, secret = credentials['username'], credentials['key']
+    if not (user and secret):
+        raise RuntimeError("Set KAGGLE_USERNAME and KAGGLE_KEY (or ~/.kaggle/kaggle.json) "
+                           "to fetch Kaggle datasets")
+    token = base64.b64encode(f'{user}:{secret}'.encode()).decode()
+    return _request(f'https://www.kaggle.com/api/v1/datasets/download/{key}',
+                    {'Authorization': f'Basic {token}'})
+
+
+def _github_url(key):
+    repo, _, ref = key.partition('@')
+    return _request(f'https://codeload.github.com/{repo}/zip/{ref or "HEAD"}')
+
+
+def download_request(spec):
+    """urllib Request for a normalized spec (may call the provider's API)."""
+    scheme, key = spec.split(':', 1)
+    if scheme == 'roboflow':
+        return _roboflow_url(key)
+    if scheme == 'kaggle':
+        return _kaggle_url(key)
+    if scheme == 'github':
+        return _github_url(key)
+    return _request(spec)
+
+
+# ----------------------------------------
+# Cache
+# ----------------------------------------
+
+class DatasetCache:
+    """Content-addressed store of dataset archives (see the module docstring)."""
+
+    def __init__(self, root=None, mirror=None, offline=None):
+        self.root = root or os.environ.get('MAHJONG_DATA_CACHE') or DEFAULT_CACHE
+        self.mirror = mirror or os.environ.get('MAHJONG_DATA_MIRROR') or None
+        if offline is None:
+            offline = os.environ.get('MAHJONG_DATA_OFFLINE', '') not in ('', '0')
+        self.offline = offline
+
+    # Paths
+
+    @staticmethod
+    def _blob(root, sha256):
+        return os.path.join(root, 'blobs', 'sha256', sha256[:2], f'{sha256}.zip')
+
+    @staticmethod
+    def _ref(root, spec):
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '_', spec).strip('_')
+        digest = hashlib.sha256(spec.encode()).hexdigest()[:8]
+        return os.path.join(root, 'refs', f'{slug}-{digest}.json')
+
+    def blob_path(self, sha256):
+        return self._blob(self.root, sha256)
+
+    # Refs
+
+    @classmethod
+    def _read_ref(cls, root, spec):
+        path = cls._ref(root, spec)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_ref(self, record):
+        path = self._ref(self.root, record['spec'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.tmp-{os.getpid()}'
+        with open(tmp, 'w') as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp, path)
+
+    def entries(self):
+        """Every ref in the cache."""
+        refs_dir = os.path.join(self.root, 'refs')
+        if not os.path.isdir(refs_dir):
+            return []
+        records = []
+        for name in sorted(os.listdir(refs_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(refs_dir, name)) as f:
+                    records.append(json.load(f))
+        return records
+
+    # Fetching
+
+    def fetch(self, spec, sha256=None, verify=False):
+        """
+        Make the archive of spec available locally. Returns its record:
+        spec, sha256, size, path, and where it came from this time
+        ('cache', 'mirror' or 'network').
+        """
+        spec = normalize_spec(spec)
+        record = self._read_ref(self.root, spec)
+        if record and (sha256 is None or record['sha256'] == sha256):
+            path = self.blob_path(record['sha256'])
+            if self._intact(path, record, verify):
+                return dict(record, path=path, source='cache')
+
+        found = self._from_mirror(spec, sha256)
+        if found:
+            return found
+        if self.offline:
+            where = f"mirror {self.mirror}" if self.mirror else "no mirror configured"
+            raise FileNotFoundError(f"{spec} is not in the cache {self.root} ({where}) and "
+                                    f"network access is off")
+        return self._download(spec, sha256)
+
+    @staticmethod
+    def _intact(path, record, verify):
+        if not os.path.exists(path) or os.path.getsize(path) != record['size']:
+            return False
+        return not verify or file_sha256(path) == record['sha256']
+
+    def _from_mirror(self, spec, sha256):
+        if not self.mirror or not os.path.isdir(self.mirror):
+            return None
+        # (path, expected hash): a blob found through the mirror's ref must
+        # match the hash that ref records
+        candidates = []
+        record = self._read_ref(self.mirror, spec)
+        if record and (sha256 is None or record['sha256'] == sha256):
+            candidates.append((self._blob(self.mirror, record['sha256']), record['sha256']))
+        if sha256:
+            candidates += [(self._blob(self.mirror, sha256), sha256),
+                           (os.path.join(self.mirror, f'{sha256}.zip'), sha256)]
+        for candidate, expected in candidates:
+            if os.path.exists(candidate):
+                print(f"📀 {spec}: copying from mirror {candidate}")
+                return self._ingest(spec, candidate, expected, 'mirror', copy=True)
+        return None
+
+    def _download(self, spec, sha256):
+        request = download_request(spec)
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp = os.path.join(tmp_dir, f'download-{os.getpid()}-{time.time_ns()}.zip')
+        print(f"📥 {spec}: downloading...")
+        start = time.perf_counter()
+        size = 0
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response, open(tmp, 'wb') as out:
+                for chunk in iter(lambda: response.read(CHUNK), b''):
+                    out.write(chunk)
+                    size += len(chunk)
+            print(f"📥 {spec}: {size / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+            return self._ingest(spec, tmp, sha256, 'network')
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _ingest(self, spec, path, sha256, source, copy=False):
+        """Hash an archive, move (or copy) it to its blob path and point the spec at it."""
+        digest = file_sha256(path)
+        if sha256 and digest != sha256:
+            raise ValueError(f"{spec}: expected sha256 {sha256}, got {digest} from {source}")
+        if not zipfile.is_zipfile(path):
+            raise ValueError(f"{spec}: {source} did not return a zip archive")
+        blob = self.blob_path(digest)
+        # A blob already there is replaced if it went bad (see verify)
+        if not (os.path.exists(blob) and file_sha256(blob) == digest):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = f'{blob}.tmp-{os.getpid()}'
+            if copy:
+                shutil.copyfile(path, tmp)
+            else:
+                shutil.move(path, tmp)
+            os.replace(tmp, blob)
+        record = {'spec': spec, 'sha256': digest, 'size': os.path.getsize(blob),
+                  'fetched': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self._write_ref(record)
+        return dict(record, path=blob, source=source)
+
+    # Unpacking
+
+    def unpack(self, sha256):
+        """
+        Directory with the archive's contents, extracted on first use.
+        An archive with a single top-level folder (GitHub, most Kaggle
+        zips) returns that folder.
+        """
+        from .zipstream import unsafe_member
+
+        target = os.path.join(self.root, 'unpacked', sha256)
+        if not os.path.isdir(target):
+            tmp = f'{target}.tmp-{os.getpid()}'
+            shutil.rmtree(tmp, ignore_errors=True)
+            with zipfile.ZipFile(self.blob_path(sha256)) as zf:
+                for member in zf.namelist():
+                    if unsafe_member(member):
+                        raise ValueError(f"Unsafe path in archive {sha256}: {member}")
+                zf.extractall(tmp)
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                # Another process unpacked it first
+                shutil.rmtree(tmp, ignore_errors=True)
+        entries = [e for e in os.listdir(target) if not e.startswith('.') and e != '__MACOSX']
+        if len(entries) == 1 and os.path.isdir(os.path.join(target, entries[0])):
+            return os.path.join(target, entries[0])
+        return target
+
+    def prepare_yolo(self, sha256, splits=('train', 'val')):
+        """
+        data.yaml for a YOLOv8 export archive, with only the labelled
+        train/val members extracted once (see zipstream.materialize).
+        """
+        from .zipstream import ZipDatasetIndex
+
+        dest = os.path.join(self.root, 'yolo', sha256)
+        marker = os.path.join(dest, '.data_yaml')
+        if os.path.exists(marker):
+            with open(marker) as f:
+                data_yaml = f.read().strip()
+            if os.path.exists(data_yaml):
+                return data_yaml
+        data_yaml, report = ZipDatasetIndex(self.blob_path(sha256)).materialize(dest, splits=splits)
+        for problem in report['problems']:
+            print(f"   ⚠️  {problem}")
+        with open(marker, 'w') as f:
+            f.write(data_yaml)
+        return data_yaml
+
+    # Mirrors
+
+    def export(self, dest, specs=None):
+        """Copy refs and blobs (all, or those of specs) into a mirror directory."""
+        wanted = {normalize_spec(s) for s in specs} if specs else None
+        copied = []
+        for record in self.entries():
+            if wanted is not None and record['spec'] not in wanted:
+                continue
+            blob = self._blob(dest, record['sha256'])
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                shutil.copyfile(self.blob_path(record['sha256']), f'{blob}.tmp')
+                os.replace(f'{blob}.tmp', blob)
+            ref = self._ref(dest, record['spec'])
+            os.makedirs(os.path.dirname(ref), exist_ok=True)
+            with open(ref, 'w') as f:
+                json.dump(record, f, indent=2)
+            copied.append(record)
+        return copied
+
+
+def fetch_dataset(spec, cache=None, sha256=None, layout='dir', verify=False):
+    """
+    Local path for a dataset spec: the unpacked directory (layout 'dir'),
+    the archive itself ('zip') or a ready data.yaml ('yolo'). verify
+    re-hashes a cached archive instead of only checking its size.
+    """
+    cache = cache or DatasetCache()
+    record = cache.fetch(spec, sha256, verify)
+    if record['source'] == 'cache':
+        print(f"🗄️  {record['spec']}: from cache ({record['sha256'][:12]})")
+    if layout == 'zip':
+        return record['path']
+    if layout == 'yolo':
+        return cache.prepare_yolo(record['sha256'])
+    return cache.unpack(record['sha256'])
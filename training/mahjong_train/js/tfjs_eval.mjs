@@ -0,0 +1,84 @@
+/**
+ * Runs an exported TF.js graph model for the quantization gate
+ * (mahjong_train/quantize.py), over stdin/stdout.
+ *
+ * Usage: node tfjs_eval.mjs <model dir>
+ *
+ * The model is loaded from model.json and its weight shards exactly as
+ * tf.loadGraphModel does in the browser (dequantizing uint8/uint16/float16
+ * weights), then the server answers {"ready": true}. Each request is a
+ * binary frame: three little-endian uint32 (count, height, width) followed
+ * by count * height * width * 3 float32 pixels in [0, 1], NHWC. It is
+ * answered with one line: the top-3 class indices of every image. A frame
+ * with count 0 ends the session.
+ *
+ * Uses @tensorflow/tfjs-node when it is installed, otherwise the app's
+ * @tensorflow/tfjs dependency on its CPU backend.
+ */
+import { readFile } from 'node:fs/promises';
+import { join } from 'node:path';
+
+const importTf = async name => {
+  const module = await import(name);
+  return module.loadGraphModel ? module : module.default;
+};
+
+let tf;
+try {
+  tf = await importTf('@tensorflow/tfjs-node');
+} catch {
+  tf = await importTf('@tensorflow/tfjs');
+}
+
+const modelDir = process.argv[2];
+
+const fromDisk = {
+  load: async () => {
+    const manifest = JSON.parse(await readFile(join(modelDir, 'model.json'), 'utf8'));
+    const weightSpecs = [];
+    const shards = [];
+    for (const group of manifest.weightsManifest || []) {
+      weightSpecs.push(...group.weights);
+      for (const path of group.paths) shards.push(await readFile(join(modelDir, path)));
+    }
+    const data = Buffer.concat(shards);
+    return {
+      modelTopology: manifest.modelTopology,
+      format: manifest.format,
+      generatedBy: manifest.generatedBy,
+      convertedBy: manifest.convertedBy,
+      signature: manifest.signature,
+      userDefinedMetadata: manifest.userDefinedMetadata,
+      modelInitializer: manifest.modelInitializer,
+      weightSpecs,
+      weightData: data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength),
+    };
+  },
+};
+
+const model = await tf.loadGraphModel(fromDisk);
+process.stdout.write('{"ready":true}\n');
+
+const predict = (pixels, count, height, width) => tf.tidy(() => {
+  const images = tf.tensor4d(pixels, [count, height, width, 3]);
+  let output = model.predict(images);
+  if (Array.isArray(output)) output = output[0];
+  return tf.topk(output, 3).indices.arraySync();
+});
+
+let pending = Buffer.alloc(0);
+for await (const chunk of process.stdin) {
+  pending = Buffer.concat([pending, chunk]);
+  while (pending.length >= 12) {
+    const count = pending.readUInt32LE(0);
+    if (count === 0) process.exit(0);
+    const height = pending.readUInt32LE(4);
+    const width = pending.readUInt32LE(8);
+    const size = 12 + count * height * width * 3 * 4;
+    if (pending.length < size) break;
+    // Copy out so the Float32Array is aligned
+    const pixels = new Float32Array(pending.buffer.slice(pending.byteOffset + 12, pending.byteOffset + size));
+    pending = pending.subarray(size);
+    process.stdout.write(JSON.stringify(predict(pixels, count, height, width)) + '\n');
+  }
+}
@@ -0,0 +1,343 @@
+"""
+Index of every YOLO label file of a detection dataset, parsed once.
+
+All boxes go into one NumPy structured array (BOX_DTYPE: image id,
+class id, x, y, w, h as float32), sorted by image. Per-image and
+per-class offsets make lookups slices instead of scans:
+
+    index = LabelIndex.build('mahjong_dataset/')
+    index.class_counts()                 # boxes per class
+    index.boxes_for_image(12)            # one image's boxes
+    index.boxes_for_class('1F')          # every plum flower box
+    index.query(cls='RD', split='val', max_area=0.002)
+
+Both dataset layouts are read: images/<split>/ + labels/<split>/ (as in
+yolo_to_tfjs.py) and Roboflow's <split>/images/ + <split>/labels/.
+Dataset class ids are mapped by name onto the detector's 42-class table
+(public/models/mahjong-detector/metadata.yaml), so indexes of different
+exports agree. Boxes of names not in the table get class -1.
+
+The index is saved as an uncompressed .npz next to the dataset and
+reused while the label files (paths, sizes, mtimes) and the class table
+are unchanged. With mmap=True the box array is memory-mapped straight
+out of the .npz instead of read.
+"""
+
+import hashlib
+import os
+import time
+import zipfile
+
+import numpy as np
+import yaml
+
+from .layout import IMAGE_EXTENSIONS
+from .zipstream import SPLIT_KEYS, parse_label_text
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'public', 'models',
+                             'mahjong-detector', 'metadata.yaml')
+INDEX_NAME = 'label_index.npz'
+FORMAT_VERSION = 1
+
+BOX_DTYPE = np.dtype([('image', '<u4'), ('cls', 'i1'),
+                      ('x', '<f4'), ('y', '<f4'), ('w', '<f4'), ('h', '<f4')])
+
+
+def load_class_names(path=METADATA_PATH):
+    """Class names in id order from an ultralytics metadata.yaml or data.yaml."""
+    with open(path) as f:
+        names = yaml.safe_load(f)['names']
+    return [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+
+
+# ----------------------------------------
+# Dataset layout
+# ----------------------------------------
+
+def find_label_dirs(root):
+    """
+    [(split, labels dir, images dir)] for every labels folder under root,
+    in either layout: labels/<split>/ or <split>/labels/.
+    """
+    found = []
+    for dirpath, dirs, _ in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        parts = os.path.relpath(dirpath, root).split(os.sep)
+        if 'labels' not in parts:
+            continue
+        i = len(parts) - 1 - parts[::-1].index('labels')
+        if i == len(parts) - 2 and parts[-1] in SPLIT_KEYS:
+            split = SPLIT_KEYS[parts[-1]]
+        elif i == len(parts) - 1 and i > 0 and parts[i - 1] in SPLIT_KEYS:
+            split = SPLIT_KEYS[parts[i - 1]]
+        else:
+            continue
+        images = os.path.join(root, *parts[:i], 'images', *parts[i + 1:])
+        found.append((split, dirpath, images))
+    return found
+
+
+def _label_files(label_dirs):
+    """[(split, label path, image path or None)], sorted."""
+    files = []
+    for split, labels_dir, images_dir in label_dirs:
+        images = {}
+        if os.path.isdir(images_dir):
+            for entry in os.scandir(images_dir):
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in IMAGE_EXTENSIONS:
+                    images[stem] = entry.path
+        for entry in sorted(os.scandir(labels_dir), key=lambda e: e.name):
+            if entry.name.endswith('.txt'):
+                files.append((split, entry.path, images.get(entry.name[:-4])))
+    return files
+
+
+def _fingerprint(files, names, dataset_names, root):
+    h = hashlib.sha256(f'v{FORMAT_VERSION}:{",".join(names)}:{dataset_names}'.encode())
+    for split, label, _ in files:
+        st = os.stat(label)
+        h.update(f'\n{split}\t{os.path.relpath(label, root)}\t{st.st_size}\t{st.st_mtime_ns}'.encode())
+    return h.hexdigest()[:16]
+
+
+def _parse(text):
+    """(n, 5) float32 rows of a label file; fast path for plain 5-column files."""
+    values = text.split()
+    if len(values) % 5 == 0 and len(values) // 5 == sum(1 for line in text.splitlines() if line.strip()):
+        return np.array(values, dtype=np.float32).reshape(-1, 5)
+    return np.array(parse_label_text(text), dtype=np.float32).reshape(-1, 5)
+
+
+def _memmap_npz_member(path, name):
+    """Memory-map an array stored uncompressed in an .npz (as np.savez writes it)."""
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(f'{name}.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            return None
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        header = f.read(30)
+        start = info.header_offset + 30 + int.from_bytes(header[26:28], 'little') \
+            + int.from_bytes(header[28:30], 'little')
+        f.seek(start)
+        version = np.lib.format.read_magic(f)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        shape, fortran, dtype = read_header(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran else 'C')
+
+
+# ----------------------------------------
+# Index
+# ----------------------------------------
+
+class LabelIndex:
+    """
+    Boxes of a dataset plus the tables to query them.
+
+    boxes          BOX_DTYPE array sorted by image
+    images         image path per image id (label path if the image is missing)
+    splits         split name per image id
+    image_offsets  boxes of image i are boxes[image_offsets[i]:image_offsets[i + 1]]
+    class_order    box rows sorted by class
+    class_offsets  boxes of class c are boxes[class_order[class_offsets[c]:class_offsets[c + 1]]]
+    names          class names of the table
+    """
+
+    def __init__(self, arrays, path=None):
+        self.path = path
+        self.boxes = arrays['boxes']
+        self.images = arrays['images']
+        self.splits = arrays['splits']
+        self.image_offsets = arrays['image_offsets']
+        self.class_order = arrays['class_order']
+        self.class_offsets = arrays['class_offsets']
+        self.names = [str(n) for n in arrays['names']]
+        self.fingerprint = str(arrays['fingerprint'])
+        self.unmapped = [str(n) for n in arrays['unmapped']]
+        self._class_ids = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def build(cls, root, path=None, metadata=METADATA_PATH, rebuild=False, mmap=False):
+        """
+        Index the dataset at root, or load the saved index when it is
+        still current. path defaults to <root>/label_index.npz.
+        """
+        path = path or os.path.join(root, INDEX_NAME)
+        names = load_class_names(metadata)
+        files = _label_files(find_label_dirs(root))
+        dataset_names = dataset_class_names(root)
+        fingerprint = _fingerprint(files, names, dataset_names, root)
+
+        if not rebuild and os.path.exists(path):
+            index = cls.load(path, mmap)
+            if index.fingerprint == fingerprint:
+                return index
+
+        start = time.perf_counter()
+        table = {name: i for i, name in enumerate(names)}
+        lookup, unmapped = _class_lookup(dataset_names, table, len(names))
+
+        counts = np.zeros(len(files), dtype=np.int64)
+        rows = []
+        for i, (_, label, _) in enumerate(files):
+            with open(label) as f:
+                parsed = _parse(f.read())
+            counts[i] = len(parsed)
+            rows.append(parsed)
+        parsed = np.concatenate(rows) if rows else np.zeros((0, 5), dtype=np.float32)
+
+        boxes = np.empty(len(parsed), dtype=BOX_DTYPE)
+        boxes['image'] = np.repeat(np.arange(len(files), dtype=np.uint32), counts)
+        source_cls = parsed[:, 0].astype(np.int64)
+        known = (source_cls >= 0) & (source_cls < len(lookup))
+        boxes['cls'] = np.where(known, lookup[np.clip(source_cls, 0, len(lookup) - 1)], -1)
+        for j, field in enumerate('xywh', start=1):
+            boxes[field] = parsed[:, j]
+
+        class_order = np.argsort(boxes['cls'], kind='stable').astype(np.uint32)
+        mapped = boxes['cls'][boxes['cls'] >= 0]
+        class_offsets = np.concatenate([[0], np.cumsum(np.bincount(mapped, minlength=len(names)))])
+        # Unmapped (-1) boxes sort first; shift so class c starts after them
+        class_offsets += int((boxes['cls'] < 0).sum())
+
+        arrays = {
+            'boxes': boxes,
+            'images': np.array([image or label for _, label, image in files], dtype=str),
+            'splits': np.array([split for split, _, _ in files], dtype=str),
+            'image_offsets': np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            'class_order': class_order,
+            'class_offsets': class_offsets.astype(np.int64),
+            'names': np.array(names, dtype=str),
+            'fingerprint': np.array(fingerprint),
+            'unmapped': np.array(unmapped, dtype=str),
+        }
+        tmp = f'{path}.tmp-{os.getpid()}.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        print(f"🗂️  Indexed {len(boxes)} boxes in {len(files)} label files "
+              f"in {time.perf_counter() - start:.1f}s: {path}")
+        if unmapped:
+            print(f"   ⚠️  Classes not in the detector table (class -1): {', '.join(unmapped)}")
+        return cls.load(path, mmap) if mmap else cls(arrays, path)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files if not (mmap and key == 'boxes')}
+        if mmap:
+            arrays['boxes'] = _memmap_npz_member(path, 'boxes')
+            if arrays['boxes'] is None:
+                with np.load(path) as data:
+                    arrays['boxes'] = data['boxes']
+        return cls(arrays, path)
+
+    # ----------------------------------------
+    # Queries
+    # ----------------------------------------
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @property
+    def num_images(self):
+        return len(self.images)
+
+    def class_id(self, cls):
+        """Class id from a name ('1F') or an id."""
+        if isinstance(cls, str):
+            if cls not in self._class_ids:
+                raise KeyError(f"Unknown class '{cls}'")
+            return self._class_ids[cls]
+        return int(cls)
+
+    def image_id(self, image):
+        """Image id from an id or a path."""
+        if isinstance(image, str):
+            matches = np.flatnonzero(self.images == image)
+            if not len(matches):
+                raise KeyError(f"Image not in the index: {image}")
+            return int(matches[0])
+        return int(image)
+
+    def boxes_for_image(self, image):
+        i = self.image_id(image)
+        return self.boxes[self.image_offsets[i]:self.image_offsets[i + 1]]
+
+    def rows_for_class(self, cls):
+        c = self.class_id(cls)
+        return self.class_order[self.class_offsets[c]:self.class_offsets[c + 1]]
+
+    def boxes_for_class(self, cls):
+        return self.boxes[self.rows_for_class(cls)]
+
+    def images_with_class(self, cls):
+        """Sorted ids of the images with at least one box of cls."""
+        return np.unique(self.boxes['image'][self.rows_for_class(cls)])
+
+    def class_counts(self, split=None):
+        """Boxes per class id (optionally of one split)."""
+        cls = self.boxes['cls']
+        if split is not None:
+            cls = cls[self.splits[self.boxes['image']] == split]
+        return np.bincount(cls[cls >= 0], minlength=len(self.names))
+
+    def image_class_counts(self, split=None):
+        """Images containing each class id (optionally of one split)."""
+        keep = self.boxes['cls'] >= 0
+        if split is not None:
+            keep &= self.splits[self.boxes['image']] == split
+        pairs = np.unique(self.boxes['image'][keep].astype(np.int64) * len(self.names)
+                          + self.boxes['cls'][keep])
+        return np.bincount(pairs % len(self.names), minlength=len(self.names))
+
+    def query(self, cls=None, split=None, image=None, min_area=None, max_area=None,
+              min_side=None, max_side=None):
+        """
+        Row numbers of the boxes matching every given filter. Areas and
+        sides are in normalized image units (w * h, and min/max of w, h).
+        """
+        if cls is not None:
+            rows = self.rows_for_class(cls).astype(np.int64)
+        elif image is not None:
+            i = self.image_id(image)
+            rows = np.arange(self.image_offsets[i], self.image_offsets[i + 1])
+        else:
+            rows = np.arange(len(self.boxes))
+        boxes = self.boxes[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if image is not None and cls is not None:
+            keep &= boxes['image'] == self.image_id(image)
+        if split is not None:
+            keep &= self.splits[boxes['image']] == split
+        area = boxes['w'] * boxes['h']
+        if min_area is not None:
+            keep &= area >= min_area
+        if max_area is not None:
+            keep &= area <= max_area
+        if min_side is not None:
+            keep &= np.minimum(boxes['w'], boxes['h']) >= min_side
+        if max_side is not None:
+            keep &= np.maximum(boxes['w'], boxes['h']) <= max_side
+        return np.sort(rows[keep])
+
+
+def dataset_class_names(root):
+    """Class names of the dataset's data.yaml, or None."""
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in ('images', 'labels'))
+        if 'data.yaml' in files:
+            return load_class_names(os.path.join(dirpath, 'data.yaml'))
+    return None
+
+
+def _class_lookup(dataset_names, table, num_classes):
+    """Dataset class id -> table id array, and the dataset names not in the table."""
+    if dataset_names is None:
+        return np.arange(num_classes, dtype=np.int8), []
+    lookup = np.array([table.get(str(name), -1) for name in dataset_names], dtype=np.int8)
+    unmapped = [str(name) for name in dataset_names if str(name) not in table]
+    return lookup, unmapped
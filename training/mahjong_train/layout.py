@@ -0,0 +1,75 @@
+"""
+Class-per-folder dataset layout helpers.
+
+Pure Python (no TensorFlow import) so dataset sources and tools can use
+them without loading the training stack.
+"""
+
+import os
+import random
+
+from .organize import read_manifest
+
+# Same extensions flow_from_directory accepts
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+
+
+def list_image_files(data_dir):
+    """
+    Walk a class-per-folder dataset.
+
+    Returns (paths, labels, class_indices) where class_indices maps each
+    folder name to its label, sorted alphabetically exactly like
+    flow_from_directory does so the class mapping JSON is unchanged.
+
+    If the directory has a manifest written by the organizer, the file
+    list is read from it instead of listing every class folder.
+    """
+    manifest = read_manifest(data_dir)
+    if manifest is not None:
+        class_names = sorted({row['class'] for row in manifest})
+        class_indices = {name: idx for idx, name in enumerate(class_names)}
+        rows = sorted(manifest, key=lambda r: (class_indices[r['class']], r['path']))
+        paths = [os.path.join(data_dir, *row['path'].split('/')) for row in rows]
+        labels = [class_indices[row['class']] for row in rows]
+        return paths, labels, class_indices
+
+    class_names = sorted(
+        d for d in os.listdir(data_dir)
+        if os.path.isdir(os.path.join(data_dir, d)) and not d.startswith('.')
+    )
+    class_indices = {name: idx for idx, name in enumerate(class_names)}
+
+    paths = []
+    labels = []
+    for name in class_names:
+        class_dir = os.path.join(data_dir, name)
+        for fname in sorted(os.listdir(class_dir)):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_dir, fname))
+                labels.append(class_indices[name])
+
+    return paths, labels, class_indices
+
+
+def split_files(paths, labels, validation_split=0.2, seed=42):
+    """
+    Deterministic per-class train/validation split.
+
+    Each class is shuffled with a fixed seed and the first
+    round(n * validation_split) files go to validation, so every class is
+    represented in both subsets and reruns see the same split.
+    """
+    by_class = {}
+    for path, label in zip(paths, labels):
+        by_class.setdefault(label, []).append(path)
+
+    train, val = [], []
+    for label in sorted(by_class):
+        files = sorted(by_class[label])
+        random.Random(f'{seed}-{label}').shuffle(files)
+        n_val = int(round(len(files) * validation_split))
+        val.extend((p, label) for p in files[:n_val])
+        train.extend((p, label) for p in files[n_val:])
+
+    return train, val
@@ -0,0 +1,136 @@
+"""
+MobileNetV2 tile classifier and the two-phase training schedule.
+"""
+
+import functools
+
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+
+def _gpu_supports_float16():
+    """True if every visible GPU has tensor cores (compute capability 7.0+)."""
+    gpus = tf.config.list_physical_devices('GPU')
+    if not gpus:
+        return False
+    for gpu in gpus:
+        details = tf.config.experimental.get_device_details(gpu)
+        if details.get('compute_capability', (0, 0)) < (7, 0):
+            return False
+    return True
+
+
+def set_precision(fast):
+    """
+    Set the global Keras dtype policy before the model is built.
+
+    Fast mode uses mixed_float16 where the GPU supports it. CPUs and older
+    GPUs stay on float32 (float16 math is emulated there and slower), so
+    on those machines fast mode only adds XLA compilation. Returns the
+    policy name in effect.
+    """
+    policy = 'mixed_float16' if fast and _gpu_supports_float16() else 'float32'
+    keras.mixed_precision.set_global_policy(policy)
+    return policy
+
+
+def build_model(num_classes, img_size=224):
+    """
+    MobileNetV2 backbone (ImageNet weights, frozen) with a small dense head.
+
+    Returns (model, base_model) so the caller can unfreeze the backbone
+    for fine-tuning. The softmax output is always float32, so under a
+    mixed precision policy the probabilities and the loss keep full
+    precision.
+    """
+    base_model = keras.applications.MobileNetV2(
+        input_shape=(img_size, img_size, 3),
+        include_top=False,
+        weights='imagenet'
+    )
+    base_model.trainable = False
+
+    model = keras.Sequential([
+        base_model,
+        layers.GlobalAveragePooling2D(),
+        layers.Dropout(0.4),
+        layers.Dense(512, activation='relu'),
+        layers.BatchNormalization(),
+        layers.Dropout(0.4),
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
+    ], name='mahjong_detector')
+
+    return model, base_model
+
+
+def compile_model(model, learning_rate, jit_compile=False):
+    """
+    Compile with Adam and accuracy/top-3 metrics. Keras wraps the optimizer
+    in a LossScaleOptimizer automatically under mixed_float16.
+    """
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy', keras.metrics.TopKCategoricalAccuracy(k=3, name='top_3_accuracy')],
+        jit_compile=jit_compile
+    )
+
+
+def unfreeze_top_layers(base_model, num_layers):
+    """Make only the last num_layers of the backbone trainable."""
+    base_model.trainable = True
+    for layer in base_model.layers[:-num_layers]:
+        layer.trainable = False
+
+
+class FullModelCheckpoint(keras.callbacks.ModelCheckpoint):
+    """
+    ModelCheckpoint that saves another model than the one being fit.
+
+    Phase 1 on cached features fits a head that shares its layers with
+    the classifier; the checkpoint still has to be the whole classifier,
+    as in image training.
+    """
+
+    def __init__(self, saved_model, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saved_model = saved_model
+
+    def set_model(self, model):
+        super().set_model(self.saved_model)
+
+
+def phase_callbacks(min_lr, checkpoint_path=None, log_path=None, checkpoint_model=None):
+    """
+    Early stopping and LR decay shared by both phases, plus optional
+    logging. The checkpoint saves checkpoint_model if given, else the
+    model being fit.
+    """
+    callbacks = [
+        keras.callbacks.EarlyStopping(
+            monitor='val_accuracy',
+            patience=7,
+            restore_best_weights=True,
+            verbose=1
+        ),
+        keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss',
+            factor=0.5,
+            patience=3,
+            min_lr=min_lr,
+            verbose=1
+        ),
+    ]
+    if checkpoint_path:
+        checkpoint = (keras.callbacks.ModelCheckpoint if checkpoint_model is None
+                      else functools.partial(FullModelCheckpoint, checkpoint_model))
+        callbacks.append(checkpoint(
+            checkpoint_path,
+            monitor='val_accuracy',
+            save_best_only=True,
+            verbose=1
+        ))
+    if log_path:
+        callbacks.append(keras.callbacks.CSVLogger(log_path))
+    return callbacks
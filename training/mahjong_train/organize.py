@@ -0,0 +1,162 @@
+"""
+Organize the Camerash data.csv layout into class folders.
+
+Images are hardlinked (or symlinked) instead of copied, so the organized
+tree costs no extra disk space, and the work runs on a thread pool.
+Reruns are incremental: files already in place with the same size and
+mtime are skipped and their hash is reused from the previous manifest.
+
+The manifest (manifest.csv in the output directory) lists every
+organized file as path, class, sha1, size, mtime_ns so loaders can read
+it instead of walking the tree.
+"""
+
+import csv
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_FIELDS = ['path', 'class', 'sha1', 'size', 'mtime_ns']
+LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(data_dir):
+    """Return the manifest rows of an organized directory, or None if it has none."""
+    path = os.path.join(data_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def write_manifest(data_dir, rows):
+    path = os.path.join(data_dir, MANIFEST_NAME)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda r: r['path']))
+    os.replace(tmp, path)
+    return path
+
+
+def _place(src, dst, mode):
+    """Link or copy src to dst, falling back to a copy when linking fails."""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        if mode == 'hardlink':
+            os.link(src, dst)
+            return 'hardlink'
+        if mode == 'symlink':
+            os.symlink(os.path.abspath(src), dst)
+            return 'symlink'
+    except OSError:
+        pass
+    # copy2 keeps the mtime, so the next run can still skip this file
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def _organize_one(task, mode, previous):
+    src, rel_dst, tile_class, dst = task
+    st = os.stat(src)
+    old = previous.get(rel_dst)
+
+    try:
+        dst_st = os.stat(dst)
+        in_place = dst_st.st_size == st.st_size and dst_st.st_mtime_ns == st.st_mtime_ns
+    except FileNotFoundError:
+        in_place = False
+
+    if in_place:
+        action = 'skipped'
+    else:
+        action = _place(src, dst, mode)
+
+    if (old and action == 'skipped' and old['size'] == str(st.st_size)
+            and old['mtime_ns'] == str(st.st_mtime_ns)):
+        sha1 = old['sha1']
+    else:
+        sha1 = file_sha1(src)
+
+    row = {
+        'path': rel_dst,
+        'class': tile_class,
+        'sha1': sha1,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+    }
+    return row, action
+
+
+def organize_dataset(csv_path, images_dir, output_dir, mode='hardlink', workers=8):
+    """
+    Build output_dir/<class>/<image> from a data.csv with image and class
+    columns. Images missing from images_dir are skipped.
+
+    Returns the manifest path. Files from a previous run that are no
+    longer listed in the CSV are removed.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"mode must be one of {LINK_MODES}, got '{mode}'")
+
+    start = time.perf_counter()
+    previous = {r['path']: r for r in (read_manifest(output_dir) or [])}
+
+    tasks = []
+    missing = 0
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            src = os.path.join(images_dir, row['image'])
+            if not os.path.exists(src):
+                missing += 1
+                continue
+            tile_class = str(row['class'])
+            rel_dst = f"{tile_class}/{row['image']}"
+            tasks.append((src, rel_dst, tile_class, os.path.join(output_dir, tile_class, row['image'])))
+
+    for tile_class in {t[2] for t in tasks}:
+        os.makedirs(os.path.join(output_dir, tile_class), exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda t: _organize_one(t, mode, previous), tasks))
+
+    rows = [row for row, _ in results]
+    counts = {}
+    for _, action in results:
+        counts[action] = counts.get(action, 0) + 1
+
+    # Drop files a previous run placed that are no longer in the CSV
+    current = {row['path'] for row in rows}
+    removed = 0
+    for rel_path in previous.keys() - current:
+        try:
+            os.remove(os.path.join(output_dir, rel_path))
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    manifest_path = write_manifest(output_dir, rows)
+
+    elapsed = time.perf_counter() - start
+    summary = ', '.join(f'{n} {action}' for action, n in sorted(counts.items()))
+    num_classes = len({row['class'] for row in rows})
+    print(f"✅ Organized {len(rows)} images into {num_classes} classes "
+          f"in {elapsed:.1f}s ({summary or 'nothing to do'})")
+    if missing:
+        print(f"   ⚠️  {missing} images listed in {csv_path} were not found")
+    if removed:
+        print(f"   🧹 Removed {removed} files no longer in the CSV")
+    return manifest_path
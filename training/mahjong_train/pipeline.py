@@ -0,0 +1,190 @@
+"""
+End-to-end training run: data -> phase 1 -> phase 2 -> saved model.
+"""
+
+import os
+from datetime import datetime
+
+from .data import load_tile_datasets, ThroughputCallback, StepTimeCallback
+from .export import save_class_mapping
+from .model import build_model, compile_model, set_precision, unfreeze_top_layers, phase_callbacks
+from .sampling import ClassBalancedSampler
+
+
+def run_training(data_dir, config):
+    """
+    Train the tile classifier on a class-per-folder directory.
+
+    Returns a dict with the saved model and class mapping paths, the
+    class indices and both phases' Keras histories.
+    """
+    os.makedirs(config.output_dir, exist_ok=True)
+
+    print(f"📂 Using dataset: {data_dir}")
+    print(f"🖼️  Image size: {config.img_size}x{config.img_size}")
+    print(f"📦 Batch size: {config.batch_size}")
+    print(f"🔄 Epochs: {config.epochs} + {config.fine_tune_epochs} fine-tuning")
+    print()
+
+    print("📥 Building tf.data pipeline...")
+    train_data, validation_data, data_info = load_tile_datasets(
+        data_dir,
+        img_size=config.img_size,
+        batch_size=config.batch_size,
+        validation_split=config.validation_split,
+        seed=config.seed,
+        cache_dir=config.cache_dir,
+        balance=config.balance,
+        balance_power=config.balance_power
+    )
+    class_indices = data_info['class_indices']
+    train_samples = data_info['train_samples']
+    num_classes = len(class_indices)
+
+    print(f"\n✅ Found {num_classes} tile classes")
+    print(f"📊 Training samples: {train_samples}")
+    print(f"📊 Validation samples: {data_info['val_samples']}")
+    print(f"\n🏷️  Classes: {list(class_indices.keys())[:10]}...")
+    if config.balance != 'none':
+        sampler = data_info['sampler']
+        shares = sampler.class_shares()
+        rarest = sampler.counts.argmin()
+        print(f"⚖️  Class balance: {config.balance} (power {config.balance_power}); rarest class "
+              f"{list(class_indices)[rarest]} has {sampler.counts[rarest]} images, "
+              f"{shares[rarest]:.1%} of each epoch")
+    print()
+
+    # Set after the datasets are built so the augmentation layers stay float32
+    policy = set_precision(config.fast)
+    if config.fast:
+        print(f"⚡ Fast training: {policy} policy, XLA (jit_compile=True)")
+
+    print("🏗️  Building model with MobileNetV2...")
+    model, base_model = build_model(num_classes, config.img_size)
+    compile_model(model, config.learning_rate, jit_compile=config.fast)
+    print(f"Total parameters: {model.count_params():,}")
+    print()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def out(name):
+        return os.path.join(config.output_dir, name)
+
+    # Phase 1: frozen backbone
+    print("🚀 Starting training (Phase 1: Transfer Learning)...")
+    print("=" * 50)
+    step_timer = StepTimeCallback()
+    if config.feature_cache:
+        history = train_head_on_features(model, base_model, data_info, num_classes, config,
+                                         step_timer,
+                                         checkpoint_path=out(f'best_model_{timestamp}.h5'),
+                                         log_path=out(f'training_log_{timestamp}.csv'))
+    else:
+        history = model.fit(
+            train_data,
+            validation_data=validation_data,
+            epochs=config.epochs,
+            class_weight=data_info['class_weight'],
+            callbacks=[
+                ThroughputCallback(train_samples),
+                step_timer,
+                *phase_callbacks(
+                    min_lr=1e-7,
+                    checkpoint_path=out(f'best_model_{timestamp}.h5'),
+                    log_path=out(f'training_log_{timestamp}.csv')
+                ),
+            ],
+            verbose=1
+        )
+
+    print("\n" + "=" * 50)
+    print("✅ Phase 1 Complete!")
+    print(f"Best accuracy: {max(history.history['accuracy']):.2%}")
+    print(f"Best validation accuracy: {max(history.history['val_accuracy']):.2%}")
+    print(f"Mean step time: {step_timer.mean_ms:.1f} ms ({policy})")
+
+    # Phase 2: fine-tune the top of the backbone
+    print("\n🔧 Starting fine-tuning (Phase 2)...")
+    print("=" * 50)
+    unfreeze_top_layers(base_model, config.fine_tune_layers)
+    compile_model(model, config.fine_tune_learning_rate, jit_compile=config.fast)
+
+    history_fine = model.fit(
+        train_data,
+        validation_data=validation_data,
+        epochs=config.fine_tune_epochs,
+        class_weight=data_info['class_weight'],
+        callbacks=[ThroughputCallback(train_samples), *phase_callbacks(min_lr=1e-8)],
+        verbose=1
+    )
+
+    print("\n" + "=" * 50)
+    print("✅ Phase 2 Complete!")
+
+    model_path = out(f'mahjong_detector_{timestamp}.h5')
+    model.save(model_path)
+    print(f"\n💾 Model saved: {model_path}")
+
+    mapping_path = save_class_mapping(class_indices, out(f'class_mapping_{timestamp}.json'))
+    print(f"💾 Class mapping saved: {mapping_path}")
+
+    print("\n" + "=" * 50)
+    print("🎉 TRAINING COMPLETE!")
+    print("=" * 50)
+    print(f"Final Training Accuracy: {history_fine.history['accuracy'][-1]:.2%}")
+    print(f"Final Validation Accuracy: {history_fine.history['val_accuracy'][-1]:.2%}")
+    print(f"Final Top-3 Accuracy: {history_fine.history['top_3_accuracy'][-1]:.2%}")
+    print()
+
+    return {
+        'model_path': model_path,
+        'mapping_path': mapping_path,
+        'class_indices': class_indices,
+        'policy': policy,
+        'history': history.history,
+        'history_fine': history_fine.history,
+    }
+
+
+def train_head_on_features(model, base_model, data_info, num_classes, config,
+                           step_timer, checkpoint_path=None, log_path=None):
+    """
+    Phase 1 on cached backbone features: only the head layers are trained,
+    and they are shared with `model`, so it is ready for phase 2 afterwards.
+    The checkpoint at checkpoint_path is the full `model`, as in image training.
+    """
+    from .features import cache_features, feature_dataset, feature_extractor, head_model
+
+    extractor = feature_extractor(base_model)
+    cache_dir = os.path.join(config.work_dir, 'feature-cache')
+    train_features, train_labels = cache_features(
+        extractor, data_info['train_files'], num_classes, cache_dir, config.img_size,
+        augment_copies=config.feature_augment_copies, seed=config.seed
+    )
+    val_features, val_labels = cache_features(
+        extractor, data_info['val_files'], num_classes, cache_dir, config.img_size,
+        seed=config.seed
+    )
+
+    head = head_model(model, train_features.shape[1])
+    compile_model(head, config.learning_rate, jit_compile=config.fast)
+    sampler = None
+    if config.balance == 'oversample':
+        # Augmented copies add rows, so draw over the cached labels themselves
+        sampler = ClassBalancedSampler(train_labels, num_classes, config.balance,
+                                       config.balance_power, config.seed)
+
+    return head.fit(
+        feature_dataset(train_features, train_labels, num_classes, config.batch_size,
+                        training=True, seed=config.seed, sampler=sampler),
+        validation_data=feature_dataset(val_features, val_labels, num_classes, config.batch_size),
+        epochs=config.epochs,
+        class_weight=data_info['class_weight'],
+        callbacks=[
+            ThroughputCallback(len(train_labels)),
+            step_timer,
+            *phase_callbacks(min_lr=1e-7, checkpoint_path=checkpoint_path, log_path=log_path,
+                             checkpoint_model=model),
+        ],
+        verbose=1
+    )
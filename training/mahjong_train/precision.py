@@ -0,0 +1,83 @@
+"""
+Side-by-side comparison of float32 and fast (mixed precision + XLA) training.
+
+Both runs use the same data, seed and number of phase-1 epochs, then
+evaluate top-1/top-3 accuracy on the same validation split, so the
+step-time gain can be checked against any accuracy cost.
+"""
+
+import json
+
+import tensorflow as tf
+from tensorflow import keras
+
+from .data import load_tile_datasets, StepTimeCallback
+from .model import build_model, compile_model, set_precision
+
+
+def train_and_measure(fast, train_data, validation_data, num_classes, config,
+                      epochs, steps_per_epoch=None):
+    """Train the frozen-backbone phase in one mode and return timing and accuracy."""
+    keras.backend.clear_session()
+    policy = set_precision(fast)
+    tf.keras.utils.set_random_seed(config.seed)
+
+    model, _ = build_model(num_classes, config.img_size)
+    compile_model(model, config.learning_rate, jit_compile=fast)
+
+    timer = StepTimeCallback()
+    model.fit(
+        train_data,
+        epochs=epochs,
+        steps_per_epoch=steps_per_epoch,
+        callbacks=[timer],
+        verbose=2
+    )
+    _, accuracy, top_3 = model.evaluate(validation_data, verbose=0)
+
+    return {
+        'mode': 'fast' if fast else 'float32',
+        'policy': policy,
+        'jit_compile': fast,
+        'mean_step_ms': timer.mean_ms,
+        'first_step_s': timer.first_step,
+        'val_accuracy': float(accuracy),
+        'val_top_3_accuracy': float(top_3),
+    }
+
+
+def compare_precision(data_dir, config, epochs=3, steps_per_epoch=None, report_path=None):
+    """Run both modes and print a comparison table. Returns the two result dicts."""
+    train_data, validation_data, info = load_tile_datasets(
+        data_dir,
+        img_size=config.img_size,
+        batch_size=config.batch_size,
+        validation_split=config.validation_split,
+        seed=config.seed,
+        cache_dir=config.cache_dir
+    )
+    num_classes = len(info['class_indices'])
+
+    results = []
+    for fast in (False, True):
+        print(f"\n🏃 Training {'fast' if fast else 'float32'} baseline for {epochs} epochs...")
+        results.append(train_and_measure(fast, train_data, validation_data, num_classes,
+                                         config, epochs, steps_per_epoch))
+    set_precision(False)
+
+    baseline, fast = results
+    print("\n" + "=" * 64)
+    print(f"{'mode':10s} {'policy':14s} {'ms/step':>9s} {'compile s':>10s} {'top-1':>8s} {'top-3':>8s}")
+    for r in results:
+        print(f"{r['mode']:10s} {r['policy']:14s} {r['mean_step_ms']:9.1f} "
+              f"{r['first_step_s']:10.1f} {r['val_accuracy']:8.2%} {r['val_top_3_accuracy']:8.2%}")
+    print("=" * 64)
+    print(f"Speedup: {baseline['mean_step_ms'] / fast['mean_step_ms']:.2f}x, "
+          f"top-1 change {fast['val_accuracy'] - baseline['val_accuracy']:+.2%}, "
+          f"top-3 change {fast['val_top_3_accuracy'] - baseline['val_top_3_accuracy']:+.2%}")
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Report saved: {report_path}")
+    return results
@@ -0,0 +1,202 @@
+"""
+Quantized TF.js export with an accuracy gate.
+
+Exports the trained classifier once per weight format (float32, float16,
+uint16, uint8 via tensorflowjs_converter --quantize_*), measures each
+variant's size and load time, and scores it on a held-out tile set.
+The smallest variant whose top-1 accuracy is within the tolerance of the
+float32 baseline is picked.
+
+Each variant is scored by running the exported graph model itself in
+Node (js/tfjs_eval.mjs, on the app's @tensorflow/tfjs), so the gate sees
+what the browser loads: the converter's folded BatchNorm and its
+per-tensor quantization included. Run `npm install` at the repository
+root first.
+"""
+
+import glob
+import json
+import os
+import shutil
+import struct
+import subprocess
+import time
+
+import numpy as np
+
+from .export import export_tfjs
+
+TFJS_EVAL = os.path.join(os.path.dirname(__file__), 'js', 'tfjs_eval.mjs')
+
+VARIANTS = {
+    'float32': (),
+    'float16': ('--quantize_float16=*',),
+    'uint16': ('--quantize_uint16=*',),
+    'uint8': ('--quantize_uint8=*',),
+}
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, f))
+               for root, _, files in os.walk(path) for f in files)
+
+
+def measure_load(model_dir):
+    """
+    Read model.json and every weight shard, decoding them as the browser
+    would. Returns seconds; download time on top of this scales with size.
+    """
+    start = time.perf_counter()
+    with open(os.path.join(model_dir, 'model.json')) as f:
+        manifest = json.load(f)
+    for group in manifest.get('weightsManifest', []):
+        buffer = b''.join(open(os.path.join(model_dir, p), 'rb').read() for p in group['paths'])
+        offset = 0
+        for spec in group['weights']:
+            quant = spec.get('quantization')
+            dtype = np.dtype(quant['dtype'] if quant else spec['dtype'])
+            count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+            data = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+            # Dequantize like tf.loadGraphModel does
+            if quant and 'scale' in quant:
+                data = data.astype(np.float32) * quant['scale'] + quant['min']
+            elif quant:
+                data = data.astype(np.float32)
+    return time.perf_counter() - start
+
+
+class TfjsModel:
+    """An exported TF.js graph model running in a Node process."""
+
+    def __init__(self, model_dir, node='node'):
+        self.process = subprocess.Popen([node, TFJS_EVAL, model_dir], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        line = self.process.stdout.readline()
+        if not line or not json.loads(line).get('ready'):
+            error = self.process.stderr.read().decode(errors='replace').strip()
+            raise RuntimeError(f"Could not load {model_dir} in Node: {error}")
+
+    def top_3(self, images):
+        """Top-3 class indices of a float32 (N, H, W, 3) batch in [0, 1]."""
+        images = np.ascontiguousarray(images, dtype='<f4')
+        n, height, width, _ = images.shape
+        self.process.stdin.write(struct.pack('<3I', n, height, width) + images.tobytes())
+        self.process.stdin.flush()
+        return np.array(json.loads(self.process.stdout.readline()), dtype=np.int64).reshape(n, 3)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.write(struct.pack('<3I', 0, 0, 0))
+            self.process.stdin.close()
+            self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def evaluate_variant(variant_dir, eval_data, node='node'):
+    """Top-1/top-3 accuracy of the exported TF.js model in variant_dir."""
+    top_1 = top_3 = total = 0
+    with TfjsModel(variant_dir, node) as model:
+        for images, labels in eval_data:
+            labels = np.argmax(labels.numpy(), axis=1)
+            predicted = model.top_3(images.numpy())
+            top_1 += int((predicted[:, 0] == labels).sum())
+            top_3 += int((predicted == labels[:, None]).any(axis=1).sum())
+            total += len(labels)
+    return top_1 / total, top_3 / total
+
+
+def eval_dataset(eval_dir, mapping_path, img_size=224, batch_size=32):
+    """
+    Held-out class-per-folder set, labelled with the model's class indices
+    from its class mapping JSON.
+    """
+    from .data import make_dataset
+    from .layout import list_image_files
+
+    with open(mapping_path) as f:
+        model_indices = {name: int(idx) for idx, name in json.load(f).items()}
+
+    paths, labels, class_indices = list_image_files(eval_dir)
+    names = {idx: name for name, idx in class_indices.items()}
+    unknown = sorted(set(class_indices) - set(model_indices))
+    if unknown:
+        raise ValueError(f"Classes in {eval_dir} not known to the model: {unknown}")
+
+    samples = [(p, model_indices[names[l]]) for p, l in zip(paths, labels)]
+    return make_dataset(samples, len(model_indices), img_size, batch_size), len(samples)
+
+
+def quantize_and_select(model_path, mapping_path, eval_dir, output_dir,
+                        tolerance=0.005, variants=tuple(VARIANTS), deploy_dir=None,
+                        img_size=224, node='node'):
+    """
+    Export every variant, score it and pick the smallest one whose top-1
+    accuracy is at most `tolerance` (absolute) below float32.
+
+    Writes quantization_report.json to output_dir and, with deploy_dir,
+    copies the chosen variant there, replacing the previous model's
+    model.json and weight shards. Returns the report dict.
+    """
+    eval_data, eval_count = eval_dataset(eval_dir, mapping_path, img_size)
+    print(f"🧪 Held-out set: {eval_count} images from {eval_dir}")
+
+    results = []
+    for variant in variants:
+        variant_dir = os.path.join(output_dir, variant)
+        if os.path.exists(variant_dir):
+            shutil.rmtree(variant_dir)
+        print(f"\n🔄 Exporting {variant}...")
+        export_tfjs(model_path, variant_dir, mapping_path, extra_args=VARIANTS[variant])
+
+        accuracy, top_3 = evaluate_variant(variant_dir, eval_data, node)
+        results.append({
+            'variant': variant,
+            'path': variant_dir,
+            'size_bytes': directory_size(variant_dir),
+            'load_seconds': measure_load(variant_dir),
+            'top_1': accuracy,
+            'top_3': top_3,
+        })
+
+    baseline = next((r for r in results if r['variant'] == 'float32'), None)
+    reference = baseline['top_1'] if baseline else max(r['top_1'] for r in results)
+    eligible = [r for r in results if r['top_1'] >= reference - tolerance]
+    chosen = min(eligible, key=lambda r: r['size_bytes']) if eligible else baseline
+
+    print("\n" + "=" * 66)
+    print(f"{'variant':9s} {'size':>10s} {'load ms':>9s} {'top-1':>8s} {'top-3':>8s}")
+    for r in results:
+        mark = '  ← chosen' if r is chosen else ''
+        print(f"{r['variant']:9s} {r['size_bytes'] / 1e6:8.2f}MB {r['load_seconds'] * 1000:9.1f} "
+              f"{r['top_1']:8.2%} {r['top_3']:8.2%}{mark}")
+    print("=" * 66)
+
+    report = {
+        'model': model_path,
+        'eval_dir': eval_dir,
+        'eval_images': eval_count,
+        'tolerance': tolerance,
+        'chosen': chosen['variant'] if chosen else None,
+        'variants': results,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, 'quantization_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report saved: {report_path}")
+
+    if deploy_dir and chosen:
+        os.makedirs(deploy_dir, exist_ok=True)
+        # Shards of the previous model would otherwise sit next to the new ones
+        for stale in glob.glob(os.path.join(deploy_dir, 'group*-shard*of*.bin')):
+            os.remove(stale)
+        shutil.copytree(chosen['path'], deploy_dir, dirs_exist_ok=True)
+        print(f"📦 Deployed {chosen['variant']} to {deploy_dir}")
+
+    return report
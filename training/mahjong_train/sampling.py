@@ -0,0 +1,256 @@
+"""
+Class-balanced sampling for the classifier and the detector.
+
+Suited tiles outnumber the flowers, seasons and some honours by a wide
+margin, so uniform shuffling spends most of each epoch on classes the
+model already knows.
+
+Classifier (one label per image): ClassBalancedSampler builds one index
+array per class once and draws every epoch from it.
+
+    mode 'oversample'  each epoch has the usual number of samples, but
+                       class c makes up a share proportional to
+                       count_c ** (1 - power): 0 keeps the natural mix,
+                       1 gives every class the same share. Within a class
+                       no image repeats before all of them have been seen.
+    mode 'reweight'    uniform shuffling; the loss of class c is weighted
+                       by count_c ** -power instead (Keras class_weight).
+    mode 'none'        uniform shuffling, as before.
+
+Detector (many boxes per image): repeat-factor sampling. A class seen in
+a fraction f_c of the training images gets r_c = max(1, (t / f_c) ** power),
+an image is repeated max r_c over its classes times (stochastically
+rounded), and the repeated list is written as an ultralytics train.txt.
+stratified_image_split re-splits train/val so every class keeps its share
+of images in validation.
+"""
+
+import os
+
+import numpy as np
+import yaml
+
+BALANCE_MODES = ('none', 'oversample', 'reweight')
+
+
+def class_index(labels, num_classes):
+    """
+    Rows of each class: (order, offsets) where the rows of class c are
+    order[offsets[c]:offsets[c + 1]], in increasing order.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    order = np.argsort(labels, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=num_classes))])
+    return order, offsets
+
+
+def _largest_remainder(shares, total):
+    """Integer counts proportional to shares that sum to total."""
+    exact = shares * total
+    counts = np.floor(exact).astype(np.int64)
+    short = total - counts.sum()
+    if short > 0:
+        counts[np.argsort(counts - exact, kind='stable')[:short]] += 1
+    return counts
+
+
+class ClassBalancedSampler:
+    """
+    Per-epoch row orders over single-label samples.
+
+    epoch_indices(e) is deterministic for a given seed and epoch;
+    next_epoch() returns the following epoch each call, which is what
+    the tf.data pipeline uses so every pass over the dataset is a new
+    draw.
+    """
+
+    def __init__(self, labels, num_classes=None, mode='oversample', power=0.5, seed=42):
+        if mode not in BALANCE_MODES:
+            raise ValueError(f"Unknown balance mode '{mode}' (choose from {', '.join(BALANCE_MODES)})")
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.num_classes = num_classes or int(self.labels.max()) + 1
+        self.mode = mode
+        self.power = power
+        self.seed = seed
+        self.order, self.offsets = class_index(self.labels, self.num_classes)
+        self.counts = np.diff(self.offsets)
+        self.epoch = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def class_shares(self):
+        """Expected fraction of each epoch drawn from each class."""
+        if self.mode != 'oversample':
+            return self.counts / max(len(self), 1)
+        present = self.counts > 0
+        weights = np.zeros(self.num_classes)
+        weights[present] = self.counts[present] ** (1.0 - self.power)
+        return weights / weights.sum()
+
+    def class_weight(self):
+        """Keras class_weight dict in 'reweight' mode (mean sample weight 1), else None."""
+        if self.mode != 'reweight':
+            return None
+        present = self.counts > 0
+        weights = np.zeros(self.num_classes)
+        weights[present] = self.counts[present] ** -self.power
+        weights *= len(self) / (self.counts * weights).sum()
+        return {c: float(w) for c, w in enumerate(weights)}
+
+    def epoch_indices(self, epoch):
+        """Sample rows of one epoch, shuffled."""
+        rng = np.random.default_rng([self.seed, epoch])
+        if self.mode != 'oversample':
+            return rng.permutation(len(self))
+
+        draws = _largest_remainder(self.class_shares(), len(self))
+        parts = []
+        for c in np.flatnonzero(draws):
+            members = self.order[self.offsets[c]:self.offsets[c + 1]]
+            full, rest = divmod(int(draws[c]), len(members))
+            parts.extend(rng.permutation(members) for _ in range(full))
+            parts.append(rng.choice(members, rest, replace=False))
+        rows = np.concatenate(parts)
+        rng.shuffle(rows)
+        return rows
+
+    def next_epoch(self):
+        rows = self.epoch_indices(self.epoch)
+        self.epoch += 1
+        return rows.astype(np.int64)
+
+    def batches(self, batch_size, epoch):
+        """Row arrays of one epoch, batch_size at a time."""
+        rows = self.epoch_indices(epoch)
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+
+# ----------------------------------------
+# Detector datasets
+# ----------------------------------------
+
+def image_classes(index):
+    """(offsets, classes): the distinct classes of image i are classes[offsets[i]:offsets[i + 1]]."""
+    keep = index.boxes['cls'] >= 0
+    k = len(index.names)
+    pairs = np.unique(index.boxes['image'][keep].astype(np.int64) * k + index.boxes['cls'][keep])
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(pairs // k, minlength=index.num_images))])
+    return offsets, (pairs % k).astype(np.int64)
+
+
+def repeat_factors(index, images, threshold=0.1, power=0.5):
+    """
+    Repeat factor of each image id in images: max over its classes of
+    max(1, (threshold / f_c) ** power), with f_c the fraction of these
+    images containing class c. Images without boxes get 1.
+    """
+    images = np.asarray(images, dtype=np.int64)
+    offsets, classes = image_classes(index)
+    k = len(index.names)
+    per_image = [classes[offsets[i]:offsets[i + 1]] for i in images]
+    freq = np.bincount(np.concatenate(per_image + [np.zeros(0, np.int64)]), minlength=k) / max(len(images), 1)
+    class_factor = np.ones(k)
+    seen = freq > 0
+    class_factor[seen] = np.maximum(1.0, (threshold / freq[seen]) ** power)
+    return np.array([class_factor[c].max() if len(c) else 1.0 for c in per_image])
+
+
+def stratified_image_split(index, validation_split=0.2, seed=42):
+    """
+    (train ids, val ids) over every image of the index, so each class
+    keeps about validation_split of its images in validation.
+
+    Iterative stratification: images are placed rarest class first, each
+    into the subset that still needs more of that class.
+    """
+    offsets, classes = image_classes(index)
+    k = len(index.names)
+    n_images = np.bincount(classes, minlength=k)
+    need = np.stack([n_images * (1 - validation_split), n_images * validation_split])
+    total_need = np.array([index.num_images * (1 - validation_split),
+                           index.num_images * validation_split])
+
+    rarest = np.full(index.num_images, np.iinfo(np.int64).max)
+    for i in range(index.num_images):
+        c = classes[offsets[i]:offsets[i + 1]]
+        if len(c):
+            rarest[i] = n_images[c].min()
+    tiebreak = np.random.default_rng(seed).permutation(index.num_images)
+    order = np.lexsort((tiebreak, rarest))
+
+    subset = np.zeros(index.num_images, dtype=np.int8)
+    for i in order:
+        c = classes[offsets[i]:offsets[i + 1]]
+        if len(c):
+            target = c[np.argmin(n_images[c])]
+            choice = int(np.argmax(need[:, target])) if need[0, target] != need[1, target] \
+                else int(np.argmax(total_need))
+            need[choice, c] -= 1
+        else:
+            choice = int(np.argmax(total_need))
+        total_need[choice] -= 1
+        subset[i] = choice
+    return np.flatnonzero(subset == 0), np.flatnonzero(subset == 1)
+
+
+def write_balanced_yolo(index, output_dir, threshold=0.1, power=0.5, seed=42,
+                        stratify=False, validation_split=0.2, names=None):
+    """
+    Write train.txt (images repeated by their repeat factor), val.txt and
+    a data.yaml that points at them into output_dir.
+
+    The existing train/val split is kept unless stratify is set. names
+    are the dataset's own class names (its label files are not
+    rewritten); they default to the index's class table. Returns
+    (data_yaml, report).
+    """
+    has_image = np.array([not str(p).endswith('.txt') for p in index.images])
+    if stratify:
+        train, val = stratified_image_split(index, validation_split, seed)
+    else:
+        train = np.flatnonzero(index.splits == 'train')
+        val = np.flatnonzero(index.splits == 'val')
+    train, val = train[has_image[train]], val[has_image[val]]
+
+    factors = repeat_factors(index, train, threshold, power)
+    rng = np.random.default_rng(seed)
+    repeats = np.floor(factors).astype(np.int64)
+    repeats += rng.random(len(factors)) < factors - repeats
+    train_list = np.repeat(train, repeats)
+    rng.shuffle(train_list)
+
+    os.makedirs(output_dir, exist_ok=True)
+    lists = {}
+    for split, ids in (('train', train_list), ('val', val)):
+        lists[split] = os.path.join(os.path.abspath(output_dir), f'{split}.txt')
+        with open(lists[split], 'w') as f:
+            f.writelines(f'{os.path.abspath(str(index.images[i]))}\n' for i in ids)
+
+    names = list(names or index.names)
+    data_yaml = os.path.join(output_dir, 'data.yaml')
+    with open(data_yaml, 'w') as f:
+        yaml.safe_dump({'train': lists['train'], 'val': lists['val'],
+                        'nc': len(names), 'names': names}, f, sort_keys=False)
+
+    offsets, classes = image_classes(index)
+    k = len(index.names)
+
+    def class_images(ids):
+        return np.bincount(np.concatenate([classes[offsets[i]:offsets[i + 1]] for i in ids]
+                                          + [np.zeros(0, np.int64)]), minlength=k)
+
+    report = {
+        'train_images': int(len(train)),
+        'train_entries': int(len(train_list)),
+        'val_images': int(len(val)),
+        'max_repeat': float(factors.max()) if len(factors) else 1.0,
+        'stratified': stratify,
+        'classes': {
+            name: {'train_images': int(a), 'sampled': int(b), 'val_images': int(v)}
+            for name, a, b, v in zip(index.names, class_images(train),
+                                     class_images(train_list), class_images(val))
+        },
+    }
+    return data_yaml, report
@@ -0,0 +1,264 @@
+"""
+Pluggable dataset sources.
+
+Each source turns one of the raw dataset layouts we have trained on into
+a class-per-folder directory that the input pipeline can read. Sources
+never download anything or prompt; point them at data that is already
+on disk (a clone, an unzipped export or the zip itself).
+"""
+
+import io
+import os
+import posixpath
+import zipfile
+
+from .layout import IMAGE_EXTENSIONS
+from .organize import organize_dataset
+from .zipstream import ZipDatasetIndex, parse_label_text
+
+SOURCES = {}
+
+
+def register_source(cls):
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def get_source(name, path, work_dir):
+    if name not in SOURCES:
+        raise ValueError(f"Unknown dataset source '{name}'. Choose from: {', '.join(sorted(SOURCES))}")
+    return SOURCES[name](path, work_dir)
+
+
+def _has_images(directory):
+    return any(f.lower().endswith(IMAGE_EXTENSIONS) for f in os.listdir(directory))
+
+
+def find_class_root(path, min_classes=10):
+    """
+    Find the first directory under path whose subfolders look like tile
+    classes (at least min_classes subfolders, the first of which has images).
+    """
+    for root, dirs, _ in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        if len(dirs) >= min_classes and _has_images(os.path.join(root, dirs[0])):
+            return root
+    return None
+
+
+def extract_zip(zip_path, dest):
+    """Extract zip_path into dest once; later calls reuse the extracted tree."""
+    marker = os.path.join(dest, '.extracted')
+    if not os.path.exists(marker):
+        os.makedirs(dest, exist_ok=True)
+        with zipfile.ZipFile(zip_path) as zf:
+            zf.extractall(dest)
+        open(marker, 'w').close()
+    return dest
+
+
+class DatasetSource:
+    """
+    Base class for dataset sources.
+
+    Subclasses set `name` and implement prepare(), which returns the path
+    of a class-per-folder image directory.
+    """
+
+    name = None
+    description = ''
+
+    def __init__(self, path, work_dir):
+        self.path = path
+        self.work_dir = os.path.join(work_dir, self.name)
+
+    def prepare(self):
+        raise NotImplementedError
+
+    def _unpacked(self):
+        """self.path, extracted into the work dir first if it is a zip."""
+        if os.path.isfile(self.path) and zipfile.is_zipfile(self.path):
+            return extract_zip(self.path, os.path.join(self.work_dir, 'extracted'))
+        return self.path
+
+
+@register_source
+class FolderSource(DatasetSource):
+    name = 'folder'
+    description = 'A directory that already has one subfolder per class'
+
+    def prepare(self):
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(f"Dataset folder not found: {self.path}")
+        return self.path
+
+
+@register_source
+class CamerashSource(DatasetSource):
+    name = 'camerash'
+    description = 'Camerash/mahjong-dataset clone (tiles/ folders or data.csv + train.zip)'
+
+    def prepare(self):
+        tiles_dir = os.path.join(self.path, 'tiles')
+        if os.path.isdir(tiles_dir) and find_class_root(tiles_dir) == tiles_dir:
+            return tiles_dir
+
+        csv_path = os.path.join(self.path, 'data.csv')
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"Neither tiles/ nor data.csv found in {self.path}")
+
+        images_dir = os.path.join(self.path, 'images')
+        train_zip = os.path.join(self.path, 'train.zip')
+        if not os.path.isdir(images_dir) and os.path.exists(train_zip):
+            extract_zip(train_zip, self.path)
+
+        organized_dir = os.path.join(self.work_dir, 'organized')
+        organize_dataset(csv_path, images_dir, organized_dir)
+        return organized_dir
+
+
+@register_source
+class KaggleFolderSource(DatasetSource):
+    name = 'kaggle'
+    description = 'Downloaded Kaggle dataset (folder or zip) with class folders somewhere inside'
+
+    def prepare(self):
+        root = find_class_root(self._unpacked())
+        if root is None:
+            raise FileNotFoundError(f"No class-per-folder image directory found in {self.path}")
+        return root
+
+
+@register_source
+class RoboflowFolderSource(DatasetSource):
+    name = 'roboflow'
+    description = 'Roboflow "folder" classification export (train/, valid/, test/)'
+
+    def prepare(self):
+        base = self._unpacked()
+        for root, dirs, _ in os.walk(base):
+            if 'train' in dirs:
+                return os.path.join(root, 'train')
+        raise FileNotFoundError(f"No train/ folder found in {self.path}")
+
+
+@register_source
+class YoloZipSource(DatasetSource):
+    name = 'yolo-zip'
+    description = 'YOLOv8 detection export (zip or folder); labelled boxes are cropped into class folders'
+
+    def prepare(self):
+        crops_dir = os.path.join(self.work_dir, 'crops')
+        marker = os.path.join(crops_dir, '.done')
+        if os.path.exists(marker):
+            return crops_dir
+
+        if os.path.isfile(self.path) and zipfile.is_zipfile(self.path):
+            count = self._crop_from_zip(crops_dir)
+        else:
+            count = self._crop_from_folder(crops_dir)
+
+        print(f"✂️  Cropped {count} labelled tiles into {crops_dir}")
+        open(marker, 'w').close()
+        return crops_dir
+
+    def _crop_from_zip(self, crops_dir):
+        """Crop straight from the archive; nothing is extracted to disk."""
+        from PIL import Image
+
+        index = ZipDatasetIndex(self.path)
+        if index.yaml_member is None:
+            raise FileNotFoundError(f"No data.yaml found in {self.path}")
+
+        count = 0
+        for split in index.splits:
+            for member, data, rows in index.iter_samples(split):
+                with Image.open(io.BytesIO(data)) as img:
+                    stem = f"{split}_{posixpath.splitext(posixpath.basename(member))[0]}"
+                    count += _save_crops(img, rows, index.names, crops_dir, stem)
+        return count
+
+    def _crop_from_folder(self, crops_dir):
+        import yaml
+        from PIL import Image
+
+        yaml_path = _find_file(self.path, 'data.yaml')
+        if yaml_path is None:
+            raise FileNotFoundError(f"No data.yaml found in {self.path}")
+        with open(yaml_path) as f:
+            names = yaml.safe_load(f)['names']
+        if isinstance(names, list):
+            names = dict(enumerate(names))
+
+        count = 0
+        for root, _, files in os.walk(self.path):
+            if 'labels' not in root.split(os.sep):
+                continue
+            for label_file in files:
+                if not label_file.endswith('.txt'):
+                    continue
+                label_path = os.path.join(root, label_file)
+                image_path = _image_for_label(label_path)
+                if image_path is None:
+                    continue
+                with open(label_path) as f:
+                    rows = parse_label_text(f.read())
+                with Image.open(image_path) as img:
+                    # Prefix with the split so train/valid files with the same name don't clash
+                    stem = f"{_split_name(root, self.path)}_{os.path.splitext(label_file)[0]}"
+                    count += _save_crops(img, rows, names, crops_dir, stem)
+        return count
+
+
+def _split_name(label_dir, base):
+    """
+    Split a labels directory belongs to: 'train' for both the Roboflow
+    <split>/labels layout and the labels/<split> one.
+    """
+    parts = [p for p in os.path.relpath(label_dir, base).split(os.sep)
+             if p not in ('labels', '.')]
+    return '_'.join(parts) or 'labels'
+
+
+def _save_crops(img, rows, names, crops_dir, stem):
+    """Save each labelled box of img into crops_dir/<class name>/."""
+    img = img.convert('RGB')
+    width, height = img.size
+    count = 0
+    for i, (cls, x, y, w, h) in enumerate(rows):
+        box = (
+            max(0, int((x - w / 2) * width)),
+            max(0, int((y - h / 2) * height)),
+            min(width, int((x + w / 2) * width)),
+            min(height, int((y + h / 2) * height)),
+        )
+        if box[2] <= box[0] or box[3] <= box[1]:
+            continue
+        class_dir = os.path.join(crops_dir, str(names.get(cls, cls)))
+        os.makedirs(class_dir, exist_ok=True)
+        img.crop(box).save(os.path.join(class_dir, f'{stem}_{i}.jpg'))
+        count += 1
+    return count
+
+
+def _find_file(base, filename):
+    for root, _, files in os.walk(base):
+        if filename in files:
+            return os.path.join(root, filename)
+    return None
+
+
+def _image_for_label(label_path):
+    """Map .../labels/<split>/x.txt to .../images/<split>/x.<ext>."""
+    head, tail = os.path.split(label_path)
+    parts = head.split(os.sep)
+    if 'labels' not in parts:
+        return None
+    idx = len(parts) - 1 - parts[::-1].index('labels')
+    parts[idx] = 'images'
+    stem = os.path.splitext(tail)[0]
+    for ext in IMAGE_EXTENSIONS:
+        candidate = os.path.join(os.sep.join(parts), stem + ext)
+        if os.path.exists(candidate):
+            return candidate
+    return None
@@ -0,0 +1,244 @@
+"""
+Local sweep over YOLOv8 input size, model variant and batch size.
+
+The training scripts hard-code imgsz 640, batch 16 and yolov8n. A sweep
+trains every combination of a grid (e.g. imgsz 320-640 x n/s x batch),
+then ranks the finished runs by mAP50 against CPU inference latency and
+exported model size, to find the smallest input and model that keep the
+accuracy while cutting inference time.
+
+Scheduling: each run is a `python -m mahjong_train train-yolo`
+subprocess under <project>/<model>-<imgsz>-b<batch>/, at most
+max_parallel at a time, with the CPU threads split between them. Runs
+go through train_yolo, so an interrupted sweep picks up where it
+stopped: finished runs are skipped and unfinished ones resume. All runs
+read the same data.yaml, resolved once (dataset specs come from the
+fetch cache). The first run starts alone until ultralytics has written
+its label cache, which the others then reuse instead of re-scanning.
+
+Measuring: after training, each best.pt is exported to ONNX and timed
+one at a time, so concurrent trainings don't skew the latencies. The
+ONNX file size stands in for the float32 TF.js model size, which has
+the same weights.
+"""
+
+import dataclasses
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_NAME = 'sweep_report.json'
+RUN_REPORT = 'train_report.json'
+
+
+def run_name(config):
+    return f"{os.path.splitext(os.path.basename(config.model))[0]}-{config.imgsz}-b{config.batch}"
+
+
+def sweep_configs(base, imgsizes, models, batches, project):
+    """One YoloTrainConfig per grid point, all under project/."""
+    project = os.path.abspath(project)
+    configs = []
+    for model in models:
+        for imgsz in imgsizes:
+            for batch in batches:
+                config = dataclasses.replace(base, model=model, imgsz=imgsz, batch=batch,
+                                             project=project)
+                configs.append(dataclasses.replace(config, name=run_name(config)))
+    return configs
+
+
+def train_command(config, fresh=False):
+    # Runs start in PACKAGE_ROOT, so local weights must not stay relative;
+    # hub names like yolov8n.pt are passed as given
+    model = os.path.abspath(config.model) if os.path.exists(config.model) else config.model
+    cmd = [sys.executable, '-m', 'mahjong_train', 'train-yolo',
+           '--data', os.path.abspath(config.data), '--model', model,
+           '--epochs', str(config.epochs), '--imgsz', str(config.imgsz),
+           '--batch', str(config.batch), '--patience', str(config.patience),
+           '--workers', str(config.workers), '--project', config.project,
+           '--name', config.name, '--report', os.path.join(config.run_dir, RUN_REPORT)]
+    if config.device is not None:
+        cmd += ['--device', config.device]
+    if fresh:
+        cmd.append('--fresh')
+    return cmd
+
+
+def _label_caches(data_yaml):
+    return glob.glob(os.path.join(os.path.dirname(os.path.abspath(data_yaml)), '**', '*.cache'),
+                     recursive=True)
+
+
+# ----------------------------------------
+# Training
+# ----------------------------------------
+
+def run_sweep(configs, max_parallel=1, threads=None, fresh=False, poll=5.0):
+    """
+    Train every config, at most max_parallel at once. threads is the
+    torch/OpenMP thread count of each run (default: CPUs / max_parallel).
+    Returns {run name: {'returncode', 'seconds', 'log'}}.
+    """
+    threads = threads or max(1, (os.cpu_count() or 1) // max_parallel)
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+    pending = list(configs)
+    running = {}
+    results = {}
+    # Until the first run has written the label cache (or exited without
+    # it, e.g. on a read-only dataset) only it runs
+    wait_for_cache = bool(configs) and not _label_caches(configs[0].data)
+    first = None
+
+    def start(config):
+        nonlocal first
+        os.makedirs(config.run_dir, exist_ok=True)
+        log_path = os.path.join(config.run_dir, 'train.log')
+        log = open(log_path, 'a')
+        proc = subprocess.Popen(train_command(config, fresh), cwd=PACKAGE_ROOT, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+        running[proc] = (config, log, log_path, time.perf_counter())
+        first = first or proc
+        print(f"🚀 {config.name} started ({len(results) + len(running)}/{len(configs)}, "
+              f"{threads} threads): {log_path}")
+
+    try:
+        while pending or running:
+            if wait_for_cache and first is not None:
+                wait_for_cache = first.poll() is None and not _label_caches(configs[0].data)
+            while pending and len(running) < (1 if wait_for_cache else max_parallel):
+                start(pending.pop(0))
+            time.sleep(poll if running else 0)
+            for proc in [p for p in running if p.poll() is not None]:
+                config, log, log_path, started = running.pop(proc)
+                log.close()
+                seconds = time.perf_counter() - started
+                results[config.name] = {'returncode': proc.returncode, 'seconds': seconds,
+                                        'log': log_path}
+                mark = '✅' if proc.returncode == 0 else '❌'
+                print(f"{mark} {config.name} finished in {seconds / 60:.1f} min "
+                      f"(exit {proc.returncode})")
+    except KeyboardInterrupt:
+        # The runs resume from their last.pt on the next sweep
+        for proc in running:
+            proc.terminate()
+        for proc, (_, log, _, _) in running.items():
+            proc.wait()
+            log.close()
+        raise
+    return results
+
+
+# ----------------------------------------
+# Measuring and ranking
+# ----------------------------------------
+
+def export_onnx(weights, imgsz):
+    """ONNX export of weights next to them, reused while newer than the weights."""
+    onnx_path = os.path.splitext(weights)[0] + '.onnx'
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(weights):
+        return onnx_path
+    from ultralytics import YOLO
+
+    return str(YOLO(weights).export(format='onnx', imgsz=imgsz))
+
+
+def measure_latency(model_path, imgsz, runs=20, warmup=3, threads=1):
+    """Median and p90 milliseconds of one batch-1 CPU inference."""
+    from mahjong_detect.detector import load_backend
+
+    backend = load_backend(model_path, threads)
+    batch = np.random.default_rng(0).random((1, imgsz, imgsz, 3), dtype=np.float32)
+    for _ in range(warmup):
+        backend.run(batch)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        backend.run(batch)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 90))
+
+
+def measure_run(config, runs=20, threads=1):
+    """mAP, latency and size of one finished run, or None if it has no weights."""
+    report_path = os.path.join(config.run_dir, RUN_REPORT)
+    best = os.path.join(config.weights_dir, 'best.pt')
+    if not os.path.exists(best):
+        return None
+    metrics = {}
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            metrics = json.load(f).get('metrics', {})
+
+    onnx_path = export_onnx(best, config.imgsz)
+    latency, latency_p90 = measure_latency(onnx_path, config.imgsz, runs, threads=threads)
+    return {
+        'name': config.name,
+        'model': config.model,
+        'imgsz': config.imgsz,
+        'batch': config.batch,
+        'map50': metrics.get('metrics/mAP50(B)'),
+        'map50_95': metrics.get('metrics/mAP50-95(B)'),
+        'latency_ms': latency,
+        'latency_p90_ms': latency_p90,
+        'size_mb': os.path.getsize(onnx_path) / 1e6,
+        'weights': best,
+        'onnx': onnx_path,
+    }
+
+
+def _dominates(a, b):
+    return (a['map50'] >= b['map50'] and a['latency_ms'] <= b['latency_ms']
+            and a['size_mb'] <= b['size_mb']
+            and (a['map50'] > b['map50'] or a['latency_ms'] < b['latency_ms']
+                 or a['size_mb'] < b['size_mb']))
+
+
+def rank_runs(runs, map_tolerance=0.01):
+    """
+    Sort runs by mAP50 and mark the Pareto front over (mAP50, latency,
+    size). The recommended run is the fastest (then smallest) one whose
+    mAP50 is at most map_tolerance below the best.
+    """
+    runs = sorted((r for r in runs if r['map50'] is not None),
+                  key=lambda r: (-r['map50'], r['latency_ms']))
+    for r in runs:
+        r['pareto'] = not any(_dominates(o, r) for o in runs)
+    recommended = None
+    if runs:
+        eligible = [r for r in runs if r['map50'] >= runs[0]['map50'] - map_tolerance]
+        recommended = min(eligible, key=lambda r: (r['latency_ms'], r['size_mb']))['name']
+    return {'runs': runs, 'recommended': recommended, 'map_tolerance': map_tolerance}
+
+
+def sweep(configs, max_parallel=1, threads=None, fresh=False, train=True,
+          latency_runs=20, latency_threads=1, map_tolerance=0.01):
+    """
+    Train (unless train=False), measure and rank a grid of configs.
+    The ranking is written to <project>/sweep_report.json and returned.
+    """
+    training = run_sweep(configs, max_parallel, threads, fresh) if train else {}
+
+    print(f"\n⏱️  Measuring CPU latency ({latency_threads} thread(s), {latency_runs} runs each)...")
+    measured = []
+    for config in configs:
+        result = measure_run(config, latency_runs, latency_threads)
+        if result is None:
+            print(f"   ⚠️  {config.name}: no best.pt, skipped")
+            continue
+        result['train'] = training.get(config.name)
+        measured.append(result)
+
+    ranking = rank_runs(measured, map_tolerance)
+    if configs:
+        path = os.path.join(configs[0].project, REPORT_NAME)
+        with open(path, 'w') as f:
+            json.dump(ranking, f, indent=2)
+        ranking['path'] = path
+    return ranking
@@ -0,0 +1,211 @@
+"""
+Resumable YOLOv8 detector training.
+
+Wraps ultralytics' YOLO.train() for the tile detector. If the run
+directory (<project>/<name>, mahjong_detector/train by default) already
+holds weights/last.pt from an unfinished run, training resumes from it
+with YOLO(last.pt).train(resume=True). The epoch counter, optimizer
+state, EMA weights and learning-rate schedule all come from the
+checkpoint, so an interrupted run loses at most the epoch in progress.
+A finished run is left alone unless fresh=True.
+
+EpochTimer records where each epoch's wall-clock time goes: waiting for
+the dataloader, the training steps themselves, and validation plus
+checkpointing. Records are appended to <run dir>/epoch_times.jsonl,
+which keeps growing across resumes.
+
+ultralytics (and torch) are imported only when training starts.
+"""
+
+import json
+import os
+import time
+
+EPOCH_LOG = 'epoch_times.jsonl'
+
+
+def checkpoint_state(path):
+    """
+    Progress saved in an ultralytics checkpoint: {'epoch': last finished
+    epoch (1-based), 'epochs': target, 'finished': bool}. The final
+    checkpoint of a completed run has its epoch set to -1.
+    """
+    import torch
+
+    ckpt = torch.load(path, map_location='cpu', weights_only=False)
+    epochs = (ckpt.get('train_args') or {}).get('epochs')
+    epoch = ckpt.get('epoch', -1)
+    finished = epoch == -1 or (epochs is not None and epoch + 1 >= epochs)
+    return {'epoch': None if epoch == -1 else epoch + 1, 'epochs': epochs, 'finished': finished}
+
+
+class EpochTimer:
+    """
+    ultralytics callbacks that time each epoch.
+
+    data_wait_s is how long the training loop waited on the dataloader:
+    from the epoch start, or the end of one batch, to the start of the
+    next. compute_s is the time inside batches (forward, backward,
+    optimizer). val_s runs from the end of the training loop to
+    on_fit_epoch_end, so it covers validation and saving the checkpoint.
+    """
+
+    EVENTS = ('on_train_epoch_start', 'on_train_batch_start', 'on_train_batch_end',
+              'on_train_epoch_end', 'on_fit_epoch_end')
+
+    def __init__(self, resumed=False, log_name=EPOCH_LOG):
+        self.resumed = resumed
+        self.session = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.log_name = log_name
+        self.records = []
+
+    def attach(self, model):
+        for event in self.EVENTS:
+            model.add_callback(event, getattr(self, event))
+
+    def on_train_epoch_start(self, trainer):
+        self._epoch_start = self._mark = time.perf_counter()
+        self._data_wait = self._compute = 0.0
+        self._batches = 0
+
+    def on_train_batch_start(self, trainer):
+        now = time.perf_counter()
+        self._data_wait += now - self._mark
+        self._mark = now
+
+    def on_train_batch_end(self, trainer):
+        now = time.perf_counter()
+        self._compute += now - self._mark
+        self._mark = now
+        self._batches += 1
+
+    def on_train_epoch_end(self, trainer):
+        self._train_end = time.perf_counter()
+
+    def on_fit_epoch_end(self, trainer):
+        now = time.perf_counter()
+        record = {
+            'epoch': trainer.epoch + 1,
+            'epochs': trainer.epochs,
+            'wall_s': now - self._epoch_start,
+            'train_s': self._train_end - self._epoch_start,
+            'data_wait_s': self._data_wait,
+            'compute_s': self._compute,
+            'val_s': now - self._train_end,
+            'batches': self._batches,
+            'resumed': self.resumed,
+            'session': self.session,
+            'metrics': {k: float(v) for k, v in (trainer.metrics or {}).items()},
+        }
+        self.records.append(record)
+        with open(os.path.join(trainer.save_dir, self.log_name), 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"\n⏱️  Epoch {record['epoch']}/{record['epochs']}: {record['wall_s']:.1f}s "
+              f"(dataloader wait {record['data_wait_s']:.1f}s, steps {record['compute_s']:.1f}s, "
+              f"validation {record['val_s']:.1f}s)")
+
+
+def read_epoch_times(run_dir):
+    """Every epoch record of a run, across all the sessions that trained it."""
+    path = os.path.join(run_dir, EPOCH_LOG)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_epoch_times(records):
+    """Totals and shares of wall-clock time over epoch records."""
+    wall = sum(r['wall_s'] for r in records)
+    totals = {key: sum(r[key] for r in records) for key in ('data_wait_s', 'compute_s', 'val_s')}
+    return {
+        'epochs': len(records),
+        'wall_s': wall,
+        'mean_epoch_s': wall / len(records) if records else 0.0,
+        **totals,
+        'data_wait_share': totals['data_wait_s'] / wall if wall else 0.0,
+        'val_share': totals['val_s'] / wall if wall else 0.0,
+        'sessions': len({r['session'] for r in records}),
+    }
+
+
+def _train_kwargs(config):
+    kwargs = {
+        'data': config.data,
+        'epochs': config.epochs,
+        'imgsz': config.imgsz,
+        'batch': config.batch,
+        'patience': config.patience,
+        'workers': config.workers,
+        'project': config.project,
+        'name': config.name,
+        'exist_ok': True,
+    }
+    if config.device is not None:
+        kwargs['device'] = config.device
+    return kwargs
+
+
+def train_yolo(config, fresh=False):
+    """
+    Train the detector described by a YoloTrainConfig, resuming from
+    its last.pt when there is an unfinished one.
+
+    Returns a dict with the run directory, best/last weights, whether the
+    run resumed (or was already finished and skipped), this session's
+    epoch records, the time summary over every session, and the final
+    validation metrics.
+    """
+    from ultralytics import YOLO
+
+    last = os.path.join(config.weights_dir, 'last.pt')
+    state = checkpoint_state(last) if os.path.exists(last) and not fresh else None
+
+    result = {
+        'run_dir': config.run_dir,
+        'best': os.path.join(config.weights_dir, 'best.pt'),
+        'last': last,
+        'resumed': False,
+        'skipped': False,
+        'epochs': [],
+        'metrics': {},
+    }
+
+    if state and state['finished']:
+        print(f"✅ {config.run_dir} already trained for {state['epochs']} epochs; "
+              f"pass --fresh to train it again")
+        result['skipped'] = True
+        history = read_epoch_times(config.run_dir)
+        if history:
+            result['metrics'] = history[-1]['metrics']
+        result['time'] = summarize_epoch_times(history)
+        return result
+
+    if state:
+        print(f"🔁 Resuming {last} at epoch {state['epoch'] + 1}/{state['epochs']} "
+              f"(optimizer state, EMA and LR schedule from the checkpoint)")
+        model = YOLO(last)
+        kwargs = {'resume': True}
+        if config.device is not None:
+            kwargs['device'] = config.device
+        result['resumed'] = True
+    else:
+        log = os.path.join(config.run_dir, EPOCH_LOG)
+        if os.path.exists(log):
+            os.remove(log)
+        print(f"🚀 Training {config.model} on {config.data}: {config.epochs} epochs, "
+              f"imgsz {config.imgsz}, batch {config.batch}")
+        model = YOLO(config.model)
+        kwargs = _train_kwargs(config)
+
+    timer = EpochTimer(resumed=result['resumed'])
+    timer.attach(model)
+    model.train(**kwargs)
+
+    trainer = model.trainer
+    result['run_dir'] = str(trainer.save_dir)
+    result['best'], result['last'] = str(trainer.best), str(trainer.last)
+    result['epochs'] = timer.records
+    result['metrics'] = {k: float(v) for k, v in (trainer.metrics or {}).items()}
+    result['time'] = summarize_epoch_times(read_epoch_times(result['run_dir']))
+    return result
@@ -0,0 +1,236 @@
+"""
+Read a YOLOv8 dataset zip (Roboflow export) without extracting all of it.
+
+ZipDatasetIndex reads the zip's central directory once and pairs every
+image member with its label member per split. From there you can:
+
+- stream (image bytes, label rows) straight out of the archive,
+- extract only the members training needs (labelled images of the
+  requested splits plus data.yaml) on a thread pool, and
+- check every label file for malformed rows while the extraction runs.
+
+Each worker thread opens its own ZipFile handle so reads and inflation
+run in parallel instead of serializing on one shared file object.
+"""
+
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from .layout import IMAGE_EXTENSIONS
+
+# Roboflow calls the validation split 'valid'; ultralytics wants 'val'
+SPLIT_KEYS = {'train': 'train', 'valid': 'val', 'val': 'val', 'test': 'test'}
+
+
+def unsafe_member(name):
+    """True for a member name that would extract outside the target folder."""
+    parts = name.replace('\\', '/').split('/')
+    return name.startswith('/') or '..' in parts
+
+
+def parse_label_text(text):
+    """Parse YOLO label text into [(class_id, x, y, w, h), ...], skipping blank lines."""
+    rows = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) < 5:
+            raise ValueError(f"expected 5 values, got {len(parts)}: '{line.strip()}'")
+        rows.append((int(float(parts[0])), *(float(v) for v in parts[1:5])))
+    return rows
+
+
+class ZipDatasetIndex:
+    """Index of a YOLOv8 dataset zip, built from its central directory."""
+
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self._local = threading.local()
+
+        with zipfile.ZipFile(zip_path) as zf:
+            infos = {i.filename: i for i in zf.infolist() if not i.is_dir()}
+        unsafe = sorted(n for n in infos if unsafe_member(n))
+        if unsafe:
+            raise ValueError(f"Unsafe path in archive {zip_path}: {unsafe[0]}")
+
+        self.members = infos
+        self.yaml_member = self._find_yaml(infos)
+        self.root = posixpath.dirname(self.yaml_member) if self.yaml_member else ''
+        self.names = self._read_names() if self.yaml_member else {}
+
+        # split -> [(image member, label member or None)]
+        self.splits = {}
+        for name in sorted(infos):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            split, label = self._pair(name, infos)
+            if split is not None:
+                self.splits.setdefault(split, []).append((name, label))
+
+    @staticmethod
+    def _find_yaml(infos):
+        yamls = sorted((n for n in infos if n.endswith('.yaml')),
+                       key=lambda n: (posixpath.basename(n) != 'data.yaml', n.count('/'), n))
+        return yamls[0] if yamls else None
+
+    def _read_names(self):
+        config = yaml.safe_load(self.read(self.yaml_member))
+        names = config.get('names', {})
+        return dict(enumerate(names)) if isinstance(names, list) else names
+
+    @staticmethod
+    def _pair(name, infos):
+        """Work out the split of an image member and find its label member."""
+        parts = name.split('/')
+        if 'images' not in parts:
+            return None, None
+        idx = len(parts) - 1 - parts[::-1].index('images')
+        # <split>/images/x.jpg (Roboflow) or images/<split>/x.jpg (ultralytics)
+        if idx > 0 and parts[idx - 1] in SPLIT_KEYS:
+            split = SPLIT_KEYS[parts[idx - 1]]
+        elif idx + 1 < len(parts) - 1 and parts[idx + 1] in SPLIT_KEYS:
+            split = SPLIT_KEYS[parts[idx + 1]]
+        else:
+            return None, None
+
+        parts[idx] = 'labels'
+        parts[-1] = posixpath.splitext(parts[-1])[0] + '.txt'
+        label = '/'.join(parts)
+        return split, label if label in infos else None
+
+    # ----------------------------------------
+    # Streaming
+    # ----------------------------------------
+
+    def _zip(self):
+        zf = getattr(self._local, 'zf', None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.zip_path)
+        return zf
+
+    def read(self, member):
+        return self._zip().read(member)
+
+    def iter_samples(self, split='train', labelled_only=True):
+        """Yield (image member, image bytes, label rows) for one split."""
+        for image, label in self.splits.get(split, []):
+            if label is None and labelled_only:
+                continue
+            rows = parse_label_text(self.read(label).decode()) if label else []
+            yield image, self.read(image), rows
+
+    def summary(self):
+        return {
+            split: {
+                'images': len(pairs),
+                'labelled': sum(1 for _, label in pairs if label),
+            }
+            for split, pairs in sorted(self.splits.items())
+        }
+
+    # ----------------------------------------
+    # Validation
+    # ----------------------------------------
+
+    def validate_label(self, member):
+        """Return a list of problems in one label file (empty if it is fine)."""
+        problems = []
+        try:
+            rows = parse_label_text(self.read(member).decode())
+        except (ValueError, UnicodeDecodeError) as e:
+            return [f"{member}: {e}"]
+        for cls, x, y, w, h in rows:
+            if self.names and cls not in self.names:
+                problems.append(f"{member}: class {cls} not in data.yaml names")
+            if not all(0.0 <= v <= 1.0 for v in (x, y, w, h)):
+                problems.append(f"{member}: box {x:.3f} {y:.3f} {w:.3f} {h:.3f} is not normalized")
+        return problems
+
+    # ----------------------------------------
+    # Selective extraction
+    # ----------------------------------------
+
+    def _extract_one(self, member, dest):
+        target = os.path.realpath(os.path.join(dest, *member.split('/')))
+        if os.path.commonpath([target, os.path.realpath(dest)]) != os.path.realpath(dest):
+            raise ValueError(f"{member} would be extracted outside {dest}")
+        info = self.members[member]
+        if os.path.exists(target) and os.path.getsize(target) == info.file_size:
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f'{target}.part'
+        with self._zip().open(member) as src, open(tmp, 'wb') as out:
+            while True:
+                chunk = src.read(1 << 20)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.replace(tmp, target)
+        return True
+
+    def used_members(self, splits=('train', 'val'), labelled_only=True):
+        members = []
+        for split in splits:
+            for image, label in self.splits.get(split, []):
+                if label is None and labelled_only:
+                    continue
+                members.append(image)
+                if label:
+                    members.append(label)
+        return members
+
+    def materialize(self, dest, splits=('train', 'val'), labelled_only=True,
+                    workers=8, validate=True):
+        """
+        Extract only the members training uses and write a data.yaml with
+        absolute paths next to them.
+
+        Label validation runs on the same pool, interleaved with the
+        extraction. Returns (data_yaml_path, report) where report has
+        extracted/skipped counts, timings and any label problems.
+        """
+        start = time.perf_counter()
+        members = self.used_members(splits, labelled_only)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            extracts, checks = [], []
+            for member in members:
+                extracts.append(pool.submit(self._extract_one, member, dest))
+                if validate and member.endswith('.txt'):
+                    checks.append(pool.submit(self.validate_label, member))
+            written = [future.result() for future in extracts]
+            problems = [p for future in checks for p in future.result()]
+
+        data_yaml = self.write_data_yaml(dest, splits)
+        report = {
+            'members_total': len(self.members),
+            'extracted': sum(written),
+            'skipped': len(written) - sum(written),
+            'problems': problems,
+            'seconds': time.perf_counter() - start,
+        }
+        return data_yaml, report
+
+    def write_data_yaml(self, dest, splits=('train', 'val')):
+        """data.yaml pointing at the extracted split folders (the zip's copy is left alone)."""
+        root = os.path.abspath(os.path.join(dest, *self.root.split('/'))) if self.root else os.path.abspath(dest)
+        config = {'path': root, 'nc': len(self.names), 'names': self.names}
+        for split in splits:
+            pairs = self.splits.get(split)
+            if not pairs:
+                continue
+            image_dir = posixpath.dirname(pairs[0][0])
+            config[split] = posixpath.relpath(image_dir, self.root or '.')
+
+        path = os.path.join(root, 'data.yaml')
+        os.makedirs(root, exist_ok=True)
+        with open(path, 'w') as f:
+            yaml.safe_dump(config, f, sort_keys=False)
+        return path
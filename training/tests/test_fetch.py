@@ -0,0 +1,121 @@
+import os
+import pathlib
+import urllib.request
+import zipfile
+
+import pytest
+
+from mahjong_train import fetch
+from mahjong_train.fetch import DatasetCache, fetch_dataset, file_sha256
+
+SPEC = 'https://example.com/mahjong.zip'
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / 'upstream.zip'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('mahjong/data.csv', 'image,label\n1.jpg,1D\n')
+    return str(path)
+
+
+@pytest.fixture
+def network(monkeypatch, archive):
+    """Downloads of any spec return the archive; calls lists the specs asked for."""
+    calls = []
+
+    def download_request(spec):
+        calls.append(spec)
+        return urllib.request.Request(pathlib.Path(archive).as_uri())
+
+    monkeypatch.setattr(fetch, 'download_request', download_request)
+    return calls
+
+
+def corrupt(path):
+    """Flip a byte without changing the size."""
+    os.chmod(path, 0o644)
+    with open(path, 'r+b') as f:
+        first = f.read(1)
+        f.seek(0)
+        f.write(bytes([first[0] ^ 1]))
+
+
+def test_downloads_once_then_serves_from_cache(tmp_path, network, archive):
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    first = cache.fetch(SPEC)
+    assert first['source'] == 'network'
+    assert first['sha256'] == file_sha256(archive)
+    assert cache.fetch(SPEC)['source'] == 'cache'
+    assert network == [SPEC]
+
+    folder = fetch_dataset(SPEC, cache)
+    assert os.path.basename(folder) == 'mahjong'
+    assert os.path.exists(os.path.join(folder, 'data.csv'))
+
+
+def test_pinned_hash_rejects_other_bytes(tmp_path, network):
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    with pytest.raises(ValueError, match='expected sha256'):
+        cache.fetch(SPEC, sha256='0' * 64)
+    assert cache.entries() == []
+
+
+def test_offline_without_mirror_fails(tmp_path, network):
+    cache = DatasetCache(str(tmp_path / 'cache'), offline=True)
+    with pytest.raises(FileNotFoundError, match='network access is off'):
+        cache.fetch(SPEC)
+    assert network == []
+
+
+def test_offline_fetch_from_exported_mirror(tmp_path, network):
+    source = DatasetCache(str(tmp_path / 'source'))
+    record = source.fetch(SPEC)
+    mirror = str(tmp_path / 'mirror')
+    assert [r['spec'] for r in source.export(mirror)] == [SPEC]
+
+    cache = DatasetCache(str(tmp_path / 'cache'), mirror=mirror, offline=True)
+    found = cache.fetch(SPEC)
+    assert found['source'] == 'mirror'
+    assert found['sha256'] == record['sha256']
+    assert cache.fetch(SPEC)['source'] == 'cache'
+    assert network == [SPEC]
+
+
+def test_loose_archive_in_mirror_needs_a_pin(tmp_path, archive):
+    mirror = tmp_path / 'mirror'
+    mirror.mkdir()
+    digest = file_sha256(archive)
+    (mirror / f'{digest}.zip').write_bytes(pathlib.Path(archive).read_bytes())
+
+    cache = DatasetCache(str(tmp_path / 'cache'), mirror=str(mirror), offline=True)
+    with pytest.raises(FileNotFoundError):
+        cache.fetch(SPEC)
+    assert cache.fetch(SPEC, sha256=digest)['source'] == 'mirror'
+
+
+def test_corrupt_mirror_blob_is_rejected(tmp_path, network):
+    source = DatasetCache(str(tmp_path / 'source'))
+    record = source.fetch(SPEC)
+    mirror = str(tmp_path / 'mirror')
+    source.export(mirror)
+    corrupt(DatasetCache(mirror).blob_path(record['sha256']))
+
+    cache = DatasetCache(str(tmp_path / 'cache'), mirror=mirror, offline=True)
+    with pytest.raises(ValueError, match='expected sha256'):
+        cache.fetch(SPEC)
+
+
+def test_verify_rehashes_cached_archive(tmp_path, network):
+    source = DatasetCache(str(tmp_path / 'source'))
+    source.fetch(SPEC)
+    mirror = str(tmp_path / 'mirror')
+    source.export(mirror)
+    cache = DatasetCache(str(tmp_path / 'cache'), mirror=mirror, offline=True)
+    record = cache.fetch(SPEC)
+    corrupt(record['path'])
+
+    # Same size, so only a re-hash notices and takes the mirror copy again
+    assert cache.fetch(SPEC)['source'] == 'cache'
+    assert cache.fetch(SPEC, verify=True)['source'] == 'mirror'
+    assert file_sha256(record['path']) == record['sha256']
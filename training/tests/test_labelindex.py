@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+import yaml
+
+from mahjong_train.labelindex import LabelIndex, load_class_names
+
+NAMES = ['1D', 'RD', 'Joker', '2F']
+
+
+def make_dataset(root, seed=0, images=12):
+    """Roboflow layout with random boxes; returns {(split, stem): [(name, x, y, w, h)]}."""
+    rng = np.random.default_rng(seed)
+    boxes = {}
+    for split in ('train', 'valid'):
+        os.makedirs(os.path.join(root, split, 'images'))
+        os.makedirs(os.path.join(root, split, 'labels'))
+        for n in range(images):
+            stem = f'{split}-{n:02d}'
+            rows = [(NAMES[rng.integers(len(NAMES))], *rng.uniform(0.01, 0.3, 4).round(4))
+                    for _ in range(rng.integers(0, 6))]
+            boxes[split, stem] = rows
+            with open(os.path.join(root, split, 'labels', f'{stem}.txt'), 'w') as f:
+                f.writelines(f"{NAMES.index(r[0])} {r[1]} {r[2]} {r[3]} {r[4]}\n" for r in rows)
+            if n % 4:
+                open(os.path.join(root, split, 'images', f'{stem}.jpg'), 'wb').close()
+    with open(os.path.join(root, 'data.yaml'), 'w') as f:
+        yaml.safe_dump({'nc': len(NAMES), 'names': NAMES}, f)
+    return boxes
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = str(tmp_path / 'dataset')
+    return root, make_dataset(root)
+
+
+def image_key(index, i):
+    return ({'train': 'train', 'val': 'valid'}[index.splits[i]],
+            os.path.splitext(os.path.basename(index.images[i]))[0])
+
+
+def test_boxes_match_label_files(dataset):
+    root, boxes = dataset
+    index = LabelIndex.build(root)
+    table = load_class_names()
+    assert index.num_images == len(boxes)
+    assert index.unmapped == ['Joker']
+    for i in range(index.num_images):
+        expected = boxes[image_key(index, i)]
+        found = index.boxes_for_image(i)
+        assert [table[c] if c >= 0 else 'Joker' for c in found['cls']] == [r[0] for r in expected]
+        np.testing.assert_allclose(np.stack([found[k] for k in 'xywh'], axis=1).reshape(-1, 4),
+                                   np.array([r[1:] for r in expected]).reshape(-1, 4), rtol=1e-6)
+
+
+def test_class_queries(dataset):
+    root, boxes = dataset
+    index = LabelIndex.build(root)
+    for name in ('1D', 'RD', '2F'):
+        c = index.class_id(name)
+        rows = index.rows_for_class(name)
+        assert sorted(rows.tolist()) == np.flatnonzero(index.boxes['cls'] == c).tolist()
+        assert (index.boxes_for_class(name)['cls'] == c).all()
+        expected_images = sorted({int(i) for i in index.boxes['image'][index.boxes['cls'] == c]})
+        assert index.images_with_class(name).tolist() == expected_images
+
+    for split, key in (('train', 'train'), ('val', 'valid')):
+        per_class = index.class_counts(split)
+        images = index.image_class_counts(split)
+        for name in ('1D', 'RD', '2F'):
+            c = index.class_id(name)
+            split_rows = [rows for (s, _), rows in boxes.items() if s == key]
+            assert per_class[c] == sum(r[0] == name for rows in split_rows for r in rows)
+            assert images[c] == sum(any(r[0] == name for r in rows) for rows in split_rows)
+    with pytest.raises(KeyError):
+        index.class_id('Joker')
+
+
+def test_query_filters(dataset):
+    root, _ = dataset
+    index = LabelIndex.build(root)
+    b = index.boxes
+    area = b['w'] * b['h']
+    val = index.splits[b['image']] == 'val'
+    rd = b['cls'] == index.class_id('RD')
+
+    assert index.query().tolist() == list(range(len(b)))
+    assert index.query(cls='RD', split='val').tolist() == np.flatnonzero(rd & val).tolist()
+    assert index.query(max_area=0.01).tolist() == np.flatnonzero(area <= 0.01).tolist()
+    assert index.query(cls='RD', min_side=0.1).tolist() == \
+        np.flatnonzero(rd & (np.minimum(b['w'], b['h']) >= 0.1)).tolist()
+    image = int(b['image'][0])
+    assert index.query(image=image).tolist() == \
+        list(range(index.image_offsets[image], index.image_offsets[image + 1]))
+    assert index.query(image=str(index.images[image])).tolist() == index.query(image=image).tolist()
+
+
+def test_saved_index_is_reused_until_labels_change(dataset, capsys):
+    root, _ = dataset
+    first = LabelIndex.build(root)
+    capsys.readouterr()
+    mapped = LabelIndex.build(root, mmap=True)
+    assert 'Indexed' not in capsys.readouterr().out
+    assert isinstance(mapped.boxes, np.memmap)
+    assert mapped.fingerprint == first.fingerprint
+    assert (mapped.boxes == first.boxes).all()
+
+    with open(os.path.join(root, 'train', 'labels', 'train-00.txt'), 'a') as f:
+        f.write('1 0.5 0.5 0.1 0.1\n')
+    changed = LabelIndex.build(root)
+    assert 'Indexed' in capsys.readouterr().out
+    assert len(changed) == len(first) + 1
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from mahjong_detect.benchmark import (js_remove_duplicate_detections, record_to_result,
+                                      synthetic_records)
+from mahjong_detect.classes import load_class_table
+from mahjong_detect.nms import nms, remove_duplicates, remove_duplicates_batch
+
+
+@pytest.fixture(scope='module')
+def class_table():
+    return load_class_table()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_hands_match_browser_algorithm(class_table, seed):
+    records = synthetic_records(class_table, images=20, tiles=16, copies=20, seed=seed)
+    results = [record_to_result(r, class_table) for r in records]
+    expected = [js_remove_duplicate_detections(r['detections']) for r in records]
+    assert [remove_duplicates(r, class_table) for r in results] == expected
+    assert remove_duplicates_batch(results, class_table) == expected
+
+
+def test_hand_is_capped(class_table):
+    # 30 tiles in a row: the hand stops at 22, with at most 4 of any tile
+    records = synthetic_records(class_table, images=5, tiles=30, copies=3, seed=9)
+    for record in records:
+        hand = remove_duplicates(record_to_result(record, class_table), class_table)
+        assert hand == js_remove_duplicate_detections(record['detections'])
+        assert len(hand) <= 22
+        assert max(hand.count(tile) for tile in hand) <= 4
+
+
+def test_greedy_nms_keeps_best_of_each_cluster():
+    boxes = np.array([[10, 10, 8, 8], [10.5, 10, 8, 8], [40, 40, 8, 8], [40, 41, 8, 8]], float)
+    scores = np.array([0.5, 0.9, 0.7, 0.6])
+    keep, kept_scores = nms(boxes, scores, iou_threshold=0.5)
+    assert keep.tolist() == [1, 2]
+    assert kept_scores.tolist() == [0.9, 0.7]
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+import yaml
+from PIL import Image
+
+from mahjong_train.sources import YoloZipSource
+
+
+@pytest.mark.parametrize('layout', ['{split}/{kind}', '{kind}/{split}'])
+def test_folder_crops_keep_splits_apart(tmp_path, layout):
+    dataset = tmp_path / 'dataset'
+    dataset.mkdir()
+    (dataset / 'data.yaml').write_text(yaml.safe_dump({'nc': 1, 'names': ['1D']}))
+    # Same file name in every split, as Roboflow exports often have
+    for split in ('train', 'valid'):
+        images = dataset / layout.format(split=split, kind='images')
+        labels = dataset / layout.format(split=split, kind='labels')
+        images.mkdir(parents=True)
+        labels.mkdir(parents=True)
+        Image.new('RGB', (20, 20)).save(images / 'a.jpg')
+        (labels / 'a.txt').write_text('0 0.5 0.5 0.5 0.5\n')
+
+    crops_dir = YoloZipSource(str(dataset), str(tmp_path / 'work')).prepare()
+    assert sorted(os.listdir(os.path.join(crops_dir, '1D'))) == ['train_a_0.jpg', 'valid_a_0.jpg']
@@ -0,0 +1,74 @@
+import os
+import zipfile
+
+import pytest
+import yaml
+
+from mahjong_train.zipstream import ZipDatasetIndex, parse_label_text
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture
+def dataset_zip(tmp_path):
+    return make_zip(tmp_path / 'dataset.zip', {
+        'data.yaml': yaml.safe_dump({'nc': 2, 'names': ['1D', 'RD']}),
+        'train/images/a.jpg': b'jpeg a',
+        'train/labels/a.txt': '0 0.5 0.5 0.1 0.2\n',
+        'train/images/unlabelled.jpg': b'jpeg b',
+        'valid/images/c.jpg': b'jpeg c',
+        'valid/labels/c.txt': '1 0.4 0.4 0.1 0.1\n\n5 0.1 0.1 2 0.1\n',
+        'test/images/d.jpg': b'jpeg d',
+        'test/labels/d.txt': '0 0.5 0.5 0.1 0.1\n',
+    })
+
+
+def test_index_pairs_images_and_labels(dataset_zip):
+    index = ZipDatasetIndex(dataset_zip)
+    assert index.names == {0: '1D', 1: 'RD'}
+    assert index.splits['train'] == [('train/images/a.jpg', 'train/labels/a.txt'),
+                                     ('train/images/unlabelled.jpg', None)]
+    assert index.summary()['val'] == {'images': 1, 'labelled': 1}
+    [(image, data, rows)] = index.iter_samples('train')
+    assert (image, data, rows) == ('train/images/a.jpg', b'jpeg a', [(0, 0.5, 0.5, 0.1, 0.2)])
+
+
+def test_materialize_extracts_used_members(dataset_zip, tmp_path):
+    dest = tmp_path / 'out'
+    data_yaml, report = ZipDatasetIndex(dataset_zip).materialize(str(dest), workers=2)
+    assert sorted(os.path.relpath(os.path.join(d, f), dest)
+                  for d, _, files in os.walk(dest) for f in files
+                  if not f.endswith('.yaml')) == sorted([
+        'train/images/a.jpg', 'train/labels/a.txt', 'valid/images/c.jpg', 'valid/labels/c.txt'])
+    assert len(report['problems']) == 2
+    with open(data_yaml) as f:
+        assert yaml.safe_load(f)['names'] == {0: '1D', 1: 'RD'}
+
+
+@pytest.mark.parametrize('name', ['../escaped/train/images/x.jpg', '/abs/train/images/x.jpg',
+                                  'a/../../train/images/x.jpg'])
+def test_unsafe_members_are_rejected(tmp_path, name):
+    path = make_zip(tmp_path / 'evil.zip', {
+        name: b'jpeg', name.replace('images', 'labels')[:-4] + '.txt': '0 0.5 0.5 0.1 0.1\n',
+    })
+    with pytest.raises(ValueError, match='Unsafe path'):
+        ZipDatasetIndex(path)
+    assert not os.path.exists(tmp_path / 'escaped')
+
+
+def test_extraction_stays_inside_dest(dataset_zip, tmp_path):
+    index = ZipDatasetIndex(dataset_zip)
+    index.members['../escaped.jpg'] = index.members['train/images/a.jpg']
+    with pytest.raises(ValueError, match='outside'):
+        index._extract_one('../escaped.jpg', str(tmp_path / 'out'))
+    assert not os.path.exists(tmp_path / 'escaped.jpg')
+
+
+def test_parse_label_text_rejects_short_rows():
+    with pytest.raises(ValueError):
+        parse_label_text('0 0.5 0.5\n')
@@ -29,73 +29,104 @@ uploaded = files.upload()
 zip_filename = list(uploaded.keys())[0]
 print(f"\n✅ Uploaded: {zip_filename}")
 
-# Step 3: Extract the dataset
-print("\n📂 Step 3: Extracting dataset...")
-with zipfile.ZipFile(zip_filename, 'r') as zip_ref:
-    zip_ref.extractall('mahjong_dataset')
-
-print("✅ Extracted!")
-
-# Show contents
-print("\n📁 Dataset contents:")
-!ls -la mahjong_dataset/
-!find mahjong_dataset -name "*.yaml" | head -5
-
-# Find the data.yaml file
-import glob
-yaml_files = glob.glob('mahjong_dataset/**/data.yaml', recursive=True)
-if not yaml_files:
-    yaml_files = glob.glob('mahjong_dataset/**/*.yaml', recursive=True)
-
-if yaml_files:
-    data_yaml_path = yaml_files[0]
-    print(f"\n✅ Found config: {data_yaml_path}")
+# Step 3: Prepare the dataset
+# With the mahjong_train package on the path (clone this repo and add
+# training/ to sys.path), the zip is indexed once and only the labelled
+# train/valid members are extracted, in parallel, while the labels are
+# checked. Otherwise fall back to extracting everything.
+try:
+    from mahjong_train.zipstream import ZipDatasetIndex
+    STREAM_FROM_ZIP = True
+except ImportError:
+    STREAM_FROM_ZIP = False
+
+if STREAM_FROM_ZIP:
+    print("\n📂 Step 3: Indexing dataset zip...")
+    index = ZipDatasetIndex(zip_filename)
+    if index.yaml_member is None:
+        raise FileNotFoundError(f"No data.yaml found in {zip_filename}")
+
+    for split, counts in index.summary().items():
+        print(f"   {split}: {counts['labelled']} labelled / {counts['images']} images")
+
+    data_yaml_path, report = index.materialize('mahjong_dataset')
+    print(f"✅ Extracted {report['extracted']} of {report['members_total']} members "
+          f"({report['skipped']} already present) in {report['seconds']:.1f}s")
+    if report['problems']:
+        print(f"⚠️  {len(report['problems'])} label problems:")
+        for problem in report['problems'][:20]:
+            print(f"   {problem}")
+
+    print(f"\n📋 Dataset config ({data_yaml_path}):")
+    with open(data_yaml_path) as f:
+        print(f.read())
 else:
-    # Try common locations
-    possible_paths = [
-        'mahjong_dataset/data.yaml',
-        'mahjong_dataset/dataset.yaml',
-    ]
-    for p in possible_paths:
-        if os.path.exists(p):
-            data_yaml_path = p
-            break
+    print("\n📂 Step 3: Extracting dataset...")
+    with zipfile.ZipFile(zip_filename, 'r') as zip_ref:
+        zip_ref.extractall('mahjong_dataset')
+
+    print("✅ Extracted!")
+
+    # Show contents
+    print("\n📁 Dataset contents:")
+    !ls -la mahjong_dataset/
+    !find mahjong_dataset -name "*.yaml" | head -5
+
+    # Find the data.yaml file
+    import glob
+    yaml_files = glob.glob('mahjong_dataset/**/data.yaml', recursive=True)
+    if not yaml_files:
+        yaml_files = glob.glob('mahjong_dataset/**/*.yaml', recursive=True)
+
+    if yaml_files:
+        data_yaml_path = yaml_files[0]
+        print(f"\n✅ Found config: {data_yaml_path}")
     else:
-        print("❌ Could not find data.yaml")
-        print("Listing all files:")
-        !find mahjong_dataset -type f | head -20
-        data_yaml_path = input("Enter the path to data.yaml: ").strip()
-
-# Show the yaml contents
-print(f"\n📋 Dataset config ({data_yaml_path}):")
-!cat {data_yaml_path}
-
-# Fix paths in data.yaml if needed (Roboflow sometimes uses absolute paths)
-print("\n🔧 Fixing dataset paths...")
-with open(data_yaml_path, 'r') as f:
-    yaml_content = f.read()
-
-# Get the directory containing data.yaml
-dataset_dir = os.path.dirname(os.path.abspath(data_yaml_path))
-
-# Update the yaml to use relative paths
-import yaml
-
-with open(data_yaml_path, 'r') as f:
-    data_config = yaml.safe_load(f)
-
-# Fix the path to be the dataset directory
-data_config['path'] = dataset_dir
-
-with open(data_yaml_path, 'w') as f:
-    yaml.dump(data_config, f)
-
-print("✅ Paths fixed!")
-print(f"Dataset path: {dataset_dir}")
-
-# Count images
-print("\n📷 Counting training images...")
-!find {dataset_dir} -name "*.jpg" -o -name "*.png" | wc -l
+        # Try common locations
+        possible_paths = [
+            'mahjong_dataset/data.yaml',
+            'mahjong_dataset/dataset.yaml',
+        ]
+        for p in possible_paths:
+            if os.path.exists(p):
+                data_yaml_path = p
+                break
+        else:
+            print("❌ Could not find data.yaml")
+            print("Listing all files:")
+            !find mahjong_dataset -type f | head -20
+            data_yaml_path = input("Enter the path to data.yaml: ").strip()
+
+    # Show the yaml contents
+    print(f"\n📋 Dataset config ({data_yaml_path}):")
+    !cat {data_yaml_path}
+
+    # Fix paths in data.yaml if needed (Roboflow sometimes uses absolute paths)
+    print("\n🔧 Fixing dataset paths...")
+    with open(data_yaml_path, 'r') as f:
+        yaml_content = f.read()
+
+    # Get the directory containing data.yaml
+    dataset_dir = os.path.dirname(os.path.abspath(data_yaml_path))
+
+    # Update the yaml to use relative paths
+    import yaml
+
+    with open(data_yaml_path, 'r') as f:
+        data_config = yaml.safe_load(f)
+
+    # Fix the path to be the dataset directory
+    data_config['path'] = dataset_dir
+
+    with open(data_yaml_path, 'w') as f:
+        yaml.dump(data_config, f)
+
+    print("✅ Paths fixed!")
+    print(f"Dataset path: {dataset_dir}")
+
+    # Count images
+    print("\n📷 Counting training images...")
+    !find {dataset_dir} -name "*.jpg" -o -name "*.png" | wc -l
 
 # Step 4: Train YOLOv8
 print("\n" + "=" * 60)